@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""Hot paths timed by the benchmark runner.
+
+Each benchmark takes a BenchmarkLeague and returns a callable that runs the
+code path once. Anything that only needs doing once (looking up objects,
+building POST data) happens before the callable is returned so it is not
+timed.
+
+Benchmarks registered with cached=True render cached fragments, so the
+runner times them both with the cache cleared before each run and with it
+warm.
+"""
+from __future__ import absolute_import, unicode_literals
+
+from collections import OrderedDict
+
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.test import RequestFactory
+
+from fglsite.bets.models import Gameweek, Season
+from fglsite.bets.views import GameweekDetailView, ResultsFormView, SeasonDetailView
+from fglsite.gambling.models import BetContainer, LongSpecialContainer
+from fglsite.gambling.views import BetContainerDetailView, LongSpecialResultFormView
+
+BENCHMARKS = OrderedDict()
+# Names of the benchmarks that render cached fragments
+CACHED = set()
+
+
+def benchmark(name, cached=False):
+    """ Register a benchmark under this name """
+
+    def register(setup):
+        BENCHMARKS[name] = setup
+        if cached:
+            CACHED.add(name)
+        return setup
+
+    return register
+
+
+class BenchmarkLeague:
+    """ Objects from a generated league that the benchmarks run against """
+
+    def __init__(self, season):
+        self.season = season
+        self.commissioner = season.commissioner
+        self.open_gameweek = season.get_latest_gameweek()
+        self.settled_gameweek = (
+            season.gameweek_set.filter(number=self.open_gameweek.number - 1).first()
+            or self.open_gameweek
+        )
+        self.bet_container = (
+            BetContainer.objects.filter(gameweek__season=season, gameweek__number=1)
+            .exclude(owner=self.commissioner)
+            .order_by("id")
+            .first()
+        )
+        self.player = self.bet_container.owner
+        self.long_special_container = (
+            LongSpecialContainer.objects.filter(
+                created_gameweek__season=season, longspecial__longspecialresult=None
+            )
+            .order_by("id")
+            .first()
+        )
+        self.factory = RequestFactory()
+
+    def _request(self, method, user, data=None):
+        request = getattr(self.factory, method)("/", data or {})
+        request.user = user
+        request._messages = CookieStorage(request)
+        return request
+
+    def get(self, view_class, user, **kwargs):
+        response = view_class.as_view()(self._request("get", user), **kwargs)
+        if hasattr(response, "render"):
+            response.render()
+        return response
+
+    def post(self, view_class, user, data, **kwargs):
+        return view_class.as_view()(self._request("post", user, data), **kwargs)
+
+
+@benchmark("settle_results")
+def settle_results(league):
+    """ Resubmit the results of the latest settled gameweek """
+    gameweek = league.settled_gameweek
+    results = list(gameweek.game_set.order_by("id").values_list("id", "result__result"))
+    data = {"form-TOTAL_FORMS": len(results), "form-INITIAL_FORMS": len(results)}
+    for number, (game_id, result) in enumerate(results):
+        data["form-{0}-game".format(number)] = game_id
+        data["form-{0}-result".format(number)] = result or "H"
+
+    return lambda: league.post(
+        ResultsFormView, league.commissioner, data, gameweek_id=gameweek.id
+    )
+
+
+@benchmark("settle_long_special")
+def settle_long_special(league):
+    """ Post the result of a long special in the latest settled gameweek """
+    container = league.long_special_container
+    if container is None:
+        return None
+
+    data = {
+        "long_special": container.longspecial_set.order_by("id").first().id,
+        "completed_gameweek": league.settled_gameweek.id,
+    }
+    return lambda: league.post(
+        LongSpecialResultFormView,
+        league.commissioner,
+        data,
+        pk=container.id,
+        gameweek_id=league.settled_gameweek.id,
+    )
+
+
+@benchmark("get_ordered_results")
+def get_ordered_results(league):
+    return lambda: Gameweek.objects.get(
+        pk=league.settled_gameweek.id
+    ).get_ordered_results()
+
+
+@benchmark("long_specials_outstanding")
+def long_specials_outstanding(league):
+    return lambda: Season.objects.get(pk=league.season.id).long_specials_outstanding()
+
+
+@benchmark("render_gameweek_detail", cached=True)
+def render_gameweek_detail(league):
+    return lambda: league.get(
+        GameweekDetailView, league.player, pk=league.settled_gameweek.id
+    )
+
+
+@benchmark("render_season_detail", cached=True)
+def render_season_detail(league):
+    return lambda: league.get(SeasonDetailView, league.player, pk=league.season.id)
+
+
+@benchmark("render_betcontainer_detail", cached=True)
+def render_betcontainer_detail(league):
+    return lambda: league.get(
+        BetContainerDetailView, league.player, pk=league.bet_container.id
+    )
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import datetime
+import os
+import platform
+import time
+
+import django
+from django.core.cache import cache
+from django.db import connection, transaction
+import numpy as np
+
+from fglsite.benchmarks.cases import BENCHMARKS, CACHED, BenchmarkLeague
+from fglsite.common.middleware import QueryRecorder
+from fglsite.gambling.synthetic import generate_league
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+PERCENTILES = (50, 90, 95, 99)
+# Players of benchmark leagues are named apart from generate_league's
+BENCHMARK_PREFIX = "benchmark"
+
+
+def summarise(timings, queries):
+    """ Median, percentiles and spread of a list of timings in seconds """
+    milliseconds = np.asarray(timings) * 1000
+    summary = {
+        "runs": len(timings),
+        "queries": queries,
+        "min_ms": round(float(milliseconds.min()), 3),
+        "max_ms": round(float(milliseconds.max()), 3),
+        "median_ms": round(float(np.median(milliseconds)), 3),
+    }
+    for percentile, value in zip(PERCENTILES, np.percentile(milliseconds, PERCENTILES)):
+        summary["p{0}_ms".format(percentile)] = round(float(value), 3)
+    return summary
+
+
+def time_benchmark(run, repeat, before=None):
+    """Time repeat runs, after one untimed warm up run, counting the queries
+    of the last. before, if given, is called ahead of each timed run and
+    isn't timed."""
+    run()
+    timings = []
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        queries = QueryRecorder()
+        with connection.execute_wrapper(queries):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+    return summarise(timings, queries.count)
+
+
+def run_benchmarks(scales, repeat=5, names=None, log=None, **league_options):
+    """Run benchmarks against a league generated at each scale (number of
+    users). Each league is generated inside a transaction that is rolled back
+    afterwards, so nothing is left in the database.
+
+    Benchmarks that render cached fragments are reported twice, as
+    "<name>:cold" with the cache cleared before each run and "<name>:warm"
+    served from it.
+
+    Every scale needs at least 2 users, the commissioner and a player, and
+    repeat must be at least 1, or raises ValueError.
+    """
+    if any(users < 2 for users in scales):
+        raise ValueError("Benchmark leagues need at least 2 users")
+    if repeat < 1:
+        raise ValueError("Benchmarks need to be repeated at least once")
+    log = log or (lambda message: None)
+    league_options.setdefault("prefix", BENCHMARK_PREFIX)
+    names = names or list(BENCHMARKS)
+    results = {
+        "created": datetime.datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "repeat": repeat,
+        "league": league_options,
+        "scales": {},
+    }
+
+    for users in scales:
+        scale_results = results["scales"][str(users)] = {}
+        with transaction.atomic():
+            league = BenchmarkLeague(generate_league(users=users, **league_options))
+            for name in names:
+                run = BENCHMARKS[name](league)
+                if run is None:
+                    log("{0} users: {1} skipped".format(users, name))
+                    continue
+                if name in CACHED:
+                    timed = [
+                        (name + ":cold", time_benchmark(run, repeat, cache.clear)),
+                        (name + ":warm", time_benchmark(run, repeat)),
+                    ]
+                else:
+                    timed = [(name, time_benchmark(run, repeat))]
+                for result_name, summary in timed:
+                    scale_results[result_name] = summary
+                    log(
+                        "{0} users: {1} median {2[median_ms]}ms p95 {2[p95_ms]}ms "
+                        "({2[queries]} queries)".format(users, result_name, summary)
+                    )
+            transaction.set_rollback(True)
+
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Find benchmarks whose median is more than tolerance (a fraction)
+    slower than the baseline, as (scale, name, baseline ms, ms) tuples"""
+    regressions = []
+    for scale, scale_results in sorted(results["scales"].items()):
+        baseline_results = baseline.get("scales", {}).get(scale, {})
+        for name, summary in sorted(scale_results.items()):
+            if name not in baseline_results:
+                continue
+            baseline_median = baseline_results[name]["median_ms"]
+            if summary["median_ms"] > baseline_median * (1 + tolerance):
+                regressions.append((scale, name, baseline_median, summary["median_ms"]))
+    return regressions
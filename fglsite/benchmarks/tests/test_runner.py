@@ -0,0 +1,112 @@
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from io import StringIO
+import json
+import os
+import tempfile
+
+from fglsite.bets.models import Season
+from fglsite.benchmarks.cases import BENCHMARKS, CACHED
+from fglsite.benchmarks.runner import compare, run_benchmarks, summarise
+from fglsite.gambling.synthetic import generate_league
+
+
+class SummariseTest(TestCase):
+    def test_summarise(self):
+        summary = summarise([0.001 * number for number in range(1, 101)], 7)
+
+        self.assertEqual(summary["runs"], 100)
+        self.assertEqual(summary["queries"], 7)
+        self.assertEqual(summary["min_ms"], 1.0)
+        self.assertEqual(summary["median_ms"], 50.5)
+        self.assertEqual(summary["p95_ms"], 95.05)
+
+
+class CompareTest(TestCase):
+    def test_compare_reports_slower_medians(self):
+        baseline = {"scales": {"10": {"fast": {"median_ms": 10.0}}}}
+        results = {
+            "scales": {
+                "10": {"fast": {"median_ms": 13.0}, "new": {"median_ms": 1.0}},
+                "20": {"fast": {"median_ms": 50.0}},
+            }
+        }
+
+        self.assertEqual(compare(results, baseline, 0.2), [("10", "fast", 10.0, 13.0)])
+        self.assertEqual(compare(results, baseline, 0.5), [])
+
+
+class RunBenchmarksTest(TestCase):
+    def test_runs_every_benchmark_and_rolls_back(self):
+        results = run_benchmarks([3], repeat=2, gameweeks=3, games=3)
+
+        self.assertEqual(
+            set(results["scales"]["3"]),
+            {
+                name + variant if name in CACHED else name
+                for name in BENCHMARKS
+                for variant in (":cold", ":warm")
+            },
+        )
+        for summary in results["scales"]["3"].values():
+            self.assertEqual(summary["runs"], 2)
+            self.assertLessEqual(summary["min_ms"], summary["p99_ms"])
+        self.assertFalse(Season.objects.exists())
+
+    def test_cold_renders_miss_the_fragment_cache(self):
+        scale_results = run_benchmarks(
+            [3], repeat=2, names=["render_gameweek_detail"], gameweeks=2
+        )["scales"]["3"]
+
+        cold = scale_results["render_gameweek_detail:cold"]
+        warm = scale_results["render_gameweek_detail:warm"]
+        self.assertGreater(cold["queries"], warm["queries"])
+
+    def test_runs_alongside_generated_league(self):
+        generate_league(users=3, gameweeks=2)
+
+        results = run_benchmarks(
+            [3], repeat=1, names=["render_season_detail"], gameweeks=2
+        )
+
+        self.assertIn("render_season_detail:warm", results["scales"]["3"])
+
+    def test_needs_a_repeat(self):
+        with self.assertRaises(ValueError):
+            run_benchmarks([2], repeat=0)
+        with self.assertRaises(CommandError):
+            call_command("run_benchmarks", scales="2", repeat=0, stdout=StringIO())
+
+    def test_needs_two_users(self):
+        with self.assertRaises(ValueError):
+            run_benchmarks([1], repeat=1)
+        with self.assertRaises(CommandError):
+            call_command("run_benchmarks", scales="1", stdout=StringIO())
+
+    def test_command_compares_with_baseline(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.json")
+            baseline = os.path.join(directory, "baseline.json")
+            options = {
+                "scales": "2",
+                "repeat": 1,
+                "gameweeks": 2,
+                "benchmark": ["render_season_detail"],
+                "output": output,
+                "baseline": baseline,
+            }
+
+            call_command(
+                "run_benchmarks", save_baseline=True, stdout=StringIO(), **options
+            )
+            with open(baseline) as baseline_file:
+                stored = json.load(baseline_file)
+            stored["scales"]["2"]["render_season_detail:warm"]["median_ms"] = 0.0
+            with open(baseline, "w") as baseline_file:
+                json.dump(stored, baseline_file)
+
+            out = StringIO()
+            call_command("run_benchmarks", stdout=out, **options)
+
+            self.assertIn("render_season_detail:warm median", out.getvalue())
+            self.assertIn("baseline 0.0ms", out.getvalue())
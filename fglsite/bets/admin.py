@@ -7,13 +7,34 @@ from .models import (
     Season,
     Gameweek,
     Balance,
+    BalanceEvent,
+    BalanceSnapshot,
     Game,
     Result,
+    Standing,
 )
 
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    """For balances and the rows derived from them, which are only written
+    through BalanceManager so the ledger and standings stay in step"""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 # Register your models here.
 admin.site.register(Season)
 admin.site.register(Gameweek)
-admin.site.register(Balance)
+admin.site.register(Balance, ReadOnlyAdmin)
+admin.site.register(BalanceEvent, ReadOnlyAdmin)
+admin.site.register(BalanceSnapshot, ReadOnlyAdmin)
 admin.site.register(Game)
 admin.site.register(Result)
+admin.site.register(Standing, ReadOnlyAdmin)
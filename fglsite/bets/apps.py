@@ -6,3 +6,6 @@ from django.apps import AppConfig
 
 class BetsConfig(AppConfig):
     name = "fglsite.bets"
+
+    def ready(self):
+        from fglsite.bets import signals  # noqa: F401
@@ -0,0 +1,89 @@
+# Generated by Django 2.1.15 on 2026-10-18 11:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_standings(apps, schema_editor):
+    Gameweek = apps.get_model('bets', 'Gameweek')
+    Balance = apps.get_model('bets', 'Balance')
+    Standing = apps.get_model('bets', 'Standing')
+
+    prev_positions = {}
+    prev_season_id = None
+    for gameweek in Gameweek.objects.order_by('season_id', 'number'):
+        if gameweek.season_id != prev_season_id:
+            prev_positions = {}
+            prev_season_id = gameweek.season_id
+
+        # Older data may hold more than one balance per user per gameweek;
+        # only the latest counts (see 0007_balance_unique_user)
+        latest_ids = Balance.objects.filter(gameweek=gameweek).values(
+            'user_id'
+        ).annotate(latest_id=models.Max('id')).values('latest_id')
+
+        positions = {}
+        standings = []
+        for position, balance in enumerate(
+            Balance.objects.filter(id__in=latest_ids).order_by('-provisional', 'id')
+        ):
+            positions[balance.user_id] = position
+            previous_position = prev_positions.get(balance.user_id)
+            if previous_position is None or previous_position == position:
+                change_icon = '-'
+            elif previous_position > position:
+                change_icon = '/\\'
+            else:
+                change_icon = '\\/'
+            standings.append(Standing(
+                season_id=gameweek.season_id,
+                gameweek=gameweek,
+                user_id=balance.user_id,
+                position=position,
+                previous_position=previous_position,
+                change_icon=change_icon,
+                week=balance.week,
+                provisional=balance.provisional,
+                special=balance.special,
+                banked=balance.banked,
+            ))
+
+        Standing.objects.bulk_create(standings)
+        prev_positions = positions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bets', '0004_auto_20210102_1626'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Standing',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.IntegerField(default=0)),
+                ('previous_position', models.IntegerField(blank=True, null=True)),
+                ('change_icon', models.CharField(default='-', max_length=2)),
+                ('week', models.DecimalField(decimal_places=2, default=0.0, max_digits=99)),
+                ('provisional', models.DecimalField(decimal_places=2, default=0.0, max_digits=99)),
+                ('special', models.DecimalField(decimal_places=2, default=0.0, max_digits=99)),
+                ('banked', models.DecimalField(decimal_places=2, default=0.0, max_digits=99)),
+                ('gameweek', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='bets.Gameweek')),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='bets.Season')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='standing',
+            index=models.Index(fields=['gameweek', 'position'], name='bets_standi_gamewee_4791d3_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='standing',
+            unique_together={('gameweek', 'user')},
+        ),
+        migrations.RunPython(build_standings, migrations.RunPython.noop),
+    ]
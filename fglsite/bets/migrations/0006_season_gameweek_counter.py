@@ -0,0 +1,42 @@
+# Generated by Django 2.1.15 on 2026-10-18 11:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def count_gameweeks(apps, schema_editor):
+    Season = apps.get_model('bets', 'Season')
+
+    # As Season.refresh_gameweek_counter, the count follows the highest
+    # number so a season with a gap doesn't reuse one
+    for season in Season.objects.all():
+        season.latest_gameweek = season.gameweek_set.order_by('-number').first()
+        season.gameweek_count = (
+            season.latest_gameweek.number if season.latest_gameweek else 0
+        )
+        season.save(update_fields=['gameweek_count', 'latest_gameweek'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bets', '0005_standing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='season',
+            name='gameweek_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='season',
+            name='latest_gameweek',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='bets.Gameweek'),
+        ),
+        migrations.AddIndex(
+            model_name='gameweek',
+            index=models.Index(fields=['season', 'number'], name='bets_gamewe_season__b3e745_idx'),
+        ),
+        migrations.RunPython(count_gameweeks, migrations.RunPython.noop),
+    ]
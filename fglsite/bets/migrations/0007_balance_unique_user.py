@@ -0,0 +1,38 @@
+# Generated by Django 2.1.15 on 2026-10-18 12:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def remove_duplicate_balances(apps, schema_editor):
+    """ Keep only the latest balance for each user in each gameweek """
+    Balance = apps.get_model('bets', 'Balance')
+
+    duplicates = Balance.objects.values('gameweek_id', 'user_id').annotate(
+        latest_id=models.Max('id'), balance_count=models.Count('id')
+    ).filter(balance_count__gt=1)
+
+    for duplicate in duplicates:
+        Balance.objects.filter(
+            gameweek_id=duplicate['gameweek_id'], user_id=duplicate['user_id']
+        ).exclude(id=duplicate['latest_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bets', '0006_season_gameweek_counter'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_balances, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='balance',
+            unique_together={('gameweek', 'user')},
+        ),
+        migrations.AddIndex(
+            model_name='balance',
+            index=models.Index(fields=['gameweek', '-provisional'], name='bets_balanc_gamewee_475375_idx'),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 2.1.15 on 2026-10-18 12:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def record_opening_events(apps, schema_editor):
+    """Start the ledger from the existing balances: their weekly part as a
+    weekly settlement and any special money as a long special payout"""
+    Balance = apps.get_model('bets', 'Balance')
+    BalanceEvent = apps.get_model('bets', 'BalanceEvent')
+
+    events = []
+    for balance in Balance.objects.order_by('gameweek_id', 'id').iterator():
+        events.append(BalanceEvent(
+            gameweek_id=balance.gameweek_id,
+            user_id=balance.user_id,
+            kind='weekly',
+            week=balance.week,
+            provisional=balance.provisional - balance.special,
+            special=0,
+            banked=balance.banked - balance.special,
+        ))
+        if balance.special:
+            events.append(BalanceEvent(
+                gameweek_id=balance.gameweek_id,
+                user_id=balance.user_id,
+                kind='long_special',
+                week=0,
+                provisional=balance.special,
+                special=balance.special,
+                banked=balance.special,
+            ))
+    BalanceEvent.objects.bulk_create(events, batch_size=100)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bets', '0007_balance_unique_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_event_id', models.IntegerField()),
+                ('week', models.DecimalField(decimal_places=2, default=0.0, max_digits=99)),
+                ('provisional', models.DecimalField(decimal_places=2, default=0.0, max_digits=99)),
+                ('special', models.DecimalField(decimal_places=2, default=0.0, max_digits=99)),
+                ('banked', models.DecimalField(decimal_places=2, default=0.0, max_digits=99)),
+                ('gameweek', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='bets.Gameweek')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BalanceEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('weekly', 'Weekly settlement'), ('no_bets', 'No bets penalty'), ('long_special', 'Long special payout'), ('long_special_correction', 'Long special correction')], max_length=30)),
+                ('week', models.DecimalField(decimal_places=2, default=0.0, max_digits=99)),
+                ('provisional', models.DecimalField(decimal_places=2, default=0.0, max_digits=99)),
+                ('special', models.DecimalField(decimal_places=2, default=0.0, max_digits=99)),
+                ('banked', models.DecimalField(decimal_places=2, default=0.0, max_digits=99)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('gameweek', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='bets.Gameweek')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='balancesnapshot',
+            index=models.Index(fields=['gameweek', 'last_event_id'], name='bets_balanc_gamewee_f1d6d4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='balanceevent',
+            index=models.Index(fields=['gameweek', 'user'], name='bets_balanc_gamewee_6e7295_idx'),
+        ),
+        migrations.RunPython(record_opening_events, migrations.RunPython.noop),
+    ]
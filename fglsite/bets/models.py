@@ -2,7 +2,9 @@
 from __future__ import absolute_import, unicode_literals, division
 
 import datetime
+from decimal import Decimal
 
+from django.apps import apps
 from django.db import models
 
 from django.contrib.auth.models import User
@@ -20,13 +22,50 @@ class Season(models.Model):
         default=100.0, decimal_places=2, max_digits=99
     )
     added = models.DateTimeField(auto_now_add=True)
+    gameweek_count = models.IntegerField(default=0)
+    latest_gameweek = models.ForeignKey(
+        "Gameweek",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
 
     def __str__(self):
         return self.name
 
     def get_next_gameweek_id(self):
         """ Get id for next gameweek """
-        return len(self.gameweek_set.all()) + 1
+        return self.gameweek_count + 1
+
+    def _record_gameweek(self, gameweek):
+        """ Update gameweek count and latest gameweek for a new gameweek """
+        Season.objects.filter(pk=self.pk).update(
+            gameweek_count=models.F("gameweek_count") + 1
+        )
+        Season.objects.filter(pk=self.pk).filter(
+            models.Q(latest_gameweek__isnull=True)
+            | models.Q(latest_gameweek__number__lt=gameweek.number)
+        ).update(latest_gameweek=gameweek)
+        self.refresh_from_db(fields=["gameweek_count", "latest_gameweek"])
+
+    def refresh_gameweek_counter(self):
+        """Recalculate gameweek count and latest gameweek from scratch. The
+        count follows the latest gameweek's number, so a gap left by a
+        deleted gameweek doesn't lead to a number being reused."""
+        self.latest_gameweek = self.gameweek_set.order_by("-number").first()
+        self.gameweek_count = self.latest_gameweek.number if self.latest_gameweek else 0
+        self.save(update_fields=["gameweek_count", "latest_gameweek"])
+
+    def create_gameweek(self, **kwargs):
+        """ Create the next gameweek for this season """
+        with transaction.atomic():
+            season = Season.objects.select_for_update().get(pk=self.pk)
+            gameweek = Gameweek.objects.create(
+                season=season, number=season.get_next_gameweek_id(), **kwargs
+            )
+            self.refresh_from_db(fields=["gameweek_count", "latest_gameweek"])
+            return gameweek
 
     def _get_gameweek_by_id(self, gameweek_id):
         return self.gameweek_set.filter(number=gameweek_id)[0]
@@ -57,12 +96,7 @@ class Season(models.Model):
 
     def get_latest_gameweek(self):
         """ Get latest gameweek """
-        if self.get_next_gameweek_id() == 1:
-            return None
-
-        latest_gameweek_number = self.get_next_gameweek_id() - 1
-
-        return self._get_gameweek_by_id(latest_gameweek_number)
+        return self.latest_gameweek
 
     def can_create_gameweek(self):
         """ Check whether new gameweek can be created """
@@ -72,11 +106,50 @@ class Season(models.Model):
         return True
 
     def long_specials_outstanding(self):
-        long_specials_outstanding = []
-        for gameweek in self.gameweek_set.all():
-            long_specials_outstanding += gameweek.long_specials_outstanding()
+        """ Get long specials created this season still waiting for results """
+        LongSpecialContainer = apps.get_model("gambling", "LongSpecialContainer")
+        return list(
+            LongSpecialContainer.objects.filter(created_gameweek__season_id=self.id)
+            .outstanding()
+            .select_related("created_gameweek__season")
+            .order_by("created_gameweek__number", "id")
+        )
 
-        return long_specials_outstanding
+
+def _flag(condition):
+    return models.Case(
+        models.When(condition, then=models.Value(True)),
+        default=models.Value(False),
+        output_field=models.BooleanField(),
+    )
+
+
+class GameweekQuerySet(models.QuerySet):
+    def with_status(self, now=None):
+        """Annotate gameweeks with their status in a single query:
+
+        game_count - number of games
+        outstanding_result_count - games without a result
+        is_results_complete - every game has a result
+        has_any_bets - any user has placed bets
+        is_deadline_passed - deadline is before now (default: current time)
+        """
+        now = now or datetime.datetime.now()
+        BetContainer = apps.get_model("gambling", "BetContainer")
+
+        return self.annotate(
+            game_count=models.Count("game", distinct=True),
+            outstanding_result_count=models.Count(
+                "game", filter=models.Q(game__result__isnull=True), distinct=True
+            ),
+            has_any_bets=models.Exists(
+                BetContainer.objects.filter(gameweek=models.OuterRef("pk"))
+            ),
+            is_deadline_passed=_flag(
+                models.Q(deadline_date__lt=now.date())
+                | models.Q(deadline_date=now.date(), deadline_time__lte=now.time())
+            ),
+        ).annotate(is_results_complete=_flag(models.Q(outstanding_result_count=0)))
 
 
 class Gameweek(models.Model):
@@ -85,15 +158,26 @@ class Gameweek(models.Model):
     deadline_date = models.DateField(default=datetime.date.today)
     deadline_time = models.TimeField(default=datetime.time(12, 00))
     spiel = models.TextField(default=None, blank=True)
+    objects = GameweekQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=["season", "number"])]
 
     def __str__(self):
         return str(self.season) + "," + str(self.number)
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                self.season._record_gameweek(self)
+
     def is_first_gameweek(self):
         return self.number == 1
 
     def is_latest_gameweek(self):
-        return self == self.season.get_latest_gameweek()
+        return self.id == self.season.latest_gameweek_id
 
     def get_prev_gameweek(self):
         if self.is_first_gameweek():
@@ -105,53 +189,31 @@ class Gameweek(models.Model):
             raise Exception("Called get_next_gameweek on latest gameweek")
         return self.season._get_gameweek_by_id(self.number + 1)
 
-    def update_no_bet_users(self):
-        """For users who have no betcontainer for this week, set weekly winnings
-        as -100, weekly unused as all available rollable and update balance
-        accordingly"""
-        if self.number > 1:
-            users = self._get_users_with_bets()
-            prev_gameweek = self.get_prev_gameweek()
-            prev_balance_set = prev_gameweek.balance_set.all()
-
-            for balance in prev_balance_set:
-                if balance.user not in users:
-                    if balance.week > 0:
-                        unused = float(balance.week)
-                    else:
-                        unused = 0.0
-                    Balance.objects.create_with_weekly(
-                        gameweek=self,
-                        user=balance.user,
-                        week_winnings=float(self.season.weekly_allowance * -1),
-                        week_unused=unused,
-                    )
-
     def get_prev_banked(self, user):
         # If Gameweek 1 then last banked must be 0
         if self.number == 1:
             return 0.0
         else:
-            prev_gameweek = self.get_prev_gameweek()
-            prev_balance = prev_gameweek._get_balance_by_user(user)
-            return prev_balance.banked
+            return Balance.objects.get(
+                gameweek__season_id=self.season_id,
+                gameweek__number=self.number - 1,
+                user=user,
+            ).banked
 
     def _get_balance_by_user(self, user):
         """ Get user balance """
-        if len(self.balance_set.filter(user=user)) == 0:
-            return None
-        else:
-            return self.balance_set.filter(user=user)[0]
+        return self.balance_set.filter(user=user).first()
 
     def has_bets(self):
         """ Check if any users have placed bets """
-        if len(self.betcontainer_set.all()) > 0:
-            return True
-        else:
-            return False
+        if hasattr(self, "has_any_bets"):
+            return self.has_any_bets
+        return self.betcontainer_set.exists()
 
     def deadline_passed(self):
         """ Check if deadline has passed """
+        if hasattr(self, "is_deadline_passed"):
+            return self.is_deadline_passed
         return (
             datetime.datetime.now().date() == self.deadline_date
             and datetime.datetime.now().time() >= self.deadline_time
@@ -159,12 +221,15 @@ class Gameweek(models.Model):
 
     def results_complete(self):
         """ Check if ALL results have been posted """
-        results_count = 0
-        game_set = self.game_set.all()
-        for game in game_set:
-            if len(game.result_set.all()) > 0:
-                results_count += 1
-        return results_count == len(game_set)
+        if hasattr(self, "is_results_complete"):
+            return self.is_results_complete
+        return not self.game_set.filter(result__isnull=True).exists()
+
+    def get_outstanding_result_count(self):
+        """ Count games still waiting for a result """
+        if hasattr(self, "outstanding_result_count"):
+            return self.outstanding_result_count
+        return self.game_set.filter(result__isnull=True).count()
 
     def _get_allowance_by_user(self, user):
         """ Get allowance + rollable for this user """
@@ -181,8 +246,9 @@ class Gameweek(models.Model):
         if self.number == 1:
             return None
         else:
-            prev_gameweek = self.get_prev_gameweek()
-            prev_balances = prev_gameweek.balance_set.all()
+            prev_balances = Balance.objects.filter(
+                gameweek__season_id=self.season_id, gameweek__number=self.number - 1
+            ).select_related("user")
             rollable_allowances = {}
             for balance in prev_balances:
                 if balance.week > 0.0:
@@ -192,7 +258,7 @@ class Gameweek(models.Model):
     def _get_user_positions(self):
         user_positions = {}
         position = 0
-        for balance in self.balance_set.order_by("-provisional"):
+        for balance in self.balance_set.select_related("user").order_by("-provisional"):
             user_positions.update({balance.user: position})
             position += 1
 
@@ -219,17 +285,15 @@ class Gameweek(models.Model):
         else:
             prev_positions = {}
 
-        for balance in self.balance_set.order_by("-provisional"):
+        for balance in self.balance_set.select_related("user").order_by("-provisional"):
             change_icon = self._get_change_icon(positions, prev_positions, balance.user)
             results.append([balance, change_icon])
 
         return results
 
-    def _get_users_with_bets(self):
-        users = []
-        for betcontainer in self.betcontainer_set.all():
-            users.append(betcontainer.owner)
-        return users
+    def get_standings(self):
+        """ Get maintained standings ordered by position """
+        return self.standing_set.select_related("user").order_by("position")
 
     def get_users_with_ready_bets_as_string(self):
         """ Print usernames of users who have already placed valid bets """
@@ -244,23 +308,49 @@ class Gameweek(models.Model):
 
     def user_has_balance(self, user):
         """ Check if user has a balance """
-        return len(self.balance_set.filter(user=user)) > 0
+        return self.balance_set.filter(user=user).exists()
 
     def long_specials_outstanding(self):
-        return [
-            container
-            for container in self.longspecialcontainer_set.all()
-            if not container.is_complete()
-        ]
+        return list(self.longspecialcontainer_set.outstanding().order_by("id"))
+
+
+BALANCE_FIELDS = ("week", "provisional", "special", "banked")
+
+
+def _to_money(value):
+    """ Round to the two decimal places balances are stored with """
+    return Decimal("{0:.2f}".format(float(value)))
+
+
+def _update_in_batches(manager, objects, fields, batch_size):
+    """Save these fields of objects that already exist with one UPDATE per
+    batch, as bulk_update does from Django 2.2"""
+    for start in range(0, len(objects), batch_size):
+        batch = objects[start : start + batch_size]
+        manager.filter(pk__in=[obj.pk for obj in batch]).update(
+            **{
+                field: models.Case(
+                    *[
+                        models.When(pk=obj.pk, then=models.Value(getattr(obj, field)))
+                        for obj in batch
+                    ],
+                    output_field=manager.model._meta.get_field(field),
+                )
+                for field in fields
+            }
+        )
 
 
 class BalanceManager(models.Manager):
+    batch_size = 100
+
     def get_existing(self, gameweek, user):
-        return Balance.objects.filter(gameweek=gameweek, user=user).first()
+        return self.filter(gameweek=gameweek, user=user).first()
 
-    def create_with_weekly(self, gameweek, user, week_winnings, week_unused):
-        """Create or recreate balance for this gameweek for this user.
-        If the balance already exists then we need to add any existing special money.
+    def build_with_weekly(
+        self, gameweek, user_id, week_winnings, week_unused, prev_banked, special
+    ):
+        """Build (but don't save) a balance from weekly winnings.
 
         Weekly = week_winnings
         Special = long_term_winnings
@@ -268,74 +358,242 @@ class BalanceManager(models.Manager):
         Banked = last week banked + week_unused + any weekly losses + special
         """
 
-        existing_balance = self.get_existing(gameweek, user)
-        long_term_winnings = existing_balance.special if existing_balance else 0.0
-
         # If user made a loss then that has to be realized immediately
         enforce_banked = week_winnings if week_winnings < 0.0 else 0.0
-        prev_banked = gameweek.get_prev_banked(user)
-        banked = (
-            float(prev_banked)
-            + week_unused
-            + enforce_banked
-            + float(long_term_winnings)
-        )
+        banked = float(prev_banked) + week_unused + enforce_banked + float(special)
 
         provisional = banked if week_winnings <= 0.0 else banked + week_winnings
 
-        with transaction.atomic():
-            if existing_balance:
-                existing_balance.delete()
-            return super().create(
+        return self.model(
+            gameweek=gameweek,
+            user_id=user_id,
+            week=week_winnings,
+            provisional=provisional,
+            special=special,
+            banked=banked,
+        )
+
+    def _get_for_users(self, queryset, user_ids):
+        """Restrict to these users when there are only a few of them, otherwise
+        load the whole gameweek rather than send a huge IN clause"""
+        if len(user_ids) <= self.batch_size:
+            queryset = queryset.filter(user_id__in=user_ids)
+        return queryset
+
+    def _get_existing_balances(self, gameweek, user_ids):
+        """ Map user id to their saved balance for this gameweek """
+        return {
+            balance.user_id: balance
+            for balance in self._get_for_users(self.filter(gameweek=gameweek), user_ids)
+        }
+
+    def _get_prev_banked(self, gameweek, user_ids):
+        """ Map user id to banked balance from the previous gameweek """
+        if gameweek.number == 1:
+            return {}
+
+        return dict(
+            self._get_for_users(
+                self.filter(
+                    gameweek__season_id=gameweek.season_id,
+                    gameweek__number=gameweek.number - 1,
+                ),
+                user_ids,
+            ).values_list("user_id", "banked")
+        )
+
+    def _write(self, balances, existing_balances):
+        """Insert new balances and update changed ones in place, one statement
+        per batch. Balances that already exist keep their primary key and
+        unchanged ones are not written at all."""
+        new_balances = []
+        changed_balances = []
+        for balance in balances:
+            for field in BALANCE_FIELDS:
+                setattr(balance, field, _to_money(getattr(balance, field)))
+
+            existing = existing_balances.get(balance.user_id)
+            if existing is None:
+                new_balances.append(balance)
+            elif any(
+                getattr(existing, field) != getattr(balance, field)
+                for field in BALANCE_FIELDS
+            ):
+                balance.pk = existing.pk
+                changed_balances.append(balance)
+            else:
+                balance.pk = existing.pk
+
+        self.bulk_create(new_balances, batch_size=self.batch_size)
+
+        _update_in_batches(self, changed_balances, BALANCE_FIELDS, self.batch_size)
+
+        return len(new_balances), len(changed_balances)
+
+    def _record(self, gameweek, balances, existing_balances, kinds, default_kind):
+        """Append ledger events for the difference between these balances and
+        the saved ones, then bring the saved balances up to date.
+
+        Returns the events appended.
+        """
+        events = []
+        for balance in balances:
+            for field in BALANCE_FIELDS:
+                setattr(balance, field, _to_money(getattr(balance, field)))
+
+            existing = existing_balances.get(balance.user_id)
+            changes = {
+                field: getattr(balance, field)
+                - (getattr(existing, field) if existing else Decimal("0.00"))
+                for field in BALANCE_FIELDS
+            }
+            if existing is None or any(changes.values()):
+                events.append(
+                    BalanceEvent(
+                        gameweek=gameweek,
+                        user_id=balance.user_id,
+                        kind=kinds.get(balance.user_id, default_kind),
+                        **changes,
+                    )
+                )
+
+        BalanceEvent.objects.bulk_create(events, batch_size=self.batch_size)
+        self._write(balances, existing_balances)
+        return events
+
+    def bulk_write_weekly(self, gameweek, weekly_figures, no_bet_user_ids=()):
+        """Write weekly balances for a gameweek from a dict of user id to
+        (week_winnings, week_unused), keeping any special money already
+        recorded and refreshing the standings.
+
+        Settling again appends compensating events for whatever changed, and
+        a snapshot of the gameweek is taken when first settled and then once
+        enough events have built up since the last (see take_if_due).
+
+        Returns the balances written.
+        """
+        user_ids = list(weekly_figures)
+        existing_balances = self._get_existing_balances(gameweek, user_ids)
+        prev_banked = self._get_prev_banked(gameweek, user_ids)
+
+        balances = [
+            self.build_with_weekly(
                 gameweek=gameweek,
-                user=user,
-                week=week_winnings,
-                provisional=provisional,
-                special=long_term_winnings,
-                banked=banked,
+                user_id=user_id,
+                week_winnings=week_winnings,
+                week_unused=week_unused,
+                prev_banked=prev_banked.get(user_id, 0.0),
+                special=(
+                    existing_balances[user_id].special
+                    if user_id in existing_balances
+                    else 0.0
+                ),
             )
+            for user_id, (week_winnings, week_unused) in weekly_figures.items()
+        ]
+        kinds = {user_id: BalanceEvent.NO_BETS for user_id in no_bet_user_ids}
+
+        with transaction.atomic():
+            if self._record(
+                gameweek, balances, existing_balances, kinds, BalanceEvent.WEEKLY
+            ):
+                BalanceSnapshot.objects.take_if_due(gameweek)
+                Standing.objects.refresh(gameweek)
+            return balances
+
+    def bulk_add_longterm(self, gameweek, long_term_winnings, kind=None):
+        """Add long term winnings (a dict of user id to the change in winnings)
+        to the special, provisional and banked balances of a gameweek and
+        refresh the standings. kind defaults to a long special payout; pass
+        BalanceEvent.LONG_SPECIAL_CORRECTION when changing an earlier result.
+
+        Be careful when updating the result of a long term. This must be
+        called with the difference to ensure updated long terms are not
+        double counted.
+
+        Returns the balances written.
+        """
+        existing_balances = self._get_existing_balances(
+            gameweek, list(long_term_winnings)
+        )
+
+        balances = []
+        for user_id, winnings in long_term_winnings.items():
+            existing = existing_balances.get(user_id)
+            balances.append(
+                self.model(
+                    gameweek=gameweek,
+                    user_id=user_id,
+                    week=existing.week if existing else 0.0,
+                    special=float(existing.special if existing else 0.0)
+                    + float(winnings),
+                    provisional=float(existing.provisional if existing else 0.0)
+                    + float(winnings),
+                    banked=float(existing.banked if existing else 0.0)
+                    + float(winnings),
+                )
+            )
+
+        with transaction.atomic():
+            if self._record(
+                gameweek,
+                balances,
+                existing_balances,
+                {},
+                kind or BalanceEvent.LONG_SPECIAL,
+            ):
+                Standing.objects.refresh(gameweek)
+            return balances
 
-    def create_with_longterm(self, gameweek, user, long_term_winnings):
-        """Create or recreate balance for this gameweek for this user.
+    def create_with_weekly(self, gameweek, user, week_winnings, week_unused):
+        """Create or update balance for this gameweek for this user.
+        If the balance already exists then any existing special money is kept.
+        Each call refreshes the standings, so use bulk_write_weekly for
+        several users.
+        """
+        return self.bulk_write_weekly(
+            gameweek, {user.id: (week_winnings, week_unused)}
+        )[0]
+
+    def create_with_longterm(self, gameweek, user, long_term_winnings, kind=None):
+        """Create or update balance for this gameweek for this user.
         If the balance already exists then we need to account for any existing special money and any existing
         weekly winnings.
 
         Be careful when updating the result of a long term. This method must be called with the difference to ensure
         updated long terms are not double counted.
+
+        Each call refreshes the standings, so use bulk_add_longterm for
+        several users.
         """
+        return self.bulk_add_longterm(
+            gameweek, {user.id: long_term_winnings}, kind=kind
+        )[0]
 
-        existing_balance = self.get_existing(gameweek, user)
-        special = (
-            float(existing_balance.special) + float(long_term_winnings)
-            if existing_balance
-            else long_term_winnings
-        )
-        week_winnings = existing_balance.week if existing_balance else 0.0
-        provisional = (
-            float(existing_balance.provisional) + float(long_term_winnings)
-            if existing_balance
-            else long_term_winnings
-        )
-        banked = (
-            float(existing_balance.banked) + float(long_term_winnings)
-            if existing_balance
-            else long_term_winnings
-        )
+    def rebuild(self, gameweek, user_ids=None):
+        """Replace the balances of a gameweek (or just these users') with
+        those replayed from the ledger and refresh the standings.
+
+        Returns the balances written.
+        """
+        replayed = BalanceEvent.objects.replay(gameweek, user_ids)
+        balances = list(replayed.values())
 
         with transaction.atomic():
-            if existing_balance:
-                existing_balance.delete()
-            return super().create(
-                gameweek=gameweek,
-                user=user,
-                week=week_winnings,
-                provisional=provisional,
-                special=special,
-                banked=banked,
-            )
+            if any(
+                self._write(
+                    balances, self._get_existing_balances(gameweek, list(replayed))
+                )
+            ):
+                Standing.objects.refresh(gameweek)
+            return balances
 
 
 class Balance(models.Model):
+    """A user's balances for a gameweek. Written only through BalanceManager,
+    which records every change in the BalanceEvent ledger, so it can be
+    rebuilt from the ledger at any time"""
+
     gameweek = models.ForeignKey(Gameweek, null=True, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     week = models.DecimalField(default=0.0, decimal_places=2, max_digits=99)
@@ -344,10 +602,271 @@ class Balance(models.Model):
     banked = models.DecimalField(default=0.0, decimal_places=2, max_digits=99)
     objects = BalanceManager()
 
+    class Meta:
+        unique_together = ("gameweek", "user")
+        indexes = [models.Index(fields=["gameweek", "-provisional"])]
+
     def __str__(self):
         return str(self.gameweek) + ":" + self.user.username
 
 
+class BalanceEventManager(models.Manager):
+    def replay(self, gameweek, user_ids=None):
+        """Work out balances for a gameweek from its latest snapshot and the
+        events recorded against it since, without saving them.
+
+        Returns a dict of user id to unsaved balance.
+        """
+        snapshots = BalanceSnapshot.objects.filter(gameweek=gameweek)
+        events = self.filter(gameweek=gameweek)
+        if user_ids is not None:
+            snapshots = snapshots.filter(user_id__in=user_ids)
+            events = events.filter(user_id__in=user_ids)
+
+        last_event_id = snapshots.aggregate(models.Max("last_event_id"))[
+            "last_event_id__max"
+        ]
+        balances = {}
+        if last_event_id is not None:
+            for snapshot in snapshots.filter(last_event_id=last_event_id):
+                balances[snapshot.user_id] = Balance(
+                    gameweek=gameweek,
+                    user_id=snapshot.user_id,
+                    **{field: getattr(snapshot, field) for field in BALANCE_FIELDS},
+                )
+            events = events.filter(id__gt=last_event_id)
+
+        for event in events.order_by("id").values("user_id", *BALANCE_FIELDS):
+            balance = balances.get(event["user_id"])
+            if balance is None:
+                balance = balances[event["user_id"]] = Balance(
+                    gameweek=gameweek, user_id=event["user_id"]
+                )
+            for field in BALANCE_FIELDS:
+                setattr(
+                    balance, field, _to_money(getattr(balance, field)) + event[field]
+                )
+
+        return balances
+
+
+class BalanceEvent(models.Model):
+    """Append-only record of a change to a user's balance for a gameweek.
+
+    Each event holds the change it made to every balance column, so the
+    balances of a gameweek are the sum of its events. Corrections are new
+    events for the difference; events are never updated or deleted.
+    """
+
+    WEEKLY = "weekly"
+    NO_BETS = "no_bets"
+    LONG_SPECIAL = "long_special"
+    LONG_SPECIAL_CORRECTION = "long_special_correction"
+    KIND_CHOICES = (
+        (WEEKLY, "Weekly settlement"),
+        (NO_BETS, "No bets penalty"),
+        (LONG_SPECIAL, "Long special payout"),
+        (LONG_SPECIAL_CORRECTION, "Long special correction"),
+    )
+
+    gameweek = models.ForeignKey(Gameweek, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    week = models.DecimalField(default=0.0, decimal_places=2, max_digits=99)
+    provisional = models.DecimalField(default=0.0, decimal_places=2, max_digits=99)
+    special = models.DecimalField(default=0.0, decimal_places=2, max_digits=99)
+    banked = models.DecimalField(default=0.0, decimal_places=2, max_digits=99)
+    created = models.DateTimeField(auto_now_add=True)
+    objects = BalanceEventManager()
+
+    class Meta:
+        indexes = [models.Index(fields=["gameweek", "user"])]
+
+    def __str__(self):
+        return str(self.gameweek) + ":" + self.user.username + "," + self.kind
+
+
+class BalanceSnapshotManager(models.Manager):
+    def take_if_due(self, gameweek):
+        """Take a snapshot if the gameweek has none, or if more events have
+        been recorded since its latest than that snapshot has rows, so
+        replaying never reads more events than balances and snapshots only
+        grow with the changes made"""
+        last_event_id = self.filter(gameweek=gameweek).aggregate(
+            models.Max("last_event_id")
+        )["last_event_id__max"]
+        if last_event_id is not None:
+            snapshot_size = self.filter(
+                gameweek=gameweek, last_event_id=last_event_id
+            ).count()
+            events_since = BalanceEvent.objects.filter(
+                gameweek=gameweek, id__gt=last_event_id
+            ).count()
+            if events_since < snapshot_size:
+                return []
+        return self.take(gameweek)
+
+    def take(self, gameweek):
+        """Record the saved balances of a gameweek and the last event they
+        include, replacing its earlier snapshots which replays no longer need"""
+        last_event_id = BalanceEvent.objects.filter(gameweek=gameweek).aggregate(
+            models.Max("id")
+        )["id__max"]
+        if last_event_id is None:
+            return []
+
+        self.filter(gameweek=gameweek, last_event_id__lt=last_event_id).delete()
+        return self.bulk_create(
+            [
+                self.model(
+                    gameweek=gameweek,
+                    user_id=balance["user_id"],
+                    last_event_id=last_event_id,
+                    **{field: balance[field] for field in BALANCE_FIELDS},
+                )
+                for balance in gameweek.balance_set.values("user_id", *BALANCE_FIELDS)
+            ],
+            batch_size=Balance.objects.batch_size,
+        )
+
+
+class BalanceSnapshot(models.Model):
+    """Balances of a gameweek as they stood after the ledger event
+    last_event_id, taken when the gameweek is first settled and again as
+    events build up, so replays only need the events recorded since"""
+
+    gameweek = models.ForeignKey(Gameweek, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    last_event_id = models.IntegerField()
+    week = models.DecimalField(default=0.0, decimal_places=2, max_digits=99)
+    provisional = models.DecimalField(default=0.0, decimal_places=2, max_digits=99)
+    special = models.DecimalField(default=0.0, decimal_places=2, max_digits=99)
+    banked = models.DecimalField(default=0.0, decimal_places=2, max_digits=99)
+    objects = BalanceSnapshotManager()
+
+    class Meta:
+        indexes = [models.Index(fields=["gameweek", "last_event_id"])]
+
+    def __str__(self):
+        return (
+            str(self.gameweek)
+            + ":"
+            + self.user.username
+            + ","
+            + str(self.last_event_id)
+        )
+
+
+STANDING_FIELDS = ("position", "previous_position", "change_icon") + BALANCE_FIELDS
+
+
+class StandingManager(models.Manager):
+    def _rebuild(self, gameweek, prev_positions):
+        """Bring standings for this gameweek in line with its balances,
+        writing only the rows that changed. Returns the new positions."""
+        standings = [
+            self.model(
+                season_id=gameweek.season_id,
+                gameweek=gameweek,
+                user_id=balance.user_id,
+                position=position,
+                previous_position=prev_positions.get(balance.user_id),
+                week=balance.week,
+                provisional=balance.provisional,
+                special=balance.special,
+                banked=balance.banked,
+            )
+            for position, balance in enumerate(
+                gameweek.balance_set.order_by("-provisional", "id")
+            )
+        ]
+        positions = {standing.user_id: standing.position for standing in standings}
+        for standing in standings:
+            standing.change_icon = gameweek._get_change_icon(
+                positions, prev_positions, standing.user_id
+            )
+
+        existing_standings = {
+            standing.user_id: standing for standing in self.filter(gameweek=gameweek)
+        }
+        new_standings = []
+        changed_standings = []
+        for standing in standings:
+            existing = existing_standings.pop(standing.user_id, None)
+            if existing is None:
+                new_standings.append(standing)
+            elif any(
+                getattr(existing, field) != getattr(standing, field)
+                for field in STANDING_FIELDS
+            ):
+                standing.pk = existing.pk
+                changed_standings.append(standing)
+
+        with transaction.atomic():
+            if existing_standings:
+                self.filter(
+                    pk__in=[standing.pk for standing in existing_standings.values()]
+                ).delete()
+            self.bulk_create(new_standings, batch_size=Balance.objects.batch_size)
+            _update_in_batches(
+                self, changed_standings, STANDING_FIELDS, Balance.objects.batch_size
+            )
+
+        return positions
+
+    def refresh(self, gameweek):
+        """Update standings for this gameweek from its balances, along with
+        the previous positions recorded against the following gameweek.
+
+        Only rows whose position or balances moved are written, but working
+        out positions reads every balance of both gameweeks, so write a batch
+        of balances with bulk_write_weekly or bulk_add_longterm rather than
+        one user at a time.
+        """
+        if gameweek.is_first_gameweek():
+            prev_positions = {}
+        else:
+            prev_positions = dict(
+                self.filter(
+                    season_id=gameweek.season_id,
+                    gameweek__number=gameweek.number - 1,
+                ).values_list("user_id", "position")
+            )
+
+        with transaction.atomic():
+            positions = self._rebuild(gameweek, prev_positions)
+
+            next_gameweek = Gameweek.objects.filter(
+                season_id=gameweek.season_id, number=gameweek.number + 1
+            ).first()
+            if next_gameweek:
+                self._rebuild(next_gameweek, positions)
+
+
+class Standing(models.Model):
+    """Denormalized leaderboard row, maintained from Balance by
+    StandingManager.refresh"""
+
+    season = models.ForeignKey(Season, on_delete=models.CASCADE)
+    gameweek = models.ForeignKey(Gameweek, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    position = models.IntegerField(default=0)
+    previous_position = models.IntegerField(null=True, blank=True)
+    change_icon = models.CharField(max_length=2, default="-")
+    week = models.DecimalField(default=0.0, decimal_places=2, max_digits=99)
+    provisional = models.DecimalField(default=0.0, decimal_places=2, max_digits=99)
+    special = models.DecimalField(default=0.0, decimal_places=2, max_digits=99)
+    banked = models.DecimalField(default=0.0, decimal_places=2, max_digits=99)
+    objects = StandingManager()
+
+    class Meta:
+        unique_together = ("gameweek", "user")
+        indexes = [models.Index(fields=["gameweek", "position"])]
+
+    def __str__(self):
+        return str(self.gameweek) + ":" + self.user.username + "," + str(self.position)
+
+
 class Game(models.Model):
     gameweek = models.ForeignKey(Gameweek, on_delete=models.CASCADE)
     hometeam = models.CharField(max_length=255)
@@ -381,8 +900,9 @@ class Game(models.Model):
             return self.awaydenominator
 
     def get_result(self):
-        """ Get result """
-        return self.result_set.first()
+        """ Get result (uses prefetched results if available) """
+        results = self.result_set.all()
+        return results[0] if results else None
 
 
 class Result(models.Model):
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from fglsite.bets.models import Game, Gameweek, Result, Season
+from fglsite.common.fragments import (
+    GAMEWEEK_ODDS,
+    bump_fragment_version,
+    bump_fragment_version_on_commit,
+)
+
+
+@receiver([post_save, post_delete], sender=Game)
+def game_changed(sender, instance, **kwargs):
+    bump_fragment_version(GAMEWEEK_ODDS, instance.gameweek_id)
+
+
+@receiver(post_delete, sender=Gameweek)
+def gameweek_deleted(sender, instance, **kwargs):
+    # Keep the season's counter right for the next create_gameweek. The season
+    # is gone already if it's the one being deleted.
+    season = Season.objects.filter(pk=instance.season_id).first()
+    if season is not None:
+        season.refresh_gameweek_counter()
+
+
+@receiver(post_save, sender=Result)
+def result_changed(sender, instance, **kwargs):
+    bump_fragment_version(GAMEWEEK_ODDS, result_gameweek_id(instance))
+
+
+@receiver(post_delete, sender=Result)
+def result_deleted(sender, instance, **kwargs):
+    # Once per gameweek however many results go, including by cascade
+    bump_fragment_version_on_commit(GAMEWEEK_ODDS, game_gameweek_ids, instance.game_id)
+
+
+def game_gameweek_ids(game_ids):
+    return Game.objects.filter(pk__in=game_ids).values_list("gameweek_id", flat=True)
+
+
+def result_gameweek_id(result):
+    """ The result's gameweek id, without loading its game if not already """
+    if Result.game.is_cached(result):
+        return result.game.gameweek_id
+    return Game.objects.values_list("gameweek_id", flat=True).get(pk=result.game_id)
@@ -2,12 +2,16 @@ from django import template
 
 from decimal import Decimal
 
+from fglsite.common.fragments import GAMEWEEK_ODDS, render_cached_fragment
+
 register = template.Library()
 
 
 @register.inclusion_tag("bets/user_balance_table.html")
 def user_balance_table(gameweek, force_show_specials=False):
-    ordered_results = gameweek.get_ordered_results()
+    ordered_results = [
+        [standing, standing.change_icon] for standing in gameweek.get_standings()
+    ]
 
     if force_show_specials:
         show_specials = True
@@ -31,6 +35,8 @@ def user_balance_row(ordered_result, show_specials):
     }
 
 
-@register.inclusion_tag("bets/gameweek_odds.html")
+@register.simple_tag
 def gameweek_odds(gameweek):
-    return {"gameweek": gameweek}
+    return render_cached_fragment(
+        "bets/gameweek_odds.html", {"gameweek": gameweek}, GAMEWEEK_ODDS, gameweek.id
+    )
@@ -0,0 +1,39 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class GameweekCounterMigrationTest(TransactionTestCase):
+    migrate_from = [("bets", "0005_standing")]
+    migrate_to = [("bets", "0006_season_gameweek_counter")]
+
+    def _migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        self._migrate(executor.loader.graph.leaf_nodes())
+
+    def test_counter_follows_highest_number(self):
+        apps = self._migrate(self.migrate_from)
+        Season = apps.get_model("bets", "Season")
+        Gameweek = apps.get_model("bets", "Gameweek")
+        commissioner = apps.get_model("auth", "User").objects.create(username="comm")
+        season = Season.objects.create(name="gap", commissioner=commissioner)
+        empty = Season.objects.create(name="empty", commissioner=commissioner)
+        # Gameweek 3 was deleted before the counter existed
+        for number in (1, 2, 4):
+            Gameweek.objects.create(season=season, number=number, spiel="")
+
+        apps = self._migrate(self.migrate_to)
+
+        Season = apps.get_model("bets", "Season")
+        season = Season.objects.get(pk=season.pk)
+        self.assertEqual(4, season.gameweek_count)
+        self.assertEqual(4, season.latest_gameweek.number)
+        empty = Season.objects.get(pk=empty.pk)
+        self.assertEqual(0, empty.gameweek_count)
+        self.assertIsNone(empty.latest_gameweek)
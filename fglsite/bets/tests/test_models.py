@@ -1,9 +1,22 @@
 from django.test import TestCase
 
-from fglsite.bets.models import Season, Gameweek, Game, Balance, Result
+from fglsite.bets.models import (
+    Season,
+    Gameweek,
+    Game,
+    Balance,
+    BalanceEvent,
+    BalanceSnapshot,
+    Result,
+    Standing,
+)
+from fglsite.gambling.models import BetContainer
 from django.contrib.auth.models import User
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
 from mock import Mock, patch
-from datetime import date, time
+from datetime import date, datetime, time
+from decimal import Decimal
 
 
 def _create_test_season():
@@ -64,20 +77,18 @@ class SeasonTest(TestCase):
 
         with patch("fglsite.bets.models.Season.gameweek_set", mockGameweekSet):
 
-            # Make sure len returns 0
-            mockGameweekSet.all.return_value = []
+            # No gameweeks
+            season.gameweek_count = 0
             self.assertFalse(season.balances_available())
 
-            # Make sure len returns 2
-            mockGameweekSet.all.return_value = [1, 2]
+            # Two gameweeks
+            season.gameweek_count = 2
             self.assertTrue(season.balances_available())
 
-            # Make sure len returns 1
+            # One gameweek
             mockGameweek = Mock()
             mockGameweek.results_complete.return_value = True
-            mockGameweekSet.all.return_value = [
-                1,
-            ]
+            season.gameweek_count = 1
             mockGameweekSet.filter.return_value = [mockGameweek]
             self.assertTrue(season.balances_available())
 
@@ -107,6 +118,45 @@ class SeasonTest(TestCase):
                 # For good measure
                 self.assertNotEqual(mockOtherGameweek, mockGameweekLatest)
 
+    def test_create_gameweek(self):
+        season = _create_test_season()
+        gameweek_one = season.create_gameweek(spiel="")
+        gameweek_two = season.create_gameweek(spiel="")
+
+        self.assertEqual(2, gameweek_two.number)
+        self.assertEqual(2, season.gameweek_count)
+        self.assertEqual(gameweek_two, season.latest_gameweek)
+        self.assertFalse(Gameweek.objects.get(pk=gameweek_one.pk).is_latest_gameweek())
+
+        season = Season.objects.get(pk=season.pk)
+        self.assertEqual(3, season.get_next_gameweek_id())
+        with self.assertNumQueries(1):
+            self.assertEqual(gameweek_two, season.get_latest_gameweek())
+
+    def test_create_gameweek_after_delete(self):
+        season = _create_test_season()
+        season.create_gameweek(spiel="")
+        gameweek_two = season.create_gameweek(spiel="")
+        gameweek_three = season.create_gameweek(spiel="")
+
+        gameweek_three.delete()
+        season.refresh_from_db()
+        self.assertEqual(2, season.gameweek_count)
+        self.assertEqual(gameweek_two, season.latest_gameweek)
+        self.assertEqual(3, season.create_gameweek(spiel="").number)
+
+        gameweek_two.delete()
+        season.refresh_from_db()
+        self.assertEqual(4, season.create_gameweek(spiel="").number)
+
+    def test_delete_season_with_gameweeks(self):
+        season = _create_test_season()
+        season.create_gameweek(spiel="")
+
+        season.delete()
+
+        self.assertFalse(Gameweek.objects.exists())
+
     def test_get_latest_gameweek(self):
         season = _create_test_season()
         _create_test_gameweek(season)
@@ -169,44 +219,6 @@ class GameweekTest(TestCase):
             "Called get_next_gameweek on latest gameweek", str(context.exception)
         )
 
-    @patch("fglsite.bets.models.Gameweek._get_users_with_bets")
-    @patch("fglsite.bets.models.Gameweek.get_prev_gameweek")
-    @patch("fglsite.bets.models.Balance.objects.create_with_weekly")
-    def test_update_no_bet_users(
-        self, create_balance_method, prev_gameweek_method, users_method
-    ):
-        user_one = Mock(spec=User)
-        user_two = Mock(spec=User)
-
-        user_one_balance = Mock(spec=Balance)
-        user_one_balance.user = user_one
-        user_two_balance = Mock(spec=Balance)
-        user_two_balance.user = user_two
-        user_two_balance.week = 50.0
-
-        prev_gameweek = Mock()
-        prev_gameweek.balance_set.all.return_value = {
-            user_one_balance,
-            user_two_balance,
-        }
-
-        users_method.return_value = [user_one]
-        prev_gameweek_method.return_value = prev_gameweek
-
-        season = _create_test_season()
-        _create_test_gameweek(season)
-        gameweek_two = _create_test_gameweek(season)
-
-        gameweek_two.update_no_bet_users()
-
-        self.assertEqual(1, create_balance_method.call_count)
-        create_balance_method.assert_any_call(
-            gameweek=gameweek_two,
-            user=user_two,
-            week_winnings=float(-100.0),
-            week_unused=float(50.0),
-        )
-
     def test__get_balance_by_user(self):
         season = _create_test_season()
         gameweek = _create_test_gameweek(season)
@@ -235,6 +247,56 @@ class GameweekTest(TestCase):
 
         self.assertTrue(gameweek.deadline_passed())
 
+    def test_with_status(self):
+        season = _create_test_season()
+        gameweek_one = _create_test_gameweek(season)
+        gameweek_two = _create_test_gameweek(season)
+        gameweek_two.deadline_date = date(2018, 1, 1)
+        gameweek_two.save()
+        game = _create_test_game(gameweek_one)
+        Result.objects.create(game=game, result="H")
+        _create_test_game(gameweek_two)
+        _create_test_game(gameweek_two)
+        BetContainer.objects.create(owner=season.commissioner, gameweek=gameweek_two)
+
+        with self.assertNumQueries(1):
+            statuses = {
+                gameweek.number: gameweek
+                for gameweek in season.gameweek_set.with_status(
+                    now=datetime(2017, 12, 1)
+                )
+            }
+
+        self.assertTrue(statuses[1].results_complete())
+        self.assertEqual(0, statuses[1].get_outstanding_result_count())
+        self.assertFalse(statuses[1].has_bets())
+        self.assertTrue(statuses[1].deadline_passed())
+        self.assertFalse(statuses[2].results_complete())
+        self.assertEqual(2, statuses[2].get_outstanding_result_count())
+        self.assertEqual(2, statuses[2].game_count)
+        self.assertTrue(statuses[2].has_bets())
+        self.assertFalse(statuses[2].deadline_passed())
+
+        self.assertEqual(
+            [gameweek_one],
+            list(Gameweek.objects.with_status().filter(is_results_complete=True)),
+        )
+
+    def test_status_without_annotations(self):
+        season = _create_test_season()
+        gameweek = _create_test_gameweek(season)
+        game = _create_test_game(gameweek)
+        _create_test_game(gameweek)
+
+        with self.assertNumQueries(1):
+            self.assertFalse(gameweek.results_complete())
+        self.assertEqual(2, gameweek.get_outstanding_result_count())
+        self.assertFalse(gameweek.has_bets())
+
+        Result.objects.create(game=game, result="H")
+
+        self.assertEqual(1, gameweek.get_outstanding_result_count())
+
     @patch("fglsite.bets.models.Gameweek.get_rollable_allowances")
     def test__get_allowance_by_user(self, rollables):
         season = _create_test_season()
@@ -360,6 +422,239 @@ class BalanceTest(TestCase):
         assert balance.special == 0.0
         assert balance.banked == 50.0
 
+    def test_one_balance_per_user_per_gameweek(self):
+        season = _create_test_season()
+        gameweek = _create_test_gameweek(season)
+        user = User.objects.create_user("user_one")
+        Balance.objects.create(gameweek=gameweek, user=user)
+
+        with self.assertRaises(IntegrityError):
+            Balance.objects.create(gameweek=gameweek, user=user)
+
+    def test_bulk_write_weekly_uses_previous_banked(self):
+        season = _create_test_season()
+        gameweek_one = _create_test_gameweek(season)
+        gameweek_two = _create_test_gameweek(season)
+        user_one = User.objects.create_user("user_one")
+        user_two = User.objects.create_user("user_two")
+        Balance.objects.create(gameweek=gameweek_one, user=user_one, banked=40.0)
+
+        Balance.objects.bulk_write_weekly(
+            gameweek_two, {user_one.id: (10.0, 5.0), user_two.id: (-20.0, 0.0)}
+        )
+
+        balance_one = Balance.objects.get(gameweek=gameweek_two, user=user_one)
+        self.assertEqual(Decimal("45.00"), balance_one.banked)
+        self.assertEqual(Decimal("55.00"), balance_one.provisional)
+        balance_two = Balance.objects.get(gameweek=gameweek_two, user=user_two)
+        self.assertEqual(Decimal("-20.00"), balance_two.banked)
+
+    def test_bulk_write_weekly_updates_in_place(self):
+        season = _create_test_season()
+        gameweek = _create_test_gameweek(season)
+        users = [User.objects.create_user("user_" + str(i)) for i in range(3)]
+        Balance.objects.bulk_write_weekly(
+            gameweek, {user.id: (10.0, 0.0) for user in users}
+        )
+        Balance.objects.create_with_longterm(gameweek, users[0], 5.0)
+        pks = dict(Balance.objects.values_list("user_id", "pk"))
+
+        with CaptureQueriesContext(connection) as queries:
+            Balance.objects.bulk_write_weekly(
+                gameweek,
+                {
+                    users[0].id: (10.0, 0.0),
+                    users[1].id: (10.0, 0.0),
+                    users[2].id: (-5.0, 0.0),
+                },
+            )
+
+        self.assertEqual(pks, dict(Balance.objects.values_list("user_id", "pk")))
+        writes = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+            and '"bets_balance"' in query["sql"]
+        ]
+        self.assertEqual(1, len(writes))
+        self.assertEqual(Decimal("5.00"), Balance.objects.get(user=users[0]).special)
+        self.assertEqual(Decimal("-5.00"), Balance.objects.get(user=users[2]).week)
+
+    def test_bulk_write_weekly_skips_unchanged(self):
+        season = _create_test_season()
+        gameweek = _create_test_gameweek(season)
+        user = User.objects.create_user("user_one")
+        Balance.objects.create_with_weekly(gameweek, user, 10.0, 0.0)
+
+        with CaptureQueriesContext(connection) as queries:
+            Balance.objects.create_with_weekly(gameweek, user, 10.0, 0.0)
+
+        self.assertFalse(
+            [
+                query
+                for query in queries
+                if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+            ]
+        )
+
+
+class BalanceEventTest(TestCase):
+    def setUp(self):
+        self.season = _create_test_season()
+        self.gameweek = _create_test_gameweek(self.season)
+        self.user_one = User.objects.create_user("user_one")
+        self.user_two = User.objects.create_user("user_two")
+
+    def _event_totals(self, user):
+        events = BalanceEvent.objects.filter(gameweek=self.gameweek, user=user)
+        return [
+            sum(getattr(event, field) for event in events)
+            for field in ("week", "provisional", "special", "banked")
+        ]
+
+    def test_balances_are_the_sum_of_their_events(self):
+        Balance.objects.bulk_write_weekly(
+            self.gameweek,
+            {self.user_one.id: (20.0, 5.0), self.user_two.id: (-100.0, 0.0)},
+            no_bet_user_ids=[self.user_two.id],
+        )
+        Balance.objects.create_with_longterm(self.gameweek, self.user_one, 30.0)
+
+        self.assertEqual(
+            [BalanceEvent.WEEKLY, BalanceEvent.LONG_SPECIAL],
+            list(
+                BalanceEvent.objects.filter(user=self.user_one)
+                .order_by("id")
+                .values_list("kind", flat=True)
+            ),
+        )
+        self.assertEqual(
+            BalanceEvent.NO_BETS, BalanceEvent.objects.get(user=self.user_two).kind
+        )
+        for user in (self.user_one, self.user_two):
+            balance = Balance.objects.get(gameweek=self.gameweek, user=user)
+            self.assertEqual(
+                [balance.week, balance.provisional, balance.special, balance.banked],
+                self._event_totals(user),
+            )
+
+    def test_corrections_append_compensating_events(self):
+        Balance.objects.create_with_longterm(self.gameweek, self.user_one, 30.0)
+        first_event = BalanceEvent.objects.get()
+
+        Balance.objects.create_with_longterm(
+            self.gameweek,
+            self.user_one,
+            -10.0,
+            kind=BalanceEvent.LONG_SPECIAL_CORRECTION,
+        )
+
+        events = list(BalanceEvent.objects.order_by("id"))
+        self.assertEqual(2, len(events))
+        self.assertEqual(Decimal("30.00"), events[0].special)
+        self.assertEqual(first_event.created, events[0].created)
+        self.assertEqual(BalanceEvent.LONG_SPECIAL_CORRECTION, events[1].kind)
+        self.assertEqual(Decimal("-10.00"), events[1].special)
+        self.assertEqual(
+            Decimal("20.00"), Balance.objects.get(user=self.user_one).special
+        )
+
+    def test_settling_again_only_records_changes(self):
+        Balance.objects.create_with_weekly(self.gameweek, self.user_one, 20.0, 5.0)
+        Balance.objects.create_with_weekly(self.gameweek, self.user_one, 20.0, 5.0)
+        Balance.objects.create_with_weekly(self.gameweek, self.user_one, -10.0, 5.0)
+
+        events = list(BalanceEvent.objects.order_by("id"))
+        self.assertEqual(2, len(events))
+        self.assertEqual(Decimal("-30.00"), events[1].week)
+        self.assertEqual(Decimal("-10.00"), events[1].banked)
+
+    def test_snapshot_taken_when_gameweek_settled(self):
+        Balance.objects.bulk_write_weekly(
+            self.gameweek,
+            {self.user_one.id: (20.0, 5.0), self.user_two.id: (10.0, 0.0)},
+        )
+
+        snapshots = BalanceSnapshot.objects.filter(gameweek=self.gameweek)
+        self.assertEqual(2, snapshots.count())
+        self.assertEqual(
+            {BalanceEvent.objects.latest("id").id},
+            set(snapshots.values_list("last_event_id", flat=True)),
+        )
+
+    def test_snapshot_only_retaken_once_events_build_up(self):
+        users = [self.user_one, self.user_two] + [
+            User.objects.create_user("user_{0}".format(number)) for number in range(2)
+        ]
+        Balance.objects.bulk_write_weekly(
+            self.gameweek, {user.id: (10.0, 0.0) for user in users}
+        )
+        first_snapshot = set(
+            BalanceSnapshot.objects.values_list("last_event_id", flat=True)
+        )
+
+        # Settling again with one change appends one event, fewer than the
+        # four rows of the snapshot
+        figures = {user.id: (10.0, 0.0) for user in users}
+        figures[self.user_one.id] = (20.0, 0.0)
+        Balance.objects.bulk_write_weekly(self.gameweek, figures)
+        self.assertEqual(
+            first_snapshot,
+            set(BalanceSnapshot.objects.values_list("last_event_id", flat=True)),
+        )
+
+        Balance.objects.bulk_write_weekly(
+            self.gameweek, {user.id: (30.0, 0.0) for user in users}
+        )
+        self.assertEqual(
+            {BalanceEvent.objects.latest("id").id},
+            set(BalanceSnapshot.objects.values_list("last_event_id", flat=True)),
+        )
+        self.assertEqual(4, BalanceSnapshot.objects.count())
+        self.assertEqual(
+            Decimal("30.00"),
+            BalanceEvent.objects.replay(self.gameweek)[self.user_one.id].week,
+        )
+
+    def test_replay_from_latest_snapshot(self):
+        Balance.objects.bulk_write_weekly(
+            self.gameweek,
+            {self.user_one.id: (20.0, 5.0), self.user_two.id: (10.0, 0.0)},
+        )
+        Balance.objects.create_with_longterm(self.gameweek, self.user_one, 30.0)
+        Balance.objects.create_with_longterm(self.gameweek, self.user_two, -15.0)
+
+        with self.assertNumQueries(3):
+            replayed = BalanceEvent.objects.replay(self.gameweek)
+
+        for balance in Balance.objects.filter(gameweek=self.gameweek):
+            self.assertEqual(
+                [
+                    balance.week,
+                    balance.provisional,
+                    balance.special,
+                    balance.banked,
+                ],
+                [
+                    replayed[balance.user_id].week,
+                    replayed[balance.user_id].provisional,
+                    replayed[balance.user_id].special,
+                    replayed[balance.user_id].banked,
+                ],
+            )
+
+    def test_rebuild_restores_balances_from_ledger(self):
+        Balance.objects.create_with_weekly(self.gameweek, self.user_one, 20.0, 5.0)
+        Balance.objects.create_with_longterm(self.gameweek, self.user_one, 30.0)
+        Balance.objects.filter(user=self.user_one).update(banked=0.0, special=0.0)
+
+        Balance.objects.rebuild(self.gameweek, [self.user_one.id])
+
+        balance = Balance.objects.get(user=self.user_one)
+        self.assertEqual(Decimal("30.00"), balance.special)
+        self.assertEqual(Decimal("35.00"), balance.banked)
+        self.assertEqual(Decimal("35.00"), self.gameweek.get_standings().get().banked)
+
 
 class GameTest(TestCase):
     def test_get_numerator(self):
@@ -379,3 +674,105 @@ class GameTest(TestCase):
         self.assertEquals(50, game.get_denominator("H"))
         self.assertEquals(20, game.get_denominator("D"))
         self.assertEquals(1, game.get_denominator("A"))
+
+
+class StandingTest(TestCase):
+    def setUp(self):
+        self.season = _create_test_season()
+        self.gameweek_one = _create_test_gameweek(self.season)
+        self.gameweek_two = _create_test_gameweek(self.season)
+        self.user_one = User.objects.create_user("user_one")
+        self.user_two = User.objects.create_user("user_two")
+
+    def test_standings_built_when_balance_written(self):
+        Balance.objects.create_with_weekly(
+            gameweek=self.gameweek_one,
+            user=self.user_one,
+            week_winnings=50.0,
+            week_unused=0.0,
+        )
+        Balance.objects.create_with_weekly(
+            gameweek=self.gameweek_one,
+            user=self.user_two,
+            week_winnings=80.0,
+            week_unused=0.0,
+        )
+
+        standings = list(self.gameweek_one.get_standings())
+
+        self.assertEqual(
+            [(self.user_two, 0, "-"), (self.user_one, 1, "-")],
+            [(s.user, s.position, s.change_icon) for s in standings],
+        )
+        self.assertEqual(Decimal("80.00"), standings[0].provisional)
+
+    def test_standings_track_previous_position(self):
+        Balance.objects.create_with_longterm(self.gameweek_two, self.user_one, 50.0)
+        Balance.objects.create_with_longterm(self.gameweek_two, self.user_two, 80.0)
+        # Writing the earlier gameweek afterwards updates the later one
+        Balance.objects.create_with_longterm(self.gameweek_one, self.user_one, 20.0)
+        Balance.objects.create_with_longterm(self.gameweek_one, self.user_two, 10.0)
+
+        standings = list(self.gameweek_two.get_standings())
+
+        self.assertEqual(
+            [(self.user_two, 0, 1, "/\\"), (self.user_one, 1, 0, "\\/")],
+            [
+                (s.user, s.position, s.previous_position, s.change_icon)
+                for s in standings
+            ],
+        )
+
+    def test_only_changed_standings_written(self):
+        users = [self.user_one, self.user_two] + [
+            User.objects.create_user("user_{0}".format(number)) for number in range(3)
+        ]
+        Balance.objects.bulk_write_weekly(
+            self.gameweek_one,
+            {user.id: (10.0 * number, 0.0) for number, user in enumerate(users)},
+        )
+        Balance.objects.bulk_write_weekly(
+            self.gameweek_two, {user.id: (0.0, 0.0) for user in users}
+        )
+        standings = {
+            standing.user_id: standing.pk
+            for standing in Standing.objects.filter(gameweek=self.gameweek_one)
+        }
+
+        # A change that leaves every position as it was only touches that row
+        with CaptureQueriesContext(connection) as queries:
+            Balance.objects.create_with_longterm(self.gameweek_one, users[0], 5.0)
+
+        standing_writes = [
+            query["sql"]
+            for query in queries.captured_queries
+            if '"bets_standing"' in query["sql"]
+            and not query["sql"].startswith("SELECT")
+        ]
+        self.assertEqual(1, len(standing_writes))
+        self.assertIn("UPDATE", standing_writes[0])
+        self.assertEqual(
+            standings,
+            {
+                standing.user_id: standing.pk
+                for standing in Standing.objects.filter(gameweek=self.gameweek_one)
+            },
+        )
+        self.assertEqual(
+            Decimal("5.00"),
+            Standing.objects.get(gameweek=self.gameweek_one, user=users[0]).special,
+        )
+
+    def test_standings_match_ordered_results(self):
+        Balance.objects.create_with_longterm(self.gameweek_one, self.user_one, 30.0)
+        Balance.objects.create_with_longterm(self.gameweek_one, self.user_two, -30.0)
+        Balance.objects.create_with_longterm(self.gameweek_two, self.user_one, -10.0)
+        Balance.objects.create_with_longterm(self.gameweek_two, self.user_two, 10.0)
+
+        self.assertEqual(
+            [
+                (balance.user, change_icon)
+                for balance, change_icon in self.gameweek_two.get_ordered_results()
+            ],
+            [(s.user, s.change_icon) for s in self.gameweek_two.get_standings()],
+        )
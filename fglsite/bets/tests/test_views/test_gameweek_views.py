@@ -1,13 +1,27 @@
 # -*- coding: utf-8 -*-
 import datetime
-from unittest.mock import Mock, patch
+import os
+import time
+from tempfile import TemporaryDirectory
+from uuid import uuid4
 
 from django.contrib.auth.models import Group, User
+from django.db import connection
 from django.urls import reverse
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
-from fglsite.bets.models import Season, Gameweek, Game
+from fglsite.bets.models import Season, Gameweek, Game, Result, Balance
 from fglsite.bets.forms import GameweekForm
+from fglsite.gambling.models import (
+    BetContainer,
+    Accumulator,
+    BetPart,
+    LongSpecialContainer,
+    LongSpecial,
+    LongSpecialBet,
+)
+from fglsite.gambling.settlement import settle_gameweek
 
 
 single_game_output = """
@@ -34,6 +48,19 @@ class GameweekViewsTest(TestCase):
             name="test", commissioner=self.user, weekly_allowance=100.0
         )
 
+        output_dir = TemporaryDirectory()
+        self.addCleanup(output_dir.cleanup)
+        self.output_file = os.path.join(output_dir.name, "output.json")
+        odds_settings = override_settings(ODDS_OUTPUT_DIR=output_dir.name + "/")
+        odds_settings.enable()
+        self.addCleanup(odds_settings.disable)
+
+    def _write_output(self, content, age=0):
+        with open(self.output_file, "w") as file:
+            file.write(content)
+        modified = time.time() - age
+        os.utime(self.output_file, (modified, modified))
+
     def _create_management_data(self, form_count):
         return {
             "form-TOTAL_FORMS": form_count,
@@ -79,8 +106,8 @@ class GameweekViewsTest(TestCase):
         for key, value in game_data.items():
             assert getattr(game, key.replace("form-0-", "")) == value
 
-    @patch("fglsite.odds_reader.reader._read_from_disk", Mock(return_value="[]"))
     def test_commissioner_can_view_create_gameweek_form(self):
+        self._write_output("[]")
         url = reverse("create-gameweek", args=(self.season.pk,))
         self.client.force_login(self.user)
         response = self.client.get(url)
@@ -103,11 +130,8 @@ class GameweekViewsTest(TestCase):
 
         assert response.status_code == 403
 
-    @patch(
-        "fglsite.odds_reader.reader._read_from_disk",
-        Mock(return_value=single_game_output),
-    )
     def test_initial_games_taken_from_output_during_create(self):
+        self._write_output(single_game_output)
         url = reverse("create-gameweek", args=(self.season.pk,))
         self.client.force_login(self.user)
         response = self.client.get(url)
@@ -126,16 +150,32 @@ class GameweekViewsTest(TestCase):
             "awaydenominator": 9,
         }
 
-    @patch("fglsite.odds_reader.reader._read_from_disk", Mock(side_effect=Exception()))
     def test_exception_reading_odds_displays_empty_form(self):
         url = reverse("create-gameweek", args=(self.season.pk,))
         self.client.force_login(self.user)
-        response = self.client.get(url)
+        with self.assertLogs("fglsite.bets.views", "WARNING"):
+            response = self.client.get(url)
 
         assert "form" in response.context
         assert type(response.context["form"]) == GameweekForm
         assert "game_formset" in response.context
         assert response.context["game_formset"].forms[0].initial == {}
+        assert [str(message) for message in response.context["messages"]] == [
+            "Couldn't load the latest odds, enter games by hand."
+        ]
+
+    def test_stale_odds_flagged_during_create(self):
+        self._write_output(single_game_output, age=2 * 24 * 60 * 60)
+        url = reverse("create-gameweek", args=(self.season.pk,))
+        self.client.force_login(self.user)
+        response = self.client.get(url)
+
+        assert response.context["game_formset"].forms[0].initial["hometeam"] == (
+            "Sheffield United"
+        )
+        messages = [str(message) for message in response.context["messages"]]
+        assert len(messages) == 1
+        assert messages[0].startswith("Odds were last fetched on")
 
     def test_commissioner_can_create_gameweek(self):
         form_data = self._create_basic_gameweek_form_data()
@@ -248,3 +288,77 @@ class GameweekViewsTest(TestCase):
         assert response.status_code == 403
         gameweek.refresh_from_db()
         assert gameweek.game_set.get().hometeam == "Watford"
+
+
+class GameweekDetailViewTest(TestCase):
+    def setUp(self):
+        self.commissioner = User.objects.create_user(username="comm", password="comm")
+        self.season = Season.objects.create(
+            name="test", commissioner=self.commissioner, weekly_allowance=100.0
+        )
+        self.gameweek_one = self.season.create_gameweek(
+            deadline_date=datetime.date(2017, 11, 1), spiel=""
+        )
+        self.gameweek = self.season.create_gameweek(
+            deadline_date=datetime.date(2017, 11, 8), spiel=""
+        )
+        self.games = [
+            Game.objects.create(
+                gameweek=self.gameweek,
+                hometeam="Home {0}".format(number),
+                awayteam="Away {0}".format(number),
+            )
+            for number in range(3)
+        ]
+        for game in self.games:
+            Result.objects.create(game=game, result="H")
+        self.container = LongSpecialContainer.objects.create(
+            description="Winner", created_gameweek=self.gameweek
+        )
+        self.long_special = LongSpecial.objects.create(
+            container=self.container, description="Chelsea"
+        )
+        self.url = reverse("gameweek", args=(self.gameweek.pk,))
+
+    def _create_players(self, count):
+        for _ in range(count):
+            user = User.objects.create_user(username=str(uuid4()))
+            Balance.objects.create(gameweek=self.gameweek_one, user=user, week=10.0)
+            bet_container = BetContainer.objects.create(
+                owner=user, gameweek=self.gameweek
+            )
+            accumulator = Accumulator.objects.create(
+                bet_container=bet_container, stake=100.0
+            )
+            for game in self.games:
+                BetPart.objects.create(accumulator=accumulator, game=game, result="H")
+            LongSpecialBet.objects.create(
+                bet_container=bet_container, long_special=self.long_special
+            )
+        settle_gameweek(self.gameweek)
+
+    def test_gameweek_detail_renders_bets_and_results(self):
+        self._create_players(2)
+        self.client.force_login(self.commissioner)
+
+        response = self.client.get(self.url)
+
+        assert response.status_code == 200
+        assert response.context["results_complete"]
+        assert response.context["prev_gameweek_id"] == self.gameweek_one.id
+        assert response.context["next_gameweek_id"] is None
+        assert len(response.context["other_bet_containers"]) == 2
+        assert response.context["my_bet_container"] is None
+        self.assertContains(response, "Other bets")
+
+    def test_gameweek_detail_query_count_independent_of_players(self):
+        self.client.force_login(self.commissioner)
+        self._create_players(2)
+        with CaptureQueriesContext(connection) as few_players:
+            self.client.get(self.url)
+
+        self._create_players(10)
+        with CaptureQueriesContext(connection) as many_players:
+            self.client.get(self.url)
+
+        self.assertEqual(len(few_players), len(many_players))
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import datetime
+import logging
+
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db import IntegrityError, transaction
@@ -9,8 +12,9 @@ from django.http import HttpResponseRedirect, HttpResponseForbidden
 from django.shortcuts import get_object_or_404, render
 from django.views.generic import CreateView, DetailView, FormView, UpdateView
 from django.urls import reverse, reverse_lazy
+from django.utils import timezone
 
-from fglsite.bets.models import Season, Gameweek, Game, Result, Balance
+from fglsite.bets.models import Season, Gameweek, Game, Result
 from fglsite.bets.forms import (
     SeasonForm,
     FindSeasonForm,
@@ -20,7 +24,12 @@ from fglsite.bets.forms import (
     ResultForm,
     BaseResultFormSet,
 )
-from fglsite.odds_reader.reader import read_odds
+from fglsite.common.fragments import GAMEWEEK_ODDS, bump_fragment_version
+from fglsite.gambling.settlement import settle_gameweek
+from fglsite.odds_reader.reader import OddsReadError, read_odds_file
+
+
+logger = logging.getLogger(__name__)
 
 
 class SeasonDetailView(DetailView):
@@ -50,12 +59,14 @@ def find_season(request):
         name = find_season_form.cleaned_data.get("name", "")
         commissioner = find_season_form.cleaned_data.get("commissioner", "")
 
-        season_list = Season.objects.filter(name__contains=name).filter(
-            commissioner__username__contains=commissioner
+        season_list = (
+            Season.objects.filter(name__contains=name)
+            .filter(commissioner__username__contains=commissioner)
+            .select_related("commissioner")
         )
     else:
         find_season_form = FindSeasonForm()
-        season_list = Season.objects.all()
+        season_list = Season.objects.select_related("commissioner")
 
     context = {"season_list": season_list, "find_season_form": find_season_form}
 
@@ -65,6 +76,57 @@ def find_season(request):
 class GameweekDetailView(DetailView):
     model = Gameweek
 
+    def get_queryset(self):
+        return (
+            Gameweek.objects.with_status()
+            .select_related("season__commissioner")
+            .prefetch_related(
+                "game_set__result_set",
+                "betcontainer_set__owner",
+                "betcontainer_set__accumulator_set__betpart_set__game",
+                "longspecialcontainer_set__created_gameweek__season",
+            )
+        )
+
+    def get_context_data(self, **kwargs):
+        context_data = super().get_context_data(**kwargs)
+        gameweek = self.object
+
+        adjacent_gameweek_ids = dict(
+            Gameweek.objects.filter(
+                season_id=gameweek.season_id,
+                number__in=[gameweek.number - 1, gameweek.number + 1],
+            ).values_list("number", "id")
+        )
+
+        results_complete = gameweek.results_complete()
+        bet_containers = gameweek.betcontainer_set.all()
+
+        context_data.update(
+            {
+                "prev_gameweek_id": adjacent_gameweek_ids.get(gameweek.number - 1),
+                "next_gameweek_id": adjacent_gameweek_ids.get(gameweek.number + 1),
+                "is_latest_gameweek": gameweek.is_latest_gameweek(),
+                "deadline_passed": gameweek.deadline_passed(),
+                "results_complete": results_complete,
+                "users_with_ready_bets": gameweek.get_users_with_ready_bets_as_string(),
+                "long_special_containers": gameweek.longspecialcontainer_set.all(),
+                "rollable_allowances": (
+                    gameweek.get_rollable_allowances()
+                    if not results_complete and gameweek.number > 1
+                    else None
+                ),
+                "my_bet_container": next(
+                    (bc for bc in bet_containers if bc.owner == self.request.user),
+                    None,
+                ),
+                "other_bet_containers": [
+                    bc for bc in bet_containers if bc.owner != self.request.user
+                ],
+            }
+        )
+        return context_data
+
 
 class SeasonCommissionerAllowedMixin:
     def dispatch(self, request, *args, **kwargs):
@@ -107,9 +169,27 @@ class GameweekCreateView(
 
     def _build_formset(self):
         try:
-            odds = read_odds()
-        except Exception:
-            odds = []
+            odds_file = read_odds_file()
+        except OddsReadError as error:
+            logger.warning(str(error))
+            messages.warning(
+                self.request, "Couldn't load the latest odds, enter games by hand."
+            )
+            return self.formset_class()
+
+        odds = odds_file.odds
+        if odds_file.stale:
+            messages.warning(
+                self.request,
+                "Odds were last fetched on {0:%d %b at %H:%M}, check they are "
+                "up to date.".format(
+                    timezone.localtime(
+                        datetime.datetime.fromtimestamp(
+                            odds_file.modified, timezone.utc
+                        )
+                    )
+                ),
+            )
 
         for odd in odds:
             odd.pop("meta")
@@ -141,9 +221,7 @@ class GameweekCreateView(
             return self.form_invalid(gameweek_form, game_formset)
 
     def form_valid(self, season, form, formset):
-        self.gameweek = Gameweek.objects.create(
-            season=season,
-            number=season.get_next_gameweek_id(),
+        self.gameweek = season.create_gameweek(
             deadline_date=form.cleaned_data.get("deadline_date"),
             deadline_time=form.cleaned_data.get("deadline_time"),
             spiel=form.cleaned_data.get("spiel"),
@@ -156,6 +234,7 @@ class GameweekCreateView(
         try:
             with transaction.atomic():
                 Game.objects.bulk_create(new_games)
+                bump_fragment_version(GAMEWEEK_ODDS, self.gameweek.id)
                 messages.success(self.request, "Successfully created gameweek.")
         except Exception:
             messages.error(self.request, "Something went wrong creating gameweek.")
@@ -242,6 +321,7 @@ class GameweekUpdateView(
             with transaction.atomic():
                 Game.objects.filter(gameweek=gameweek).delete()
                 Game.objects.bulk_create(new_games)
+                bump_fragment_version(GAMEWEEK_ODDS, gameweek.id)
                 messages.success(self.request, "Successfully updated gameweek.")
         except Exception:
             messages.error(self.request, "Something went wrong updating gameweek.")
@@ -283,19 +363,11 @@ class ResultsFormView(SeasonCommissionerAllowedMixin, LoginRequiredMixin, FormVi
 
         try:
             with transaction.atomic():
-                for game in gameweek.game_set.all():
-                    Result.objects.filter(game=game).delete()
+                Result.objects.filter(game__gameweek=gameweek).delete()
                 Result.objects.bulk_create(results)
+                bump_fragment_version(GAMEWEEK_ODDS, gameweek.id)
 
-                for betcontainer in gameweek.betcontainer_set.all():
-                    Balance.objects.create_with_weekly(
-                        gameweek=gameweek,
-                        user=betcontainer.owner,
-                        week_winnings=betcontainer.calculate_winnings(),
-                        week_unused=betcontainer.get_allowance_unused(),
-                    )
-
-                gameweek.update_no_bet_users()
+                settle_gameweek(gameweek)
 
         except IntegrityError as err:
             messages.error(self.request, "Error saving results.")
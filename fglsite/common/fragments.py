@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+from threading import local
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+GAMEWEEK_ODDS = "gameweek_odds"
+LONG_TERM_ODDS = "long_term_odds"
+
+# Rows deleted in the current transaction whose owners still need bumping,
+# as a set of pks by (scope, owner lookup)
+_pending = local()
+
+
+def _version_key(scope, pk):
+    return "fragment-version:{0}:{1}".format(scope, pk)
+
+
+def get_fragment_version(scope, pk):
+    """Current version of the fragments cached for this object. A missing
+    version (never set or evicted) starts afresh rather than from a number
+    an old fragment might still be cached under."""
+    key = _version_key(scope, pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_fragment_version(scope, pk):
+    """Invalidate every fragment cached for this object.
+
+    Inside a transaction the version is bumped again on commit, so a render
+    that read the old rows before the commit cannot be cached under the new
+    version.
+    """
+    key = _version_key(scope, pk)
+    cache.set(key, uuid4().hex, None)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: cache.set(key, uuid4().hex, None))
+
+
+def bump_fragment_version_on_commit(scope, owner_ids, pk):
+    """Invalidate the fragments of whichever object owns pk, once the current
+    transaction commits.
+
+    For delete receivers: a bulk or cascading delete sends a signal per row,
+    so the pks are collected and each owner is looked up in one query and
+    bumped once. owner_ids takes a set of pks and returns their owners' ids.
+    An owner deleted in the same transaction isn't found, but bumps its own
+    version when it goes.
+    """
+    bumps = getattr(_pending, "bumps", None)
+    if bumps is None:
+        bumps = _pending.bumps = {}
+    bumps.setdefault((scope, owner_ids), set()).add(pk)
+    # Registered for every row, as a rolled back savepoint drops its callbacks.
+    # The first to run takes all the pending rows and the rest do nothing.
+    transaction.on_commit(_bump_pending)
+
+
+def _bump_pending():
+    bumps = getattr(_pending, "bumps", None)
+    _pending.bumps = None
+    for (scope, owner_ids), pks in (bumps or {}).items():
+        for owner_id in set(owner_ids(pks)):
+            bump_fragment_version(scope, owner_id)
+
+
+def render_cached_fragment(template_name, context, scope, pk, *vary_on):
+    """Render template_name with context, or return the copy cached for this
+    object's current version and the vary_on values"""
+    key = "fragment:{0}:{1}:{2}:{3}:{4}".format(
+        template_name,
+        scope,
+        pk,
+        get_fragment_version(scope, pk),
+        ":".join(str(value) for value in vary_on),
+    )
+    content = cache.get(key)
+    if content is None:
+        content = render_to_string(template_name, context)
+        cache.set(key, content, getattr(settings, "FRAGMENT_CACHE_TIMEOUT", 86400))
+    return mark_safe(content)
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+import hashlib
+import json
+import logging
+import random
+from threading import local
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.loader import render_to_string
+
+logger = logging.getLogger(__name__)
+
+# The profile of the sampled request this thread is handling, if any
+_current = local()
+
+
+def get_current_profile():
+    return getattr(_current, "profile", None)
+
+
+class QueryRecorder:
+    """ Database execute wrapper that counts and times every query """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            # SQL arrives with placeholders, so identical statements with
+            # different parameters share a fingerprint
+            self.statements[sql] += 1
+
+    def get_duplicates(self):
+        """ Statements run more than once, most frequent first """
+        return [
+            {
+                "fingerprint": hashlib.md5(sql.encode("utf-8")).hexdigest()[:8],
+                "count": count,
+                "sql": sql[:200],
+            }
+            for sql, count in self.statements.most_common()
+            if count > 1
+        ]
+
+
+class RequestProfile:
+    """ Timings gathered for a single sampled request """
+
+    def __init__(self):
+        self.queries = QueryRecorder()
+        self.start = time.perf_counter()
+        self.rendering = False
+        self.template_duration = 0.0
+        self.total_duration = 0.0
+
+    @contextmanager
+    def time_template(self):
+        """ Time a template render, leaving out templates rendered inside it """
+        if self.rendering:
+            yield
+            return
+
+        self.rendering = True
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.template_duration += time.perf_counter() - start
+            self.rendering = False
+
+    def finish(self):
+        self.total_duration = time.perf_counter() - self.start
+
+    def as_dict(self, request, response):
+        return {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "sql_count": self.queries.count,
+            "sql_ms": round(self.queries.duration * 1000, 2),
+            "template_ms": round(self.template_duration * 1000, 2),
+            "total_ms": round(self.total_duration * 1000, 2),
+            "duplicate_queries": self.queries.get_duplicates(),
+        }
+
+    def server_timing(self):
+        return ", ".join(
+            [
+                'sql;dur={0:.2f};desc="{1} queries"'.format(
+                    self.queries.duration * 1000, self.queries.count
+                ),
+                "template;dur={0:.2f}".format(self.template_duration * 1000),
+                "total;dur={0:.2f}".format(self.total_duration * 1000),
+            ]
+        )
+
+
+class RequestProfilingMiddleware:
+    """Record query count, SQL time, duplicate queries, template render time
+    and wall time for a sample of requests.
+
+    Results are logged as JSON and returned in a Server-Timing header. Staff
+    users also get a small panel at the foot of sampled HTML pages when
+    REQUEST_PROFILING_PANEL is set. With REQUEST_PROFILING_SAMPLE_RATE at 0
+    the middleware removes itself at startup, so the panel is never shown
+    however REQUEST_PROFILING_PANEL is set.
+
+    Template time is only recorded with the ProfilingDjangoTemplates backend
+    from fglsite.common.template_backends.
+    """
+
+    def __init__(self, get_response):
+        self.sample_rate = getattr(settings, "REQUEST_PROFILING_SAMPLE_RATE", 0.0)
+        if not self.sample_rate:
+            raise MiddlewareNotUsed()
+
+        self.show_panel = getattr(settings, "REQUEST_PROFILING_PANEL", False)
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        request.request_profile = profile
+
+        _current.profile = profile
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile.queries))
+                response = self.get_response(request)
+        finally:
+            _current.profile = None
+
+        profile.finish()
+        logger.info(json.dumps(profile.as_dict(request, response), sort_keys=True))
+        response["Server-Timing"] = profile.server_timing()
+
+        if self._should_show_panel(request, response):
+            self._add_panel(profile, request, response)
+
+        return response
+
+    def _should_show_panel(self, request, response):
+        user = getattr(request, "user", None)
+        return (
+            self.show_panel
+            and user is not None
+            and user.is_staff
+            and not response.streaming
+            and response.get("Content-Type", "").startswith("text/html")
+        )
+
+    def _add_panel(self, profile, request, response):
+        panel = render_to_string(
+            "common/request_profile_panel.html",
+            {"profile": profile.as_dict(request, response)},
+        )
+        content = response.content.decode(response.charset)
+        if "</body>" in content:
+            content = content.replace("</body>", panel + "</body>", 1)
+            response.content = content.encode(response.charset)
+            if response.has_header("Content-Length"):
+                response["Content-Length"] = len(response.content)
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+from django.template.backends.django import DjangoTemplates, Template
+
+from fglsite.common.middleware import get_current_profile
+
+
+class ProfilingTemplate(Template):
+    def render(self, context=None, request=None):
+        profile = get_current_profile()
+        if profile is None:
+            return super().render(context, request)
+        with profile.time_template():
+            return super().render(context, request)
+
+
+class ProfilingDjangoTemplates(DjangoTemplates):
+    """Django templates, timed for RequestProfilingMiddleware however they
+    are rendered: render(), TemplateResponse or render_to_string"""
+
+    def from_string(self, template_code):
+        return ProfilingTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return ProfilingTemplate(template.template, self)
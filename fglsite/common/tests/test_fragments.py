@@ -0,0 +1,195 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.template import Context, Template
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from datetime import date
+
+from fglsite.bets.models import Season, Game, Result
+from fglsite.common.fragments import (
+    GAMEWEEK_ODDS,
+    LONG_TERM_ODDS,
+    bump_fragment_version,
+    get_fragment_version,
+    render_cached_fragment,
+)
+from fglsite.gambling.models import (
+    BetContainer,
+    LongSpecialContainer,
+    LongSpecial,
+    LongSpecialBet,
+    LongSpecialResult,
+)
+
+
+class FragmentVersionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_version_is_stable_until_bumped(self):
+        version = get_fragment_version(GAMEWEEK_ODDS, 1)
+
+        self.assertEqual(get_fragment_version(GAMEWEEK_ODDS, 1), version)
+        self.assertNotEqual(get_fragment_version(GAMEWEEK_ODDS, 2), version)
+
+        bump_fragment_version(GAMEWEEK_ODDS, 1)
+
+        self.assertNotEqual(get_fragment_version(GAMEWEEK_ODDS, 1), version)
+
+    def test_render_cached_fragment_varies_on_values(self):
+        render_cached_fragment(
+            "common/render_messages.html", {}, GAMEWEEK_ODDS, 1, True, 2
+        )
+
+        key = "fragment:common/render_messages.html:gameweek_odds:1:{0}:{1}"
+        version = get_fragment_version(GAMEWEEK_ODDS, 1)
+        self.assertIsNotNone(cache.get(key.format(version, "True:2")))
+        self.assertIsNone(cache.get(key.format(version, "False:2")))
+
+
+class OddsFragmentTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("comm")
+        self.season = Season.objects.create(name="test", commissioner=self.user)
+        self.gameweek = self.season.create_gameweek(
+            deadline_date=date(2017, 1, 1), spiel=""
+        )
+        self.game = Game.objects.create(
+            gameweek=self.gameweek, hometeam="Spurs", awayteam="Arsenal"
+        )
+        self.container = LongSpecialContainer.objects.create(
+            description="Winner", created_gameweek=self.gameweek
+        )
+        self.long_special = LongSpecial.objects.create(
+            container=self.container, description="Spurs"
+        )
+
+    def _render_gameweek_odds(self):
+        return Template("{% load bets_extras %}{% gameweek_odds gameweek %}").render(
+            Context({"gameweek": self.gameweek})
+        )
+
+    def _render_long_term_odds(self):
+        return Template(
+            "{% load gambling_extras %}" "{% long_term_odds container gameweek False %}"
+        ).render(Context({"container": self.container, "gameweek": self.gameweek}))
+
+    def test_gameweek_odds_served_from_cache(self):
+        first = self._render_gameweek_odds()
+        with CaptureQueriesContext(connection) as queries:
+            second = self._render_gameweek_odds()
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(queries), 0)
+
+    def test_gameweek_odds_invalidated_by_games_and_results(self):
+        self._render_gameweek_odds()
+
+        game = Game.objects.create(
+            gameweek=self.gameweek, hometeam="Chelsea", awayteam="Everton"
+        )
+        self.assertIn("Chelsea", self._render_gameweek_odds())
+
+        Result.objects.create(game=self.game, result="H")
+        Result.objects.create(game=game, result="A")
+        self.assertIn("<td>A</td>", self._render_gameweek_odds())
+
+        game.delete()
+        self.assertNotIn("Chelsea", self._render_gameweek_odds())
+
+    def test_long_term_odds_invalidated_by_specials_and_bets(self):
+        self.assertNotIn("Chelsea", self._render_long_term_odds())
+
+        LongSpecial.objects.create(container=self.container, description="Chelsea")
+        self.assertIn("Chelsea", self._render_long_term_odds())
+
+        bet_container = BetContainer.objects.create(
+            owner=self.user, gameweek=self.gameweek
+        )
+        LongSpecialBet.objects.create(
+            bet_container=bet_container, long_special=self.long_special
+        )
+        self.assertIn("comm", self._render_long_term_odds())
+
+
+class OddsFragmentDeleteTest(TransactionTestCase):
+    """Deletes bump the version on commit, so these need real transactions"""
+
+    def setUp(self):
+        OddsFragmentTest.setUp(self)
+        self.bet_container = BetContainer.objects.create(
+            owner=self.user, gameweek=self.gameweek
+        )
+        self.bet = LongSpecialBet.objects.create(
+            bet_container=self.bet_container, long_special=self.long_special
+        )
+
+    _render_gameweek_odds = OddsFragmentTest._render_gameweek_odds
+    _render_long_term_odds = OddsFragmentTest._render_long_term_odds
+
+    def test_deleting_results_in_bulk(self):
+        Result.objects.create(game=self.game, result="H")
+        for number in range(5):
+            game = Game.objects.create(gameweek=self.gameweek, hometeam=str(number))
+            Result.objects.create(game=game, result="A")
+        self.assertIn("<td>A</td>", self._render_gameweek_odds())
+
+        with CaptureQueriesContext(connection) as queries:
+            Result.objects.filter(game__gameweek=self.gameweek).delete()
+
+        # Select the results, begin, delete them, then look up their gameweek
+        # once, however many there are
+        self.assertEqual(len(queries), 4)
+        self.assertNotIn("<td>A</td>", self._render_gameweek_odds())
+
+    def test_deleting_long_special_result(self):
+        result = LongSpecialResult.objects.create(
+            long_special=self.long_special, completed_gameweek=self.gameweek
+        )
+        version = get_fragment_version(LONG_TERM_ODDS, self.container.id)
+
+        result.delete()
+
+        self.assertNotEqual(
+            get_fragment_version(LONG_TERM_ODDS, self.container.id), version
+        )
+
+    def test_deleting_bet_container_removes_choices(self):
+        self.assertIn("comm", self._render_long_term_odds())
+
+        self.bet_container.delete()
+
+        self.assertNotIn("comm", self._render_long_term_odds())
+
+    def test_deleting_user_removes_choices(self):
+        player = User.objects.create_user("player")
+        LongSpecialBet.objects.create(
+            bet_container=BetContainer.objects.create(
+                owner=player, gameweek=self.gameweek
+            ),
+            long_special=self.long_special,
+        )
+        self.assertIn("player", self._render_long_term_odds())
+
+        player.delete()
+
+        self.assertNotIn("player", self._render_long_term_odds())
+
+    def test_renaming_user(self):
+        self.assertIn("comm", self._render_long_term_odds())
+
+        self.user.username = "commissioner"
+        self.user.save()
+
+        self.assertIn("commissioner", self._render_long_term_odds())
+
+    def test_logging_in_keeps_cached_odds(self):
+        self._render_long_term_odds()
+
+        self.user.save(update_fields=["last_login"])
+
+        with CaptureQueriesContext(connection) as queries:
+            self._render_long_term_odds()
+        self.assertEqual(len(queries), 0)
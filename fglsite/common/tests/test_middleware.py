@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from fglsite.bets.models import Season
+
+
+class RequestProfilingMiddlewareTest(TestCase):
+    def setUp(self):
+        self.commissioner = User.objects.create_user(username="comm", password="comm")
+        for name in ("one", "two"):
+            Season.objects.create(name=name, commissioner=self.commissioner)
+
+    @override_settings(REQUEST_PROFILING_SAMPLE_RATE=0.0)
+    def test_no_header_when_sampling_off(self):
+        response = self.client.get(reverse("index"))
+
+        assert not response.has_header("Server-Timing")
+
+    @override_settings(REQUEST_PROFILING_SAMPLE_RATE=1.0)
+    def test_server_timing_header_and_log_line(self):
+        with self.assertLogs("fglsite.common.middleware", level="INFO") as logs:
+            response = self.client.get(reverse("find-season"))
+
+        assert "sql;dur=" in response["Server-Timing"]
+        assert "template;dur=" in response["Server-Timing"]
+        assert "total;dur=" in response["Server-Timing"]
+
+        profile = json.loads(logs.records[0].getMessage())
+        assert profile["path"] == reverse("find-season")
+        assert profile["status"] == 200
+        assert profile["sql_count"] > 0
+
+    def _profile(self, url):
+        with self.assertLogs("fglsite.common.middleware", level="INFO") as logs:
+            self.client.get(url)
+        return json.loads(logs.records[0].getMessage())
+
+    @override_settings(REQUEST_PROFILING_SAMPLE_RATE=1.0)
+    def test_template_time_for_render_view(self):
+        # find_season is a function view calling render()
+        profile = self._profile(reverse("find-season"))
+
+        assert 0 < profile["template_ms"] <= profile["total_ms"]
+
+    @override_settings(REQUEST_PROFILING_SAMPLE_RATE=1.0)
+    def test_template_time_for_template_response_view(self):
+        gameweek = Season.objects.get(name="one").create_gameweek(spiel="")
+
+        profile = self._profile(reverse("gameweek", args=(gameweek.pk,)))
+
+        assert 0 < profile["template_ms"] <= profile["total_ms"]
+
+    @override_settings(REQUEST_PROFILING_SAMPLE_RATE=1.0)
+    def test_duplicate_queries_reported(self):
+        # The commissioner check and the page each look up the season
+        gameweek = Season.objects.get(name="one").create_gameweek(spiel="")
+        self.client.force_login(self.commissioner)
+        with self.assertLogs("fglsite.common.middleware", level="INFO") as logs:
+            self.client.get(reverse("manage-longterms", args=(gameweek.pk,)))
+
+        profile = json.loads(logs.records[0].getMessage())
+        duplicates = profile["duplicate_queries"]
+        assert duplicates
+        assert any(
+            duplicate["count"] == 2 and "bets_season" in duplicate["sql"]
+            for duplicate in duplicates
+        )
+
+    @override_settings(REQUEST_PROFILING_SAMPLE_RATE=1.0, REQUEST_PROFILING_PANEL=True)
+    def test_panel_shown_to_staff_only(self):
+        self.client.force_login(self.commissioner)
+        response = self.client.get(reverse("find-season"))
+        self.assertNotContains(response, "request-profile")
+
+        self.commissioner.is_staff = True
+        self.commissioner.save()
+        response = self.client.get(reverse("find-season"))
+        self.assertContains(response, "request-profile")
+
+    @override_settings(REQUEST_PROFILING_SAMPLE_RATE=0.0, REQUEST_PROFILING_PANEL=True)
+    def test_panel_needs_sampling(self):
+        self.commissioner.is_staff = True
+        self.commissioner.save()
+        self.client.force_login(self.commissioner)
+
+        response = self.client.get(reverse("find-season"))
+
+        self.assertNotContains(response, "request-profile")
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""Query count and wall time budgets for every page in the bets and gambling
+apps.
+
+Budgets live in query_budgets.json next to this file. Each entry names the
+user to log in as, the seeded object each URL argument refers to, the HTTP
+method (GET unless given), the maximum number of queries and the maximum
+wall time in seconds. Entries are keyed by URL name, or name the URL in
+url_name to budget the same page for different objects. A new URL
+without a budget fails the suite, as does any page going over budget.
+
+Every page is loaded in a small generated league and in one the size of
+a real season (see LEAGUE_SIZES), and must run the same number of queries
+in each. That catches queries per player or per gameweek that a single
+small league would hide. Budgets leave a little headroom over the
+measured counts so that harmless changes don't fail the suite.
+"""
+import json
+import os
+import time
+from tempfile import TemporaryDirectory
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from fglsite.bets import urls as bets_urls
+from fglsite.gambling import urls as gambling_urls
+from fglsite.gambling.models import (
+    BetContainer,
+    LongSpecialContainer,
+    LongSpecialBet,
+)
+from fglsite.gambling.synthetic import generate_league
+
+BUDGETS_FILE = os.path.join(os.path.dirname(__file__), "query_budgets.json")
+
+LEAGUE_SIZES = (
+    {"users": 5, "gameweeks": 3},
+    # A whole season of a large league
+    {"users": 50, "gameweeks": 38},
+)
+
+
+def load_budgets():
+    with open(BUDGETS_FILE) as budgets_file:
+        return json.load(budgets_file)
+
+
+def seed_league(seed, users, gameweeks):
+    """Generate a league and pick out the users and objects the budgets
+    refer to. The latest gameweek is open and the long specials were
+    created in the first."""
+    season = generate_league(seed=seed, users=users, gameweeks=gameweeks)
+    commissioner = season.commissioner
+    first_gameweek = season.gameweek_set.get(number=1)
+    bet_container = (
+        BetContainer.objects.filter(gameweek=season.latest_gameweek)
+        .exclude(owner=commissioner)
+        .order_by("id")
+        .first()
+    )
+    player = bet_container.owner
+    accumulators = bet_container.accumulator_set.order_by("id")
+    long_special_container = (
+        LongSpecialContainer.objects.filter(created_gameweek=first_gameweek)
+        .order_by("id")
+        .first()
+    )
+    return {
+        "users": {"commissioner": commissioner, "player": player, "anonymous": None},
+        "objects": {
+            "season": season,
+            "gameweek": season.latest_gameweek,
+            "first_gameweek": first_gameweek,
+            "bet_container": bet_container,
+            "accumulator": accumulators.first(),
+            "spare_accumulator": accumulators.last(),
+            "long_special_container": long_special_container,
+            "long_special_bet": LongSpecialBet.objects.get(
+                bet_container__owner=player,
+                long_special__container=long_special_container,
+            ),
+        },
+    }
+
+
+class QueryBudgetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.leagues = [
+            seed_league(seed, **size) for seed, size in enumerate(LEAGUE_SIZES)
+        ]
+        cls.budgets = load_budgets()
+
+    def setUp(self):
+        # Fetched odds for create-gameweek to read
+        output_dir = TemporaryDirectory()
+        self.addCleanup(output_dir.cleanup)
+        with open(os.path.join(output_dir.name, "output.json"), "w") as output:
+            output.write("[]")
+        odds_settings = override_settings(ODDS_OUTPUT_DIR=output_dir.name + "/")
+        odds_settings.enable()
+        self.addCleanup(odds_settings.disable)
+
+    def test_every_url_has_a_budget(self):
+        url_names = {
+            pattern.name
+            for pattern in bets_urls.urlpatterns + gambling_urls.urlpatterns
+        }
+
+        self.assertEqual(
+            url_names,
+            {budget.get("url_name", name) for name, budget in self.budgets.items()},
+        )
+
+    def test_views_within_budget(self):
+        for url_name, budget in sorted(self.budgets.items()):
+            with self.subTest(url_name=url_name):
+                self._assert_within_budget(url_name, budget)
+
+    def _load(self, league, url_name, budget):
+        """ Load the page in this league, returning its queries and wall time """
+        url = reverse(
+            budget.get("url_name", url_name),
+            kwargs={
+                kwarg: league["objects"][object_name].pk
+                for kwarg, object_name in budget.get("kwargs", {}).items()
+            },
+        )
+        user = league["users"][budget["user"]]
+
+        self.client.logout()
+        if user:
+            self.client.force_login(user)
+        # Budgets are for cold renders, not ones served from the fragment cache
+        cache.clear()
+
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, budget.get("method", "get"))(url)
+        duration = time.perf_counter() - start
+
+        self.assertIn(response.status_code, (200, 302))
+        return len(queries), duration
+
+    def _assert_within_budget(self, url_name, budget):
+        loads = [self._load(league, url_name, budget) for league in self.leagues]
+        query_counts = [query_count for query_count, _ in loads]
+
+        self.assertEqual(
+            len(set(query_counts)),
+            1,
+            "{0} ran {1} queries in leagues of {2}".format(
+                url_name, query_counts, LEAGUE_SIZES
+            ),
+        )
+        self.assertLessEqual(
+            query_counts[-1],
+            budget["max_queries"],
+            "{0} ran {1} queries".format(url_name, query_counts[-1]),
+        )
+        self.assertLessEqual(
+            max(duration for _, duration in loads), budget["max_seconds"]
+        )
@@ -6,3 +6,6 @@ from django.apps import AppConfig
 
 class GamblingConfig(AppConfig):
     name = "fglsite.gambling"
+
+    def ready(self):
+        from fglsite.gambling import signals  # noqa: F401
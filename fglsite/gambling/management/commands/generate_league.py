@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+from django.core.management.base import BaseCommand, CommandError
+
+from fglsite.gambling.synthetic import generate_league
+
+
+class Command(BaseCommand):
+    help = "Generate a synthetic season of players, bets and results"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--gameweeks", type=int, default=10)
+        parser.add_argument("--games", type=int, default=10, help="Games per gameweek")
+        parser.add_argument(
+            "--accumulators", type=int, default=3, help="Accumulators per user per week"
+        )
+        parser.add_argument("--legs", type=int, default=3, help="Legs per accumulator")
+        parser.add_argument("--long-specials", type=int, default=2)
+        parser.add_argument(
+            "--long-special-options",
+            type=int,
+            default=10,
+            help="Options in each long special",
+        )
+        parser.add_argument(
+            "--long-special-results",
+            type=int,
+            default=1,
+            help="Number of long specials to settle",
+        )
+        parser.add_argument(
+            "--prefix", default="synthetic", help="Username prefix for players"
+        )
+
+    def handle(self, *args, **options):
+        if options["users"] < 1:
+            raise CommandError("--users must be at least 1")
+
+        try:
+            season = generate_league(
+                seed=options["seed"],
+                users=options["users"],
+                gameweeks=options["gameweeks"],
+                games=options["games"],
+                accumulators=options["accumulators"],
+                legs=options["legs"],
+                long_specials=options["long_specials"],
+                long_special_options=options["long_special_options"],
+                long_special_results=options["long_special_results"],
+                prefix=options["prefix"],
+                log=self.stdout.write,
+            )
+        except ValueError as error:
+            raise CommandError(str(error))
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Created season {0} (id {1})".format(season.name, season.pk)
+            )
+        )
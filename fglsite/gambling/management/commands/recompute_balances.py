@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+from multiprocessing import Pool
+import os
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from fglsite.bets.models import Season
+from fglsite.gambling.settlement import recompute_season
+
+
+def _recompute_in_worker(season_id):
+    try:
+        return season_id, recompute_season(season_id)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the balance chain of one or all seasons from bets and results, "
+        "e.g. after a historical result has been corrected"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--season",
+            type=int,
+            action="append",
+            dest="season_ids",
+            help="Season id to recompute (may be repeated)",
+        )
+        parser.add_argument("--all", action="store_true", help="Recompute every season")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help=(
+                "Number of processes, one season at a time each "
+                "(default: number of CPUs, or 1 on SQLite)"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options["all"] == bool(options["season_ids"]):
+            raise CommandError("Give either --all or one or more --season ids")
+
+        if options["all"]:
+            season_ids = list(Season.objects.values_list("id", flat=True))
+        else:
+            season_ids = options["season_ids"]
+            missing = set(season_ids) - set(
+                Season.objects.filter(id__in=season_ids).values_list("id", flat=True)
+            )
+            if missing:
+                raise CommandError(
+                    "No season with id {0}".format(", ".join(map(str, sorted(missing))))
+                )
+
+        workers = options["workers"] or self._default_workers()
+        workers = max(1, min(workers, len(season_ids)))
+
+        if workers == 1:
+            results = (
+                (season_id, recompute_season(season_id)) for season_id in season_ids
+            )
+            self._report(results)
+        else:
+            # Each worker opens its own database connection
+            connections.close_all()
+            with Pool(workers, initializer=django.setup) as pool:
+                self._report(pool.imap_unordered(_recompute_in_worker, season_ids))
+
+    def _default_workers(self):
+        # SQLite allows one writer at a time, so parallel seasons would only
+        # queue up behind each other's transactions
+        if connection.vendor == "sqlite":
+            return 1
+        return os.cpu_count() or 1
+
+    def _report(self, results):
+        for season_id, gameweek_count in results:
+            self.stdout.write(
+                "Season {0}: settled {1} gameweeks".format(season_id, gameweek_count)
+            )
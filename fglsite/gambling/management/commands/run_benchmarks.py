@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from fglsite.benchmarks.cases import BENCHMARKS
+from fglsite.benchmarks.runner import BASELINE_FILE, compare, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Time settlement, standings and page renders against generated leagues "
+        "and compare with a stored baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scales",
+            default="100,1000",
+            help="Comma separated numbers of users to generate leagues for",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--benchmark",
+            action="append",
+            choices=list(BENCHMARKS),
+            help="Only run this benchmark (may be repeated)",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--gameweeks", type=int, default=5)
+        parser.add_argument("--games", type=int, default=10)
+        parser.add_argument("--accumulators", type=int, default=3)
+        parser.add_argument("--legs", type=int, default=3)
+        parser.add_argument("--output", default="benchmark_results.json")
+        parser.add_argument(
+            "--baseline",
+            default=BASELINE_FILE,
+            help="Results to compare with",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Fraction a median may exceed the baseline by before it is reported",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Store these results as the new baseline",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Exit with an error if any benchmark regressed",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            scales = [int(scale) for scale in options["scales"].split(",")]
+        except ValueError:
+            raise CommandError("--scales must be a comma separated list of numbers")
+        if any(scale < 2 for scale in scales):
+            raise CommandError("--scales must each be at least 2")
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be at least 1")
+
+        results = run_benchmarks(
+            scales,
+            repeat=options["repeat"],
+            names=options["benchmark"],
+            log=self.stdout.write,
+            seed=options["seed"],
+            gameweeks=options["gameweeks"],
+            games=options["games"],
+            accumulators=options["accumulators"],
+            legs=options["legs"],
+        )
+        self._write(options["output"], results)
+        self.stdout.write("Results written to {0}".format(options["output"]))
+
+        if options["save_baseline"]:
+            self._write(options["baseline"], results)
+            self.stdout.write("Baseline written to {0}".format(options["baseline"]))
+            return
+
+        if not os.path.exists(options["baseline"]):
+            self.stdout.write("No baseline at {0}".format(options["baseline"]))
+            return
+
+        with open(options["baseline"]) as baseline_file:
+            regressions = compare(
+                results, json.load(baseline_file), options["tolerance"]
+            )
+
+        for scale, name, baseline_median, median in regressions:
+            self.stdout.write(
+                self.style.WARNING(
+                    "{0} users: {1} median {2}ms, baseline {3}ms".format(
+                        scale, name, median, baseline_median
+                    )
+                )
+            )
+        if regressions and options["fail_on_regression"]:
+            raise CommandError("{0} benchmarks regressed".format(len(regressions)))
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline"))
+
+    def _write(self, path, results):
+        with open(path, "w") as results_file:
+            json.dump(results, results_file, indent=2, sort_keys=True)
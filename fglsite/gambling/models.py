@@ -1,12 +1,19 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, unicode_literals, division
 
-from django.db import models
+from django.db import NotSupportedError, models
+from django.db.models.functions import Coalesce
 
 from django.contrib.auth.models import User
 import logging
 
 from fglsite.bets.models import Gameweek, Game
+from fglsite.gambling.payouts import (
+    VOID,
+    Legs,
+    calculate_queryset_returns,
+    calculate_returns,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -41,9 +48,12 @@ class BetContainer(models.Model):
         return game_count
 
     def calculate_winnings(self):
-        winnings = 0.0
-        for accumulator in self.accumulator_set.all():
-            winnings += accumulator.calculate_winnings()
+        winnings = sum(
+            calculate_queryset_returns(
+                self.accumulator_set.all(),
+                BetPart.objects.filter(accumulator__bet_container=self),
+            ).values()
+        )
 
         true_winnings = winnings - float(self.gameweek.season.weekly_allowance)
 
@@ -62,17 +72,14 @@ class Accumulator(models.Model):
         return name
 
     def calculate_winnings(self):
-        """ Calculate winnings for this accumulator """
-        odds = 1.0
-        for betpart in self.betpart_set.all():
-            if betpart.is_void():
-                continue
-            if betpart.is_correct():
-                odds = odds * (1 + betpart.get_odds())
-            else:
-                return 0.0
+        """Calculate winnings for this accumulator. A leg whose game has no
+        result yet counts as lost."""
+        legs = Legs.from_queryset(self.betpart_set.all())
+        returns = calculate_returns(
+            legs, legs.outcomes(legs.get_results()), [self.id], [float(self.stake)]
+        )
 
-        return odds * float(self.stake)
+        return float(returns[0])
 
 
 class BetPart(models.Model):
@@ -84,26 +91,42 @@ class BetPart(models.Model):
     def __str__(self):
         return str(self.game) + "," + str(self.result)
 
-    def is_correct(self):
-        if self.game.result_set.count() != 1:
-            return False
+    def _as_leg(self):
+        """ This bet part as a payout leg, along with its game's result """
+        legs = Legs.from_queryset(BetPart.objects.filter(pk=self.pk))
+        return legs, legs.outcomes(legs.get_results())[0]
 
-        result = self.game.result_set.get()
-        return result.result == self.result
+    def is_correct(self):
+        """ Whether the game's result matches the pick, False until resulted """
+        legs, outcome = self._as_leg()
+        return bool(legs.picked[0] == outcome)
 
     def is_void(self):
-        return self.game.get_result().result == "P"
+        """ Whether the game was postponed, False until resulted """
+        return self._as_leg()[1] == VOID
 
     def get_odds(self):
-        return self.game.get_numerator(self.result) / self.game.get_denominator(
-            self.result
-        )
+        legs = Legs.from_queryset(BetPart.objects.filter(pk=self.pk))
+        return float(legs.numerators[0] / legs.denominators[0])
+
+
+class LongSpecialContainerQuerySet(models.QuerySet):
+    def outstanding(self):
+        """ Containers with a long special still waiting for its result """
+        return self.annotate(
+            has_outstanding=models.Exists(
+                LongSpecial.objects.filter(
+                    container=models.OuterRef("pk"), longspecialresult=None
+                )
+            )
+        ).filter(has_outstanding=True)
 
 
 class LongSpecialContainer(models.Model):
     description = models.CharField(max_length=255)
     allowance = models.DecimalField(default=100.0, decimal_places=2, max_digits=99)
     created_gameweek = models.ForeignKey(Gameweek, on_delete=models.CASCADE)
+    objects = LongSpecialContainerQuerySet.as_manager()
 
     def __str__(self):
         return self.description
@@ -112,8 +135,48 @@ class LongSpecialContainer(models.Model):
         return False
 
     def is_complete(self):
-        return all(
-            [longspecial.is_correct() for longspecial in self.longspecial_set.all()]
+        """ Check if every long special has its result """
+        if hasattr(self, "has_outstanding"):
+            return not self.has_outstanding
+        return not self.longspecial_set.filter(longspecialresult=None).exists()
+
+
+class GroupConcat(models.Aggregate):
+    """Join the values of a group into one comma separated string, in no
+    particular order. Supports SQLite, MySQL and PostgreSQL."""
+
+    function = "GROUP_CONCAT"
+    template = "%(function)s(%(expressions)s, ', ')"
+    output_field = models.CharField()
+
+    def as_mysql(self, compiler, connection):
+        return super().as_sql(
+            compiler,
+            connection,
+            template="%(function)s(%(expressions)s SEPARATOR ', ')",
+        )
+
+    def as_postgresql(self, compiler, connection):
+        return super().as_sql(compiler, connection, function="STRING_AGG")
+
+    def as_oracle(self, compiler, connection):
+        raise NotSupportedError("GroupConcat isn't supported on Oracle")
+
+
+class LongSpecialQuerySet(models.QuerySet):
+    def with_entrants(self):
+        """Annotate long specials with who chose them in a single query:
+
+        entrant_count - number of bets on the long special
+        entrant_names - comma separated usernames of the players who bet on
+                        it, in no particular order (chosen_by sorts them)
+        """
+        return self.annotate(
+            entrant_count=models.Count("longspecialbet"),
+            entrant_names=Coalesce(
+                GroupConcat("longspecialbet__bet_container__owner__username"),
+                models.Value(""),
+            ),
         )
 
 
@@ -122,6 +185,7 @@ class LongSpecial(models.Model):
     description = models.CharField(max_length=255)
     numerator = models.IntegerField(default=0)
     denominator = models.IntegerField(default=1)
+    objects = LongSpecialQuerySet.as_manager()
 
     def __str__(self):
         return (
@@ -129,14 +193,19 @@ class LongSpecial(models.Model):
         )
 
     def chosen_by(self):
-        users = ""
-        for bet in self.longspecialbet_set.all():
-            if users:
-                users += ", " + bet.bet_container.owner.username
-            else:
-                users = bet.bet_container.owner.username
-
-        return users
+        """ Usernames of the players who bet on this long special, sorted """
+        if hasattr(self, "entrant_names"):
+            # Usernames can't contain commas or spaces, so splitting is safe
+            names = self.entrant_names.split(", ") if self.entrant_names else []
+            return ", ".join(sorted(names))
+        # Sorted here rather than by the database, whose collation may differ
+        return ", ".join(
+            sorted(
+                self.longspecialbet_set.values_list(
+                    "bet_container__owner__username", flat=True
+                )
+            )
+        )
 
     def is_correct(self):
         return self.longspecialresult_set.count() == 1
@@ -165,7 +234,7 @@ class LongSpecialBet(models.Model):
         self.long_special.is_correct()
 
     def project_winnings(self, long_special):
-        if self.long_special == long_special:
+        if self.long_special_id == long_special.id:
             return (long_special.numerator / long_special.denominator) * float(
                 long_special.container.allowance
             )
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals, division
+
+import numpy as np
+
+from fglsite.bets.models import Result
+
+OUTCOMES = ("H", "D", "A")
+VOID = "P"
+
+LEG_FIELDS = (
+    "accumulator_id",
+    "game_id",
+    "result",
+    "game__homenumerator",
+    "game__homedenominator",
+    "game__drawnumerator",
+    "game__drawdenominator",
+    "game__awaynumerator",
+    "game__awaydenominator",
+)
+
+
+class Legs:
+    """ Bet parts held as parallel arrays, one entry per leg """
+
+    def __init__(self, accumulator_ids, game_ids, picked, numerators, denominators):
+        self.accumulator_ids = np.asarray(accumulator_ids, dtype=np.int64)
+        self.game_ids = np.asarray(game_ids, dtype=np.int64)
+        self.picked = np.asarray(picked, dtype="U1")
+        self.numerators = np.asarray(numerators, dtype=np.int64)
+        self.denominators = np.asarray(denominators, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.accumulator_ids)
+
+    @classmethod
+    def from_queryset(cls, betparts):
+        """ Load legs from a BetPart queryset in a single query """
+        rows = list(betparts.order_by("id").values_list(*LEG_FIELDS))
+        if not rows:
+            return cls([], [], [], [], [])
+
+        columns = list(zip(*rows))
+        picked = np.asarray(columns[2], dtype="U1")
+        # Pick the price of the chosen outcome for each leg
+        choice = np.select(
+            [picked == outcome for outcome in OUTCOMES[:2]], [0, 1], default=2
+        )
+        odds = np.asarray(columns[3:], dtype=np.int64)
+
+        return cls(
+            accumulator_ids=columns[0],
+            game_ids=columns[1],
+            picked=picked,
+            numerators=np.choose(choice, odds[0::2]),
+            denominators=np.choose(choice, odds[1::2]),
+        )
+
+    def get_results(self):
+        """ Map game id to posted result for every game in these legs """
+        return dict(
+            Result.objects.filter(game_id__in=set(self.game_ids.tolist())).values_list(
+                "game_id", "result"
+            )
+        )
+
+    def outcomes(self, results):
+        """ Result for the game of each leg, empty if no result posted """
+        return np.asarray(
+            [results.get(game_id, "") for game_id in self.game_ids.tolist()],
+            dtype="U1",
+        )
+
+
+def leg_factors(legs, outcomes):
+    """Multiplier for each leg: 1 if void, 1 + odds if correct, 0 if lost
+    (or not yet resulted)"""
+    return np.where(
+        outcomes == VOID,
+        1.0,
+        np.where(
+            legs.picked == outcomes, 1.0 + legs.numerators / legs.denominators, 0.0
+        ),
+    )
+
+
+def calculate_returns(legs, outcomes, accumulator_ids, stakes):
+    """Calculate the return of every accumulator in one pass.
+
+    Returns an array lined up with accumulator_ids. An accumulator with only
+    void legs (or no legs) returns its stake. A leg whose game has no result
+    yet (an empty outcome) loses, so its accumulator returns 0 until every
+    game is resulted. Raises ValueError if a leg
+    belongs to an accumulator missing from accumulator_ids.
+    """
+    accumulator_ids = np.asarray(accumulator_ids, dtype=np.int64)
+    stakes = np.asarray(stakes, dtype=np.float64)
+    odds = np.ones(len(accumulator_ids))
+
+    if len(legs):
+        order = np.argsort(accumulator_ids, kind="mergesort")
+        sorted_ids = accumulator_ids[order]
+        found = np.searchsorted(sorted_ids, legs.accumulator_ids)
+        # searchsorted gives an insertion point for missing ids, which would
+        # quietly attach the leg to a neighbouring accumulator
+        matched = found < len(sorted_ids)
+        matched[matched] = sorted_ids[found[matched]] == legs.accumulator_ids[matched]
+        if not matched.all():
+            raise ValueError(
+                "Legs for unknown accumulators: {0}".format(
+                    sorted(set(legs.accumulator_ids[~matched].tolist()))
+                )
+            )
+        positions = order[found]
+
+        # Group legs by accumulator, keeping bet part order within each group
+        leg_order = np.argsort(positions, kind="mergesort")
+        grouped_positions = positions[leg_order]
+        starts = np.flatnonzero(
+            np.concatenate(([True], grouped_positions[1:] != grouped_positions[:-1]))
+        )
+        odds[grouped_positions[starts]] = np.multiply.reduceat(
+            leg_factors(legs, outcomes)[leg_order], starts
+        )
+
+    return odds * stakes
+
+
+def calculate_queryset_returns(accumulators, betparts):
+    """Calculate returns for an Accumulator queryset and its BetPart queryset.
+
+    Returns a dict of accumulator id to return.
+    """
+    accumulator_ids, stakes = [], []
+    for accumulator_id, stake in accumulators.values_list("id", "stake"):
+        accumulator_ids.append(accumulator_id)
+        stakes.append(float(stake))
+
+    legs = Legs.from_queryset(betparts)
+    returns = calculate_returns(
+        legs, legs.outcomes(legs.get_results()), accumulator_ids, stakes
+    )
+
+    return dict(zip(accumulator_ids, returns.tolist()))
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals, division
+
+from collections import defaultdict
+
+from django.db import models, transaction
+
+from fglsite.bets.models import Balance, BalanceEvent, Gameweek
+from fglsite.gambling.models import (
+    Accumulator,
+    BetContainer,
+    BetPart,
+    LongSpecialBet,
+)
+from fglsite.gambling.payouts import Legs, calculate_returns
+
+
+def _get_accumulators(gameweek):
+    """ Map bet container id to its (accumulator id, stake) pairs """
+    accumulators = defaultdict(list)
+    for accumulator_id, bet_container_id, stake in (
+        Accumulator.objects.filter(bet_container__gameweek=gameweek)
+        .order_by("id")
+        .values_list("id", "bet_container_id", "stake")
+    ):
+        accumulators[bet_container_id].append((accumulator_id, stake))
+    return accumulators
+
+
+def _get_prev_weeks(gameweek):
+    """ Map user id to weekly winnings from the previous gameweek """
+    if gameweek.is_first_gameweek():
+        return {}
+
+    return dict(
+        Balance.objects.filter(
+            gameweek__season_id=gameweek.season_id,
+            gameweek__number=gameweek.number - 1,
+        ).values_list("user_id", "week")
+    )
+
+
+def calculate_weekly_figures(gameweek):
+    """Work out (week_winnings, week_unused) for every user in this gameweek.
+
+    Users who had a balance last week but placed no bets this week lose the
+    full allowance and keep any rollable allowance as unused.
+
+    Returns the figures by user id and the ids of users who placed no bets.
+    """
+    allowance = gameweek.season.weekly_allowance
+    accumulators = _get_accumulators(gameweek)
+    prev_weeks = _get_prev_weeks(gameweek)
+
+    legs = Legs.from_queryset(
+        BetPart.objects.filter(accumulator__bet_container__gameweek=gameweek)
+    )
+    accumulator_ids, stakes = [], []
+    for container_accumulators in accumulators.values():
+        for accumulator_id, stake in container_accumulators:
+            accumulator_ids.append(accumulator_id)
+            stakes.append(float(stake))
+    returns = dict(
+        zip(
+            accumulator_ids,
+            calculate_returns(
+                legs, legs.outcomes(legs.get_results()), accumulator_ids, stakes
+            ).tolist(),
+        )
+    )
+
+    weekly_figures = {}
+
+    for bet_container_id, owner_id in BetContainer.objects.filter(
+        gameweek=gameweek
+    ).values_list("id", "owner_id"):
+        winnings = 0.0
+        allowance_used = 0.0
+        for accumulator_id, stake in accumulators[bet_container_id]:
+            winnings += returns[accumulator_id]
+            allowance_used += float(stake)
+
+        prev_week = prev_weeks.get(owner_id, 0.0)
+        rollable = float(prev_week) if prev_week > 0.0 else 0.0
+
+        weekly_figures[owner_id] = (
+            float("{0:.2f}".format(winnings - float(allowance))),
+            float(allowance) + rollable - allowance_used,
+        )
+
+    no_bet_user_ids = []
+    for user_id, prev_week in prev_weeks.items():
+        if user_id not in weekly_figures:
+            no_bet_user_ids.append(user_id)
+            weekly_figures[user_id] = (
+                float(allowance * -1),
+                float(prev_week) if prev_week > 0 else 0.0,
+            )
+
+    return weekly_figures, no_bet_user_ids
+
+
+def settle_gameweek(gameweek):
+    """Settle weekly balances for every user in this gameweek.
+
+    Everything is loaded up front and worked out in memory so that the number
+    of queries does not grow with the number of players.
+    """
+    weekly_figures, no_bet_user_ids = calculate_weekly_figures(gameweek)
+
+    return Balance.objects.bulk_write_weekly(
+        gameweek, weekly_figures, no_bet_user_ids=no_bet_user_ids
+    )
+
+
+def settle_long_special(gameweek, container, long_special, previous_long_special=None):
+    """Pay out every bet on a container of long specials won by long_special,
+    taking back what was paid out for previous_long_special if the result is
+    being changed.
+
+    The bets and their owners are loaded in one query and every player's
+    change in balance is written in one go.
+    """
+    # Both specials belong to the container, so share its allowance rather
+    # than loading it again for each
+    long_special.container = container
+    if previous_long_special is not None:
+        previous_long_special.container = container
+
+    changes = defaultdict(float)
+    for long_special_bet in LongSpecialBet.objects.filter(
+        long_special__container=container
+    ).select_related("bet_container"):
+        change = float(long_special_bet.project_winnings(long_special))
+        if previous_long_special is not None:
+            change -= float(long_special_bet.project_winnings(previous_long_special))
+        changes[long_special_bet.bet_container.owner_id] += change
+
+    return Balance.objects.bulk_add_longterm(
+        gameweek,
+        dict(changes),
+        kind=(
+            BalanceEvent.LONG_SPECIAL
+            if previous_long_special is None
+            else BalanceEvent.LONG_SPECIAL_CORRECTION
+        ),
+    )
+
+
+def recompute_season(season_id):
+    """Settle every gameweek of a season with results again, in order and in
+    one transaction, so that each week's banked balance carries forward any
+    correction made to the weeks before it.
+
+    Returns the number of gameweeks settled.
+    """
+    with transaction.atomic():
+        gameweeks = list(
+            Gameweek.objects.with_status()
+            .filter(
+                season_id=season_id,
+                outstanding_result_count__lt=models.F("game_count"),
+            )
+            .select_related("season")
+            .order_by("number")
+        )
+        for gameweek in gameweeks:
+            settle_gameweek(gameweek)
+
+    return len(gameweeks)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from fglsite.common.fragments import (
+    LONG_TERM_ODDS,
+    bump_fragment_version,
+    bump_fragment_version_on_commit,
+)
+from fglsite.gambling.models import (
+    LongSpecialContainer,
+    LongSpecial,
+    LongSpecialBet,
+    LongSpecialResult,
+)
+
+
+@receiver([post_save, post_delete], sender=LongSpecialContainer)
+def long_special_container_changed(sender, instance, **kwargs):
+    bump_fragment_version(LONG_TERM_ODDS, instance.id)
+
+
+@receiver([post_save, post_delete], sender=LongSpecial)
+def long_special_changed(sender, instance, **kwargs):
+    bump_fragment_version(LONG_TERM_ODDS, instance.container_id)
+
+
+@receiver(post_save, sender=LongSpecialBet)
+@receiver(post_save, sender=LongSpecialResult)
+def long_special_choice_changed(sender, instance, **kwargs):
+    bump_fragment_version(LONG_TERM_ODDS, choice_container_id(instance))
+
+
+@receiver(post_delete, sender=LongSpecialBet)
+@receiver(post_delete, sender=LongSpecialResult)
+def long_special_choice_deleted(sender, instance, **kwargs):
+    # Once per container however many choices go, including when a bet
+    # container or user is deleted
+    bump_fragment_version_on_commit(
+        LONG_TERM_ODDS, long_special_container_ids, instance.long_special_id
+    )
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, update_fields=None, **kwargs):
+    # The odds tables show who chose each long special. A new user hasn't
+    # chosen any, and logging in only saves last_login.
+    if created or (update_fields is not None and "username" not in update_fields):
+        return
+    container_ids = (
+        LongSpecial.objects.filter(longspecialbet__bet_container__owner=instance)
+        .values_list("container_id", flat=True)
+        .distinct()
+    )
+    for container_id in container_ids:
+        bump_fragment_version(LONG_TERM_ODDS, container_id)
+
+
+def long_special_container_ids(long_special_ids):
+    return LongSpecial.objects.filter(pk__in=long_special_ids).values_list(
+        "container_id", flat=True
+    )
+
+
+def choice_container_id(choice):
+    """The container id of a long special bet or result, without loading
+    its long special if not already"""
+    if type(choice).long_special.is_cached(choice):
+        return choice.long_special.container_id
+    return LongSpecial.objects.values_list("container_id", flat=True).get(
+        pk=choice.long_special_id
+    )
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals, division
+
+import datetime
+import random
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from fglsite.bets.models import Season, Gameweek, Game, Result
+from fglsite.common.fragments import (
+    GAMEWEEK_ODDS,
+    LONG_TERM_ODDS,
+    bump_fragment_version,
+)
+from fglsite.gambling.models import (
+    BetContainer,
+    Accumulator,
+    BetPart,
+    LongSpecialContainer,
+    LongSpecial,
+    LongSpecialBet,
+    LongSpecialResult,
+)
+from fglsite.gambling.settlement import settle_gameweek, settle_long_special
+
+FIRST_DEADLINE = datetime.date(2018, 8, 11)
+RESULTS = "HHHDDAAP"
+OUTCOMES = "HDA"
+
+
+def _create_users(prefix, count):
+    """ Bulk create players, returning their ids in creation order """
+    User.objects.bulk_create(
+        [
+            User(username="{0}_{1}".format(prefix, number), password="!")
+            for number in range(count)
+        ]
+    )
+    return list(
+        User.objects.filter(username__startswith=prefix + "_")
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+
+def _create_gameweeks(season, count):
+    """Bulk create gameweeks a week apart, with deadlines in the past so every
+    gameweek is open to view"""
+    Gameweek.objects.bulk_create(
+        [
+            Gameweek(
+                season=season,
+                number=number,
+                deadline_date=FIRST_DEADLINE + datetime.timedelta(weeks=number - 1),
+                spiel="Gameweek {0}".format(number),
+            )
+            for number in range(1, count + 1)
+        ]
+    )
+    # bulk_create skips Gameweek.save, so bring the season counter up to date
+    season.refresh_gameweek_counter()
+    return list(season.gameweek_set.order_by("number"))
+
+
+def _create_games(gameweek, count, rng):
+    Game.objects.bulk_create(
+        [
+            Game(
+                gameweek=gameweek,
+                hometeam="Home {0}".format(number),
+                awayteam="Away {0}".format(number),
+                homenumerator=rng.randint(1, 10),
+                homedenominator=rng.randint(1, 5),
+                drawnumerator=rng.randint(2, 4),
+                drawdenominator=1,
+                awaynumerator=rng.randint(1, 10),
+                awaydenominator=rng.randint(1, 5),
+            )
+            for number in range(count)
+        ]
+    )
+    return list(gameweek.game_set.order_by("id").values_list("id", flat=True))
+
+
+def _create_bets(gameweek, user_ids, game_ids, accumulators, legs, rng):
+    """ Bulk create a bet container per user, each holding its accumulators """
+    BetContainer.objects.bulk_create(
+        [BetContainer(gameweek=gameweek, owner_id=user_id) for user_id in user_ids]
+    )
+    bet_container_ids = list(
+        BetContainer.objects.filter(gameweek=gameweek)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+    stake_limit = max(int(gameweek.season.weekly_allowance) // max(accumulators, 1), 1)
+    Accumulator.objects.bulk_create(
+        [
+            Accumulator(
+                bet_container_id=bet_container_id, stake=rng.randint(1, stake_limit)
+            )
+            for bet_container_id in bet_container_ids
+            for _ in range(accumulators)
+        ],
+    )
+    accumulator_ids = (
+        Accumulator.objects.filter(bet_container__gameweek=gameweek)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+    leg_count = min(legs, len(game_ids))
+    BetPart.objects.bulk_create(
+        [
+            BetPart(
+                accumulator_id=accumulator_id,
+                game_id=game_id,
+                result=rng.choice(OUTCOMES),
+            )
+            for accumulator_id in accumulator_ids.iterator()
+            for game_id in rng.sample(game_ids, leg_count)
+        ],
+    )
+    return bet_container_ids
+
+
+def _create_long_specials(gameweek, containers, options, rng):
+    """ Bulk create long special containers, returning their options by container """
+    LongSpecialContainer.objects.bulk_create(
+        [
+            LongSpecialContainer(
+                created_gameweek=gameweek, description="Long special {0}".format(number)
+            )
+            for number in range(containers)
+        ]
+    )
+    container_ids = list(
+        LongSpecialContainer.objects.filter(created_gameweek=gameweek)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    LongSpecial.objects.bulk_create(
+        [
+            LongSpecial(
+                container_id=container_id,
+                description="Option {0}".format(number),
+                numerator=rng.randint(1, 50),
+                denominator=rng.randint(1, 2),
+            )
+            for container_id in container_ids
+            for number in range(options)
+        ]
+    )
+    return [
+        list(LongSpecial.objects.filter(container_id=container_id).order_by("id"))
+        for container_id in container_ids
+    ]
+
+
+def _settle_long_specials(gameweek, long_specials, rng):
+    """ Post a result for each container of long specials and pay out its bets """
+    for container_options in long_specials:
+        winner = rng.choice(container_options)
+        LongSpecialResult.objects.create(
+            long_special=winner, completed_gameweek=gameweek
+        )
+        settle_long_special(gameweek, winner.container, winner)
+
+
+def generate_league(
+    seed=0,
+    users=100,
+    gameweeks=10,
+    games=10,
+    accumulators=3,
+    legs=3,
+    long_specials=2,
+    long_special_options=10,
+    long_special_results=1,
+    prefix="synthetic",
+    log=None,
+):
+    """Generate a season of realistic data for load testing and benchmarks.
+
+    Every player bets in every gameweek and backs one option in each long
+    special. All gameweeks except the latest have results and are settled,
+    and the first long_special_results long specials are won in the last
+    settled gameweek. The same seed always produces the same league.
+
+    Players are named after prefix and seed, so raises ValueError if a
+    league with the same prefix and seed already exists.
+    """
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    prefix = "{0}{1}".format(prefix, seed)
+    if User.objects.filter(username__startswith=prefix + "_").exists():
+        raise ValueError(
+            "Players named {0}_* already exist, use another prefix or seed".format(
+                prefix
+            )
+        )
+
+    with transaction.atomic():
+        user_ids = _create_users(prefix, users)
+        commissioner = User.objects.get(pk=user_ids[0])
+        season = Season.objects.create(
+            name="Synthetic league {0}".format(seed), commissioner=commissioner
+        )
+        log("Created {0} users".format(len(user_ids)))
+
+        gameweek_list = _create_gameweeks(season, gameweeks)
+        long_special_choices = (
+            _create_long_specials(
+                gameweek_list[0], long_specials, long_special_options, rng
+            )
+            if gameweek_list
+            else []
+        )
+
+        for gameweek in gameweek_list:
+            game_ids = _create_games(gameweek, games, rng)
+            bet_container_ids = _create_bets(
+                gameweek, user_ids, game_ids, accumulators, legs, rng
+            )
+
+            if gameweek.number == 1:
+                LongSpecialBet.objects.bulk_create(
+                    [
+                        LongSpecialBet(
+                            bet_container_id=bet_container_id,
+                            long_special=rng.choice(container_options),
+                        )
+                        for container_options in long_special_choices
+                        for bet_container_id in bet_container_ids
+                    ],
+                )
+
+            if gameweek.number == gameweeks:
+                log("Left gameweek {0} open".format(gameweek.number))
+                break
+
+            Result.objects.bulk_create(
+                [
+                    Result(game_id=game_id, result=rng.choice(RESULTS))
+                    for game_id in game_ids
+                ]
+            )
+            if gameweek.number == gameweeks - 1 and long_special_results:
+                _settle_long_specials(
+                    gameweek, long_special_choices[:long_special_results], rng
+                )
+            settle_gameweek(gameweek)
+            log("Settled gameweek {0}".format(gameweek.number))
+
+        # bulk_create skips the signals that invalidate cached odds tables
+        for gameweek in gameweek_list:
+            bump_fragment_version(GAMEWEEK_ODDS, gameweek.id)
+        for container_id in LongSpecialContainer.objects.filter(
+            created_gameweek__season=season
+        ).values_list("id", flat=True):
+            bump_fragment_version(LONG_TERM_ODDS, container_id)
+
+    return season
@@ -1,12 +1,26 @@
 from django import template
 
+from fglsite.common.fragments import LONG_TERM_ODDS, render_cached_fragment
+
 register = template.Library()
 
 
-@register.inclusion_tag("gambling/long_term_odds.html")
+@register.simple_tag
 def long_term_odds(container, gameweek, show_management_links):
-    return {
-        "container": container,
-        "gameweek": gameweek,
-        "show_management_links": show_management_links,
-    }
+    created_gameweek = container.created_gameweek
+    return render_cached_fragment(
+        "gambling/long_term_odds.html",
+        {
+            "container": container,
+            "specials": container.longspecial_set.with_entrants().order_by("id"),
+            "gameweek": gameweek,
+            "show_management_links": show_management_links,
+        },
+        LONG_TERM_ODDS,
+        container.id,
+        gameweek.id,
+        show_management_links,
+        gameweek.deadline_passed(),
+        created_gameweek.deadline_passed(),
+        created_gameweek.is_latest_gameweek(),
+    )
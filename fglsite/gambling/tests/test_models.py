@@ -1,7 +1,16 @@
 from django.test import TestCase
+from django.db import connection
 
 from fglsite.bets.models import Season, Gameweek, Game, Result
-from fglsite.gambling.models import BetContainer, Accumulator, BetPart
+from fglsite.gambling.models import (
+    BetContainer,
+    Accumulator,
+    BetPart,
+    LongSpecialContainer,
+    LongSpecial,
+    LongSpecialResult,
+    LongSpecialBet,
+)
 from django.contrib.auth.models import User
 from datetime import date, time
 from uuid import uuid4
@@ -163,3 +172,131 @@ class AccumulatorTest(TestCase):
         Result.objects.create(game=self.game_three, result="A")
 
         self.assertEquals(3000.0, accumulator.calculate_winnings())
+
+    def test_calc_winnings_unresulted_game_loses(self):
+        user = User.objects.create_user("user")
+        bet_container = BetContainer.objects.create(gameweek=self.gameweek, owner=user)
+        accumulator = Accumulator.objects.create(
+            bet_container=bet_container, stake=100.0
+        )
+        BetPart.objects.create(accumulator=accumulator, game=self.game_one, result="H")
+        BetPart.objects.create(accumulator=accumulator, game=self.game_two, result="D")
+        Result.objects.create(game=self.game_one, result="H")
+
+        self.assertEquals(0.0, accumulator.calculate_winnings())
+
+
+class BetPartTest(TestCase):
+    def setUp(self):
+        gameweek = _create_test_gameweek(_create_test_season())
+        self.game = _create_test_game(gameweek)
+        accumulator = Accumulator.objects.create(
+            bet_container=BetContainer.objects.create(
+                gameweek=gameweek, owner=User.objects.create_user("user")
+            ),
+            stake=100.0,
+        )
+        self.betpart = BetPart.objects.create(
+            accumulator=accumulator, game=self.game, result="H"
+        )
+
+    def test_unresulted(self):
+        self.assertFalse(self.betpart.is_correct())
+        self.assertFalse(self.betpart.is_void())
+
+    def test_correct(self):
+        Result.objects.create(game=self.game, result="H")
+
+        with self.assertNumQueries(2):
+            self.assertTrue(self.betpart.is_correct())
+        self.assertFalse(self.betpart.is_void())
+
+    def test_void(self):
+        Result.objects.create(game=self.game, result="P")
+
+        self.assertFalse(self.betpart.is_correct())
+        self.assertTrue(self.betpart.is_void())
+
+    def test_get_odds(self):
+        self.assertEqual(
+            self.betpart.get_odds(),
+            self.game.homenumerator / self.game.homedenominator,
+        )
+
+
+class LongSpecialContainerTest(TestCase):
+    def _create_container(self, gameweek, options=2):
+        container = LongSpecialContainer.objects.create(
+            description=str(uuid4()), created_gameweek=gameweek
+        )
+        for number in range(options):
+            LongSpecial.objects.create(
+                container=container, description=str(number), numerator=1
+            )
+        return container
+
+    def test_long_specials_outstanding(self):
+        season = _create_test_season()
+        gameweeks = [_create_test_gameweek(season) for _ in range(5)]
+        containers = [self._create_container(gameweek) for gameweek in gameweeks]
+        for long_special in containers[1].longspecial_set.all():
+            LongSpecialResult.objects.create(
+                long_special=long_special, completed_gameweek=gameweeks[4]
+            )
+        LongSpecialResult.objects.create(
+            long_special=containers[2].longspecial_set.first(),
+            completed_gameweek=gameweeks[4],
+        )
+
+        with self.assertNumQueries(1):
+            outstanding = season.long_specials_outstanding()
+
+        self.assertEqual(
+            [containers[0], containers[2], containers[3], containers[4]], outstanding
+        )
+        self.assertEqual([containers[3]], gameweeks[3].long_specials_outstanding())
+        self.assertTrue(containers[1].is_complete())
+        self.assertFalse(containers[2].is_complete())
+        self.assertFalse(outstanding[0].is_complete())
+
+
+class LongSpecialTest(TestCase):
+    def test_with_entrants(self):
+        season = _create_test_season()
+        gameweek = _create_test_gameweek(season)
+        container = LongSpecialContainer.objects.create(
+            description="container", created_gameweek=gameweek
+        )
+        chosen = LongSpecial.objects.create(container=container, description="one")
+        ignored = LongSpecial.objects.create(container=container, description="two")
+        # Bet in reverse order, so the names are only sorted if chosen_by sorts
+        for username in ("user_two", "user_one"):
+            LongSpecialBet.objects.create(
+                bet_container=BetContainer.objects.create(
+                    owner=User.objects.create_user(username), gameweek=gameweek
+                ),
+                long_special=chosen,
+            )
+
+        with self.assertNumQueries(1):
+            specials = list(container.longspecial_set.with_entrants().order_by("id"))
+            chosen_by = [special.chosen_by() for special in specials]
+
+        self.assertEqual([2, 0], [special.entrant_count for special in specials])
+        self.assertEqual("user_one, user_two", chosen_by[0])
+        self.assertEqual("", chosen_by[1])
+        self.assertEqual(chosen_by[0], chosen.chosen_by())
+        self.assertEqual("", ignored.chosen_by())
+
+    def test_group_concat_sql_per_backend(self):
+        queryset = LongSpecial.objects.with_entrants()
+        compiler = queryset.query.get_compiler(connection=connection)
+        group_concat = queryset.query.annotations["entrant_names"].source_expressions[0]
+
+        mysql_sql, _ = group_concat.as_mysql(compiler, connection)
+        postgresql_sql, _ = group_concat.as_postgresql(compiler, connection)
+
+        self.assertTrue(mysql_sql.startswith("GROUP_CONCAT("))
+        self.assertTrue(mysql_sql.endswith(" SEPARATOR ', ')"))
+        self.assertTrue(postgresql_sql.startswith("STRING_AGG("))
+        self.assertTrue(postgresql_sql.endswith(", ', ')"))
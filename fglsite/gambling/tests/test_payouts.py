@@ -0,0 +1,119 @@
+from django.test import SimpleTestCase
+
+import random
+import time
+
+import numpy as np
+
+from fglsite.gambling.payouts import Legs, calculate_returns
+
+
+def _reference_returns(accumulators, legs, results):
+    """ Leg by leg calculation matching the original Accumulator.calculate_winnings """
+    returns = []
+    for accumulator_id, stake in accumulators:
+        odds = 1.0
+        for leg_accumulator_id, game_id, picked, numerator, denominator in legs:
+            if leg_accumulator_id != accumulator_id or results[game_id] == "P":
+                continue
+            if results[game_id] == picked:
+                odds = odds * (1 + numerator / denominator)
+            else:
+                odds = 0.0
+                break
+        returns.append(odds * stake)
+    return returns
+
+
+def _build_random_gameweek(accumulator_count, rng):
+    results = {game_id: rng.choice("HHDAP") for game_id in range(10)}
+    accumulators = [
+        (accumulator_id, round(rng.uniform(1, 100), 2))
+        for accumulator_id in range(accumulator_count)
+    ]
+    legs = [
+        (
+            accumulator_id,
+            game_id,
+            rng.choice("HDA"),
+            rng.randint(1, 40),
+            rng.randint(1, 12),
+        )
+        for accumulator_id, _ in accumulators
+        for game_id in rng.sample(range(10), rng.randint(1, 4))
+    ]
+    return accumulators, legs, results
+
+
+def _to_arrays(accumulators, legs, results):
+    leg_arrays = Legs(*zip(*legs))
+    return (
+        leg_arrays,
+        leg_arrays.outcomes(results),
+        [accumulator_id for accumulator_id, _ in accumulators],
+        [stake for _, stake in accumulators],
+    )
+
+
+class CalculateReturnsTest(SimpleTestCase):
+    def test_matches_leg_by_leg_calculation_to_the_penny(self):
+        accumulators, legs, results = _build_random_gameweek(500, random.Random(1))
+
+        returns = calculate_returns(*_to_arrays(accumulators, legs, results))
+
+        expected = _reference_returns(accumulators, legs, results)
+        self.assertEqual(
+            ["%.2f" % value for value in returns],
+            ["%.2f" % value for value in expected],
+        )
+
+    def test_void_and_losing_legs(self):
+        legs = Legs(
+            accumulator_ids=[3, 3, 7, 7, 9],
+            game_ids=[1, 2, 1, 2, 2],
+            picked=["H", "A", "H", "D", "D"],
+            numerators=[1, 5, 1, 3, 3],
+            denominators=[2, 1, 2, 1, 1],
+        )
+        outcomes = legs.outcomes({1: "P", 2: "A"})
+
+        returns = calculate_returns(
+            legs, outcomes, [9, 7, 3, 11], [1.0, 1.0, 10.0, 5.0]
+        )
+
+        np.testing.assert_array_equal(returns, [0.0, 0.0, 60.0, 5.0])
+
+    def test_unresulted_leg_loses(self):
+        legs = Legs([1], [1], ["H"], [1], [1])
+
+        returns = calculate_returns(legs, legs.outcomes({}), [1], [10.0])
+
+        np.testing.assert_array_equal(returns, [0.0])
+
+    def test_leg_for_unknown_accumulator(self):
+        legs = Legs([3, 5, 12], [1, 1, 1], ["H", "H", "H"], [1, 1, 1], [1, 1, 1])
+
+        with self.assertRaises(ValueError) as context:
+            calculate_returns(legs, legs.outcomes({}), [3, 7], [1.0, 1.0])
+
+        assert "[5, 12]" in str(context.exception)
+
+    def test_large_gameweek_settles_quickly(self):
+        rng = np.random.RandomState(0)
+        leg_count = 300000
+        legs = Legs(
+            accumulator_ids=rng.randint(0, 100000, leg_count),
+            game_ids=rng.randint(0, 10, leg_count),
+            picked=rng.choice(["H", "D", "A"], leg_count),
+            numerators=rng.randint(1, 40, leg_count),
+            denominators=rng.randint(1, 12, leg_count),
+        )
+        outcomes = rng.choice(["H", "D", "A", "P"], 10)[legs.game_ids]
+
+        start = time.time()
+        returns = calculate_returns(
+            legs, outcomes, np.arange(100000), np.full(100000, 10.0)
+        )
+
+        self.assertLess(time.time() - start, 1.0)
+        self.assertEqual(len(returns), 100000)
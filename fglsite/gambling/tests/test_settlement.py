@@ -0,0 +1,195 @@
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from decimal import Decimal
+from io import StringIO
+from uuid import uuid4
+
+from fglsite.bets.models import (
+    Season,
+    Gameweek,
+    Game,
+    Result,
+    Balance,
+    BalanceEvent,
+    BalanceSnapshot,
+)
+from fglsite.gambling.models import BetContainer, Accumulator, BetPart
+from fglsite.gambling.settlement import recompute_season, settle_gameweek
+
+
+def _create_test_game(gameweek):
+    return Game.objects.create(
+        gameweek=gameweek,
+        hometeam=str(uuid4()),
+        awayteam=str(uuid4()),
+        homenumerator=1,
+        homedenominator=2,
+        drawnumerator=3,
+        drawdenominator=4,
+        awaynumerator=5,
+        awaydenominator=6,
+    )
+
+
+class SettleGameweekTest(TestCase):
+    def setUp(self):
+        commissioner = User.objects.create_user("comm")
+        self.season = Season.objects.create(
+            name="test", commissioner=commissioner, weekly_allowance=100.0
+        )
+        self.gameweek_one = Gameweek.objects.create(
+            season=self.season, number=1, spiel=""
+        )
+        self.gameweek_two = Gameweek.objects.create(
+            season=self.season, number=2, spiel=""
+        )
+        self.game_one = _create_test_game(self.gameweek_two)
+        self.game_two = _create_test_game(self.gameweek_two)
+        Result.objects.create(game=self.game_one, result="H")
+        Result.objects.create(game=self.game_two, result="P")
+
+    def _create_user_with_bets(self):
+        user = User.objects.create_user(str(uuid4()))
+        Balance.objects.create(
+            gameweek=self.gameweek_one,
+            user=user,
+            week=20.0,
+            provisional=20.0,
+            banked=0.0,
+        )
+        bet_container = BetContainer.objects.create(
+            owner=user, gameweek=self.gameweek_two
+        )
+        accumulator = Accumulator.objects.create(
+            bet_container=bet_container, stake=60.0
+        )
+        BetPart.objects.create(accumulator=accumulator, game=self.game_one, result="H")
+        BetPart.objects.create(accumulator=accumulator, game=self.game_two, result="A")
+        accumulator = Accumulator.objects.create(
+            bet_container=bet_container, stake=40.0
+        )
+        BetPart.objects.create(accumulator=accumulator, game=self.game_one, result="D")
+        return user
+
+    def test_settle_gameweek_matches_model_calculations(self):
+        user = self._create_user_with_bets()
+        bet_container = BetContainer.objects.get(owner=user)
+
+        settle_gameweek(self.gameweek_two)
+
+        balance = Balance.objects.get(gameweek=self.gameweek_two, user=user)
+        self.assertEqual(
+            balance.week, Decimal("%.2f" % bet_container.calculate_winnings())
+        )
+        self.assertEqual(balance.week, Decimal("-10.00"))
+        self.assertEqual(balance.banked, Decimal("10.00"))
+        self.assertEqual(balance.provisional, Decimal("10.00"))
+
+    def test_settle_gameweek_penalises_users_without_bets(self):
+        user = User.objects.create_user("no_bets")
+        Balance.objects.create(
+            gameweek=self.gameweek_one,
+            user=user,
+            week=30.0,
+            provisional=130.0,
+            banked=100.0,
+        )
+
+        settle_gameweek(self.gameweek_two)
+
+        balance = Balance.objects.get(gameweek=self.gameweek_two, user=user)
+        self.assertEqual(balance.week, Decimal("-100.00"))
+        self.assertEqual(balance.banked, Decimal("30.00"))
+        self.assertEqual(balance.provisional, Decimal("30.00"))
+        self.assertEqual(
+            BalanceEvent.objects.get(gameweek=self.gameweek_two, user=user).kind,
+            BalanceEvent.NO_BETS,
+        )
+
+    def test_settle_gameweek_keeps_existing_special(self):
+        user = self._create_user_with_bets()
+        Balance.objects.create(
+            gameweek=self.gameweek_two,
+            user=user,
+            week=0.0,
+            provisional=50.0,
+            special=50.0,
+            banked=50.0,
+        )
+
+        settle_gameweek(self.gameweek_two)
+
+        balance = Balance.objects.get(gameweek=self.gameweek_two, user=user)
+        self.assertEqual(balance.special, Decimal("50.00"))
+        self.assertEqual(balance.banked, Decimal("60.00"))
+
+    def test_settle_gameweek_query_count_independent_of_players(self):
+        self._create_user_with_bets()
+        with CaptureQueriesContext(connection) as few_players:
+            settle_gameweek(self.gameweek_two)
+
+        for _ in range(10):
+            self._create_user_with_bets()
+        # Settle as if for the first time again, which always takes a snapshot
+        BalanceSnapshot.objects.all().delete()
+        with CaptureQueriesContext(connection) as many_players:
+            settle_gameweek(self.gameweek_two)
+
+        self.assertEqual(len(few_players), len(many_players))
+        self.assertEqual(Balance.objects.filter(gameweek=self.gameweek_two).count(), 11)
+
+
+class RecomputeSeasonTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("player")
+        self.season = Season.objects.create(
+            name="test", commissioner=self.user, weekly_allowance=100.0
+        )
+        self.games = []
+        for _ in range(3):
+            gameweek = self.season.create_gameweek(spiel="")
+            game = _create_test_game(gameweek)
+            bet_container = BetContainer.objects.create(
+                owner=self.user, gameweek=gameweek
+            )
+            accumulator = Accumulator.objects.create(
+                bet_container=bet_container, stake=100.0
+            )
+            BetPart.objects.create(accumulator=accumulator, game=game, result="H")
+            self.games.append(game)
+
+        # The last gameweek has no results yet
+        for game in self.games[:2]:
+            Result.objects.create(game=game, result="H")
+            settle_gameweek(game.gameweek)
+
+    def _banked(self):
+        return list(
+            Balance.objects.filter(user=self.user)
+            .order_by("gameweek__number")
+            .values_list("banked", flat=True)
+        )
+
+    def test_recompute_carries_corrected_result_forward(self):
+        self.assertEqual(self._banked(), [Decimal("0.00"), Decimal("50.00")])
+
+        Result.objects.filter(game=self.games[0]).update(result="A")
+        self.assertEqual(recompute_season(self.season.id), 2)
+
+        self.assertEqual(self._banked(), [Decimal("-100.00"), Decimal("-100.00")])
+
+    def test_recompute_balances_command(self):
+        Result.objects.filter(game=self.games[0]).update(result="A")
+        out = StringIO()
+
+        call_command("recompute_balances", season_ids=[self.season.id], stdout=out)
+
+        self.assertIn("settled 2 gameweeks", out.getvalue())
+        self.assertEqual(self._banked()[1], Decimal("-100.00"))
+
+    def test_recompute_balances_command_unknown_season(self):
+        with self.assertRaises(CommandError):
+            call_command("recompute_balances", season_ids=[0], stdout=StringIO())
@@ -0,0 +1,93 @@
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from io import StringIO
+
+from fglsite.bets.models import Balance, Game, Result, Standing
+from fglsite.gambling.models import (
+    BetContainer,
+    BetPart,
+    LongSpecialBet,
+    LongSpecialResult,
+)
+from fglsite.gambling.synthetic import generate_league
+
+
+def _league_fingerprint(season):
+    return (
+        list(
+            Game.objects.filter(gameweek__season=season)
+            .order_by("gameweek__number", "id")
+            .values_list("homenumerator", "homedenominator", "awaynumerator")
+        ),
+        list(
+            Result.objects.filter(game__gameweek__season=season)
+            .order_by("game__gameweek__number", "game_id")
+            .values_list("result", flat=True)
+        ),
+        list(
+            Balance.objects.filter(gameweek__season=season)
+            .order_by("gameweek__number", "user__username")
+            .values_list("user__username", "provisional")
+        ),
+    )
+
+
+class GenerateLeagueTest(TestCase):
+    def test_generates_league_at_requested_scale(self):
+        season = generate_league(
+            users=6,
+            gameweeks=3,
+            games=5,
+            accumulators=2,
+            legs=3,
+            long_specials=2,
+            long_special_options=4,
+            long_special_results=1,
+        )
+
+        self.assertEqual(season.gameweek_count, 3)
+        self.assertEqual(season.latest_gameweek.number, 3)
+        self.assertEqual(Game.objects.filter(gameweek__season=season).count(), 15)
+        self.assertEqual(BetContainer.objects.count(), 18)
+        self.assertEqual(BetPart.objects.count(), 18 * 2 * 3)
+        self.assertEqual(LongSpecialBet.objects.count(), 12)
+        self.assertEqual(LongSpecialResult.objects.count(), 1)
+        # Only the latest gameweek is left open
+        self.assertEqual(Result.objects.count(), 10)
+        self.assertEqual(Balance.objects.count(), 12)
+        self.assertEqual(Standing.objects.filter(gameweek__number=2).count(), 6)
+        self.assertTrue(
+            Balance.objects.filter(gameweek__number=2).exclude(special=0).exists()
+        )
+
+    def test_same_seed_generates_same_league(self):
+        first = generate_league(seed=4, users=4, gameweeks=2, prefix="first")
+        second = generate_league(seed=4, users=4, gameweeks=2, prefix="second")
+        other = generate_league(seed=5, users=4, gameweeks=2, prefix="other")
+
+        self.assertEqual(
+            _league_fingerprint(first)[:2], _league_fingerprint(second)[:2]
+        )
+        self.assertEqual(
+            [provisional for _, provisional in _league_fingerprint(first)[2]],
+            [provisional for _, provisional in _league_fingerprint(second)[2]],
+        )
+        self.assertNotEqual(
+            _league_fingerprint(first)[:2], _league_fingerprint(other)[:2]
+        )
+
+    def test_command(self):
+        out = StringIO()
+
+        call_command("generate_league", users=3, gameweeks=2, stdout=out)
+
+        self.assertIn("Created season", out.getvalue())
+        self.assertEqual(BetContainer.objects.count(), 6)
+
+    def test_existing_league_not_overwritten(self):
+        generate_league(users=2, gameweeks=1)
+
+        with self.assertRaises(ValueError):
+            generate_league(users=2, gameweeks=1)
+        with self.assertRaises(CommandError):
+            call_command("generate_league", users=2, gameweeks=1, stdout=StringIO())
@@ -8,6 +8,7 @@ from fglsite.bets.models import (
     Season,
     Gameweek,
     Balance,
+    BalanceEvent,
 )
 from fglsite.gambling.models import (
     LongSpecialContainer,
@@ -17,6 +18,8 @@ from fglsite.gambling.models import (
     LongSpecialBet,
 )
 from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 
@@ -249,3 +252,58 @@ class LongSpecialResultViewBalanceTest(LongSpecialResultTestMixin, TestCase):
         self.assertEqual(balance.provisional, Decimal("356.00"))
         self.assertEqual(balance.special, Decimal("-70.00"))
         self.assertEqual(balance.banked, Decimal("689.00"))
+
+    def test_changed_result_recorded_as_correction(self):
+        self.client.force_login(self.commissioner)
+        self.client.post(
+            self.url,
+            data={
+                "long_special": self.choice_two.id,
+                "completed_gameweek": self.gameweek.id,
+            },
+        )
+        self.client.post(
+            self.url,
+            data={
+                "long_special": self.choice_one.id,
+                "completed_gameweek": self.gameweek.id,
+            },
+        )
+
+        self.assertEqual(
+            [
+                (BalanceEvent.LONG_SPECIAL, Decimal("-100.00")),
+                (BalanceEvent.LONG_SPECIAL_CORRECTION, Decimal("190.91")),
+            ],
+            list(BalanceEvent.objects.order_by("id").values_list("kind", "special")),
+        )
+        self.assertEqual(Decimal("90.91"), Balance.objects.get().special)
+
+    def test_query_count_independent_of_entrants(self):
+        form_data = {
+            "long_special": self.choice_one.id,
+            "completed_gameweek": self.gameweek.id,
+        }
+        self.client.force_login(self.commissioner)
+
+        def post_with_entrants(count):
+            for number in range(count):
+                user = User.objects.create_user("entrant_{0}_{1}".format(count, number))
+                LongSpecialBet.objects.create(
+                    bet_container=BetContainer.objects.create(
+                        owner=user, gameweek=self.gameweek
+                    ),
+                    long_special=self.choice_two,
+                )
+            # Pay out afresh each time rather than correcting the last payout
+            LongSpecialResult.objects.all().delete()
+            Balance.objects.all().delete()
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(self.url, data=form_data)
+            return len(queries)
+
+        self.assertEqual(post_with_entrants(1), post_with_entrants(20))
+        self.assertEqual(
+            Decimal("-100.00"),
+            Balance.objects.get(user__username="entrant_20_0").special,
+        )
@@ -17,8 +17,9 @@ from django.views.generic import (
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse_lazy
 from fglsite.bets.forms import BaseResultFormSet
-from fglsite.bets.models import Gameweek, Balance
+from fglsite.bets.models import Gameweek
 from fglsite.bets.views import SeasonCommissionerAllowedMixin
+from fglsite.common.fragments import LONG_TERM_ODDS, bump_fragment_version
 from .models import (
     BetContainer,
     Accumulator,
@@ -38,6 +39,7 @@ from .forms import (
     LongSpecialBetForm,
     LongSpecialResultForm,
 )
+from .settlement import settle_long_special
 
 
 class BetContainerCreateView(LoginRequiredMixin, CreateView):
@@ -239,6 +241,9 @@ class LongSpecialManagementView(
     model = Gameweek
     template_name = "gambling/manage_longterms.html"
 
+    def get_queryset(self):
+        return Gameweek.objects.with_status()
+
     def get_season(self, *args, **kwargs):
         return self.gameweek.season
 
@@ -246,6 +251,17 @@ class LongSpecialManagementView(
         self.gameweek = get_object_or_404(Gameweek, pk=pk)
         return super().dispatch(request, pk, *args, **kwargs)
 
+    def get_context_data(self, **kwargs):
+        context_data = super().get_context_data(**kwargs)
+        context_data.update(
+            {
+                "long_specials_outstanding": (
+                    self.object.season.long_specials_outstanding()
+                )
+            }
+        )
+        return context_data
+
 
 class LongSpecialContainerView(SeasonCommissionerAllowedMixin, LoginRequiredMixin):
     model = LongSpecialContainer
@@ -309,6 +325,7 @@ class LongSpecialContainerView(SeasonCommissionerAllowedMixin, LoginRequiredMixi
             with transaction.atomic():
                 self.clear_existing_long_specials(container)
                 LongSpecial.objects.bulk_create(new_long_specials)
+                bump_fragment_version(LONG_TERM_ODDS, container.id)
                 messages.success(self.request, self.success_message)
         except Exception as err:
             messages.error(self.request, "Error saving new long special.")
@@ -467,30 +484,22 @@ class LongSpecialResultFormView(
         return context_data
 
     def form_valid(self, form):
-        existing_result = LongSpecialResult.objects.filter(
-            long_special__container=self.long_special_container,
-            completed_gameweek=self.gameweek,
-        ).first()
-
-        long_special_bets = LongSpecialBet.objects.filter(
-            long_special__container=self.long_special_container
+        existing_result = (
+            LongSpecialResult.objects.filter(
+                long_special__container=self.long_special_container,
+                completed_gameweek=self.gameweek,
+            )
+            .select_related("long_special")
+            .first()
         )
 
         with transaction.atomic():
-            for long_special_bet in long_special_bets:
-                change_in_balance = float(
-                    long_special_bet.project_winnings(form.cleaned_data["long_special"])
-                )
-                if existing_result:
-                    change_in_balance -= float(
-                        long_special_bet.project_winnings(existing_result.long_special)
-                    )
-
-                Balance.objects.create_with_longterm(
-                    self.gameweek,
-                    long_special_bet.bet_container.owner,
-                    change_in_balance,
-                )
+            settle_long_special(
+                self.gameweek,
+                self.long_special_container,
+                form.cleaned_data["long_special"],
+                existing_result.long_special if existing_result else None,
+            )
 
             if existing_result:
                 existing_result.delete()
@@ -1,21 +1,38 @@
+from collections import namedtuple
 from json import loads
 import os
+import time
 
 from django.conf import settings
 
 
-OUTPUT_DIR = os.path.dirname(settings.ODDS_OUTPUT_DIR)
+# Odds fetched longer ago than this, in seconds, are flagged as stale
+STALE_AFTER = 24 * 60 * 60
 
+OddsFile = namedtuple("OddsFile", ["odds", "modified", "stale"])
 
-def _read_from_disk():
-    with open(os.path.join(OUTPUT_DIR, "output.json"), "r") as file:
-        return file.read()
+# Parsed odds by path, along with the mtime and size they were parsed at
+_cache = {}
 
 
-def read_odds():
-    odds_json = loads(_read_from_disk())
+class OddsReadError(Exception):
+    def __init__(self, path, reason):
+        super().__init__("Couldn't read odds from {0}: {1}".format(path, reason))
+        self.path = path
+        self.reason = reason
+
+
+def _output_file():
+    return os.path.join(os.path.dirname(settings.ODDS_OUTPUT_DIR), "output.json")
+
+
+def _read_from_disk(path):
+    with open(path, "r") as file:
+        return file.read()
+
 
-    odds = [
+def _parse(odds_json):
+    return [
         {
             "hometeam": game["home_team"],
             "awayteam": game["away_team"],
@@ -27,7 +44,42 @@ def read_odds():
             "awaydenominator": game["away_denominator"],
             "meta": {"start_time": game["start_time"]},
         }
-        for game in odds_json
+        for game in loads(odds_json)
     ]
 
-    return odds
+
+def read_odds_file():
+    """Read the odds the fetcher last wrote, along with when it wrote them
+    and whether that was too long ago to trust.
+
+    The parsed odds are kept for the life of the process and only parsed
+    again once the file's mtime or size changes. Raises OddsReadError if the
+    file is missing or isn't valid odds.
+    """
+    path = _output_file()
+    try:
+        stat = os.stat(path)
+    except OSError as error:
+        raise OddsReadError(path, error.strerror or str(error))
+
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _cache.get(path)
+    if cached is None or cached[0] != key:
+        try:
+            odds = _parse(_read_from_disk(path))
+        except OSError as error:
+            raise OddsReadError(path, error.strerror or str(error))
+        except (ValueError, TypeError, KeyError) as error:
+            raise OddsReadError(path, "invalid odds ({0!r})".format(error))
+        cached = _cache[path] = (key, odds)
+
+    return OddsFile(
+        # Copies, so callers can't change the cached odds
+        odds=[dict(game, meta=dict(game["meta"])) for game in cached[1]],
+        modified=stat.st_mtime,
+        stale=time.time() - stat.st_mtime > STALE_AFTER,
+    )
+
+
+def read_odds():
+    return read_odds_file().odds
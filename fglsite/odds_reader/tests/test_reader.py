@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import time
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from fglsite.odds_reader import reader
+from fglsite.odds_reader.reader import OddsReadError, read_odds, read_odds_file
+
+
+def _game(home_team):
+    return {
+        "home_team": home_team,
+        "away_team": "Chelsea",
+        "home_numerator": 3,
+        "home_denominator": 1,
+        "draw_numerator": 5,
+        "draw_denominator": 2,
+        "away_numerator": 4,
+        "away_denominator": 5,
+        "start_time": 1604147400,
+    }
+
+
+class ReadOddsTest(SimpleTestCase):
+    def setUp(self):
+        output_dir = TemporaryDirectory()
+        self.addCleanup(output_dir.cleanup)
+        self.output_file = os.path.join(output_dir.name, "output.json")
+        odds_settings = override_settings(ODDS_OUTPUT_DIR=output_dir.name + "/")
+        odds_settings.enable()
+        self.addCleanup(odds_settings.disable)
+
+    def _write_output(self, content, modified=None):
+        with open(self.output_file, "w") as file:
+            file.write(content)
+        modified = time.time() if modified is None else modified
+        os.utime(self.output_file, (modified, modified))
+
+    def test_parsed_once_until_file_changes(self):
+        self._write_output(json.dumps([_game("Burnley")]), modified=1000)
+
+        with patch.object(
+            reader, "_read_from_disk", wraps=reader._read_from_disk
+        ) as read_from_disk:
+            assert read_odds()[0]["hometeam"] == "Burnley"
+            assert read_odds()[0]["hometeam"] == "Burnley"
+            assert read_from_disk.call_count == 1
+
+            self._write_output(json.dumps([_game("Everton")]), modified=2000)
+            assert read_odds()[0]["hometeam"] == "Everton"
+            assert read_from_disk.call_count == 2
+
+    def test_cached_odds_not_changed_by_callers(self):
+        self._write_output(json.dumps([_game("Burnley")]))
+
+        read_odds()[0].pop("meta")
+
+        assert read_odds()[0]["meta"] == {"start_time": 1604147400}
+
+    def test_missing_file(self):
+        with self.assertRaises(OddsReadError) as context:
+            read_odds()
+
+        assert context.exception.path == self.output_file
+
+    def test_invalid_file(self):
+        self._write_output('[{"home_team": "Burnley"}]')
+
+        with self.assertRaises(OddsReadError) as context:
+            read_odds()
+
+        assert "invalid odds" in context.exception.reason
+
+    def test_stale(self):
+        self._write_output("[]")
+        assert not read_odds_file().stale
+
+        self._write_output("[]", modified=time.time() - reader.STALE_AFTER - 60)
+        odds_file = read_odds_file()
+        assert odds_file.stale
+        assert odds_file.odds == []
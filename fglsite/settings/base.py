@@ -28,8 +28,8 @@ ODDS_OUTPUT_DIR = os.environ["ODDS_OUTPUT_DIR"]
 
 INSTALLED_APPS = [
     "fglsite.common",
-    "fglsite.bets",
-    "fglsite.gambling",
+    "fglsite.bets.apps.BetsConfig",
+    "fglsite.gambling.apps.GamblingConfig",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -39,6 +39,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "fglsite.common.middleware.RequestProfilingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -50,9 +51,15 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "fglsite.urls"
 
+# Request profiling, see fglsite.common.middleware. A sample rate of 0 turns
+# the middleware off entirely. The panel is only added to sampled requests,
+# so it needs a sample rate above 0 too (1.0 to see it on every page).
+REQUEST_PROFILING_SAMPLE_RATE = 0.0
+REQUEST_PROFILING_PANEL = False
+
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "fglsite.common.template_backends.ProfilingDjangoTemplates",
         "DIRS": [
             os.path.join(PROJECT_DIR, "templates"),
         ],
@@ -85,6 +92,15 @@ DATABASES = {
     }
 }
 
+# Rendered odds tables are cached against a version number bumped whenever
+# their games, results or long specials change (see fglsite.common.fragments)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/1.11/topics/i18n/
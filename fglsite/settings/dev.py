@@ -12,6 +12,10 @@ ALLOWED_HOSTS = [
 SECRET_KEY = "s$pnz4r%$4v@%h9@!hbky$h^zwed7z(3ar&0r@o15ia-+y812x"
 
 
+# Only shown once REQUEST_PROFILING_SAMPLE_RATE is above 0, e.g. set it to
+# 1.0 in local.py to profile every page
+REQUEST_PROFILING_PANEL = True
+
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 EMAIL_HOST = "smtp.gmail.com"
 # EMAIL_HOST_USER = os.environ['EMAIL_HOST_USER']
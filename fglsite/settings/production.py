@@ -10,6 +10,19 @@ ALLOWED_HOSTS = [
 SECRET_KEY = os.environ["SECRET_KEY"]
 STATIC_ROOT = "/home/olliefgl/fglsite/static/"
 
+# Shared between worker processes so a version bump in one invalidates the
+# cached fragments of all of them
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": "/home/olliefgl/fglsite/cache/",
+    }
+}
+
+REQUEST_PROFILING_SAMPLE_RATE = float(
+    os.environ.get("REQUEST_PROFILING_SAMPLE_RATE", 0.0)
+)
+
 EMAIL_HOST = "smtp.gmail.com"
 # EMAIL_HOST_USER = os.environ['EMAIL_HOST_USER']
 # EMAIL_HOST_PASSWORD = os.environ['EMAIL_HOST_PASSWORD']
@@ -1,12 +1,29 @@
+import asyncio
+import logging
 import os
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List
 
 import requests
 
 
+logger = logging.getLogger(__name__)
+
 SPORT_KEY = "soccer_epl"
 API_KEY = os.environ["ODDS_API_KEY"]
-BETS_URL = f"https://api.the-odds-api.com/v3/odds/?sport={SPORT_KEY}&region=uk&apiKey={API_KEY}"
+ODDS_URL = "https://api.the-odds-api.com/v3/odds/"
+
+# Comma separated lists, e.g. ODDS_SPORTS=soccer_epl,soccer_efl_champ
+SPORTS = os.environ.get("ODDS_SPORTS", SPORT_KEY).split(",")
+REGIONS = os.environ.get("ODDS_REGIONS", "uk").split(",")
+
+CONCURRENCY = 4
+TIMEOUT = 10.0
+RETRIES = 3
+BACKOFF = 0.5
+# ODDS_STREAM=1 parses responses as they download, see stream_odds
+STREAM = os.environ.get("ODDS_STREAM") == "1"
+CHUNK_SIZE = 64 * 1024
 
 
 class Odds:
@@ -28,5 +45,182 @@ class OddsAPIResponse:
     data: List[GameData]
 
 
-def fetch_odds() -> OddsAPIResponse:
-    return requests.get(BETS_URL).json()
+class FetchError(Exception):
+    def __init__(self, sport: str, region: str, reason: str):
+        super().__init__(f"Fetching {sport} odds for {region} failed: {reason}")
+        self.sport = sport
+        self.region = region
+        self.reason = reason
+
+
+def _is_retryable(status_code: int) -> bool:
+    return status_code == 429 or status_code >= 500
+
+
+class AsyncOddsClient:
+    """Fetch odds for several sports and regions at once.
+
+    Requests share one connection pool and run on a thread pool no bigger
+    than concurrency, so at most that many are in flight. Each attempt times
+    out after timeout seconds; connection errors, timeouts, rate limiting and
+    server errors are retried up to retries times, waiting backoff seconds
+    and doubling each time. With stream set, each response is parsed while
+    it downloads, keeping only the soonest games and their best odds.
+    """
+
+    def __init__(
+        self,
+        base_url: str = ODDS_URL,
+        api_key: str = API_KEY,
+        concurrency: int = CONCURRENCY,
+        timeout: float = TIMEOUT,
+        retries: int = RETRIES,
+        backoff: float = BACKOFF,
+        stream: bool = STREAM,
+    ):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.stream = stream
+        # Quota reported by the API on the latest fetch, None until known
+        self.requests_remaining = None
+        self.requests_used = None
+
+    def _record_quota(self, headers):
+        """Keep the lowest remaining (and highest used) request count seen,
+        as responses to concurrent requests can arrive in any order"""
+        try:
+            remaining = int(headers["x-requests-remaining"])
+            used = int(headers["x-requests-used"])
+        except (KeyError, ValueError):
+            return
+        if self.requests_remaining is None or remaining < self.requests_remaining:
+            self.requests_remaining = remaining
+        if self.requests_used is None or used > self.requests_used:
+            self.requests_used = used
+
+    def _get(self, session: requests.Session, sport: str, region: str):
+        return session.get(
+            self.base_url,
+            params={"sport": sport, "region": region, "apiKey": self.api_key},
+            timeout=self.timeout,
+            stream=self.stream,
+        )
+
+    def _read(self, response: requests.Response) -> OddsAPIResponse:
+        if not self.stream:
+            return response.json()
+        # Imported here as the parser depends on this module's types
+        from tasks.fetch_odds.parser import stream_odds
+
+        with response:
+            return stream_odds(response.iter_content(CHUNK_SIZE))
+
+    async def _fetch(self, loop, executor, session, semaphore, sport, region):
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+
+            async with semaphore:
+                try:
+                    response = await loop.run_in_executor(
+                        executor, self._get, session, sport, region
+                    )
+                    self._record_quota(response.headers)
+                    if response.status_code == 200:
+                        return await loop.run_in_executor(
+                            executor, self._read, response
+                        )
+                except requests.RequestException as error:
+                    reason = str(error) or type(error).__name__
+                    logger.warning(
+                        "%s/%s attempt %s: %s", sport, region, attempt, reason
+                    )
+                    continue
+
+            response.close()
+            reason = f"HTTP {response.status_code}"
+            if not _is_retryable(response.status_code):
+                break
+            logger.warning("%s/%s attempt %s: %s", sport, region, attempt, reason)
+
+        raise FetchError(sport, region, reason)
+
+    async def fetch_all(
+        self, sports: Iterable[str], regions: Iterable[str]
+    ) -> Dict[str, List]:
+        """Fetch every sport in every region, returning the decoded responses
+        (or the exception raised) for each sport in the order of regions"""
+        sports, regions = list(sports), list(regions)
+        loop = asyncio.get_event_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self.concurrency, pool_maxsize=self.concurrency
+        )
+
+        with requests.Session() as session, ThreadPoolExecutor(
+            self.concurrency
+        ) as executor:
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            responses = await asyncio.gather(
+                *[
+                    self._fetch(loop, executor, session, semaphore, sport, region)
+                    for sport in sports
+                    for region in regions
+                ],
+                return_exceptions=True,
+            )
+
+        return {
+            sport: responses[index * len(regions) : (index + 1) * len(regions)]
+            for index, sport in enumerate(sports)
+        }
+
+    def fetch(
+        self, sports: Iterable[str] = None, regions: Iterable[str] = None
+    ) -> Dict[str, OddsAPIResponse]:
+        """Fetch the odds for each sport, merging the bookmakers of every
+        region that answered. Sports no region could be fetched for are
+        logged and left out."""
+        self.requests_remaining = self.requests_used = None
+        loop = asyncio.new_event_loop()
+        try:
+            asyncio.set_event_loop(loop)
+            responses = loop.run_until_complete(
+                self.fetch_all(sports or SPORTS, regions or REGIONS)
+            )
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+        odds = {}
+        for sport, sport_responses in responses.items():
+            fetched = []
+            for response in sport_responses:
+                if isinstance(response, Exception):
+                    logger.error(str(response))
+                else:
+                    fetched.append(response)
+            if fetched:
+                odds[sport] = merge_regions(fetched)
+        return odds
+
+
+def merge_regions(odds_responses: List[OddsAPIResponse]) -> OddsAPIResponse:
+    """Combine responses for the same sport from different regions, so each
+    game lists the bookmakers of every region"""
+    games: Dict[tuple, GameData] = {}
+    for odds_response in odds_responses:
+        for game_data in odds_response.get("data", []):
+            key = (game_data["commence_time"], tuple(game_data["teams"]))
+            if key in games:
+                games[key]["sites"] = games[key].get("sites", []) + game_data.get(
+                    "sites", []
+                )
+            else:
+                games[key] = dict(game_data)
+    return {"success": True, "data": list(games.values())}
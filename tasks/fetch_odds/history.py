@@ -0,0 +1,146 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterable, List, NamedTuple, Optional
+
+from tasks.fetch_odds.parser import Game
+from tasks.fetch_odds.writer import OUTPUT_DIR
+
+
+HISTORY_FILE = os.environ.get(
+    "ODDS_HISTORY_FILE", os.path.join(OUTPUT_DIR, "odds_history.sqlite3")
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fixture (
+    id INTEGER PRIMARY KEY,
+    sport TEXT NOT NULL,
+    home_team TEXT NOT NULL,
+    away_team TEXT NOT NULL,
+    start_time INTEGER NOT NULL,
+    UNIQUE (sport, home_team, away_team, start_time)
+);
+CREATE TABLE IF NOT EXISTS price (
+    fixture_id INTEGER NOT NULL REFERENCES fixture (id),
+    fetched_at INTEGER NOT NULL,
+    home_numerator INTEGER NOT NULL,
+    home_denominator INTEGER NOT NULL,
+    draw_numerator INTEGER NOT NULL,
+    draw_denominator INTEGER NOT NULL,
+    away_numerator INTEGER NOT NULL,
+    away_denominator INTEGER NOT NULL,
+    PRIMARY KEY (fixture_id, fetched_at)
+) WITHOUT ROWID;
+"""
+
+PRICE_COLUMNS = (
+    "home_numerator",
+    "home_denominator",
+    "draw_numerator",
+    "draw_denominator",
+    "away_numerator",
+    "away_denominator",
+)
+
+
+class Price(NamedTuple):
+    fetched_at: int
+    home_numerator: int
+    home_denominator: int
+    draw_numerator: int
+    draw_denominator: int
+    away_numerator: int
+    away_denominator: int
+
+
+class OddsHistory:
+    """Every price fetched for every fixture, in a SQLite file.
+
+    A fixture is a sport, home team, away team and start time. A price is
+    only stored when it differs from the fixture's previous one, so
+    fetching every few minutes costs a row per fixture per price change
+    rather than per fetch. The price at any time is the latest stored at or
+    before it.
+    """
+
+    def __init__(self, path: str = HISTORY_FILE):
+        self.path = path
+
+    @contextmanager
+    def _connect(self):
+        """ A connection to the store, committed on success and closed after """
+        connection = sqlite3.connect(self.path)
+        try:
+            with connection:
+                connection.executescript(SCHEMA)
+                yield connection
+        finally:
+            connection.close()
+
+    def _fixture_id(self, connection, sport, home_team, away_team, start_time):
+        row = connection.execute(
+            "SELECT id FROM fixture WHERE sport = ? AND home_team = ? "
+            "AND away_team = ? AND start_time = ?",
+            (sport, home_team, away_team, start_time),
+        ).fetchone()
+        return row[0] if row else None
+
+    def record(self, sport: str, games: Iterable[Game], fetched_at: int) -> int:
+        """ Store the prices of a fetch, returning how many had changed """
+        fetched_at = int(fetched_at)
+        written = 0
+        with self._connect() as connection:
+            for game in games:
+                key = (sport, game.home_team, game.away_team, game.start_time)
+                connection.execute(
+                    "INSERT OR IGNORE INTO fixture "
+                    "(sport, home_team, away_team, start_time) VALUES (?, ?, ?, ?)",
+                    key,
+                )
+                fixture_id = self._fixture_id(connection, *key)
+                prices = tuple(getattr(game, column) for column in PRICE_COLUMNS)
+                latest = connection.execute(
+                    f"SELECT {', '.join(PRICE_COLUMNS)} FROM price "
+                    "WHERE fixture_id = ? AND fetched_at <= ? "
+                    "ORDER BY fetched_at DESC LIMIT 1",
+                    (fixture_id, fetched_at),
+                ).fetchone()
+                if latest == prices:
+                    continue
+                connection.execute(
+                    "INSERT OR REPLACE INTO price VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (fixture_id, fetched_at) + prices,
+                )
+                written += 1
+        return written
+
+    def odds_at(
+        self, sport: str, home_team: str, away_team: str, start_time: int, at: int
+    ) -> Optional[Price]:
+        """ The price of a fixture as it stood at a time, None before the first """
+        with self._connect() as connection:
+            row = connection.execute(
+                f"SELECT fetched_at, {', '.join(PRICE_COLUMNS)} FROM price "
+                "JOIN fixture ON fixture.id = price.fixture_id "
+                "WHERE sport = ? AND home_team = ? AND away_team = ? "
+                "AND start_time = ? AND fetched_at <= ? "
+                "ORDER BY fetched_at DESC LIMIT 1",
+                (sport, home_team, away_team, start_time, int(at)),
+            ).fetchone()
+        return Price(*row) if row else None
+
+    def movement(
+        self, sport: str, home_team: str, away_team: str, start_time: int, since: int
+    ) -> List[Price]:
+        """The price of a fixture at since (e.g. when its gameweek was
+        created) followed by every change after it"""
+        with self._connect() as connection:
+            rows = connection.execute(
+                f"SELECT fetched_at, {', '.join(PRICE_COLUMNS)} FROM price "
+                "JOIN fixture ON fixture.id = price.fixture_id "
+                "WHERE sport = ? AND home_team = ? AND away_team = ? "
+                "AND start_time = ? AND fetched_at > ? ORDER BY fetched_at",
+                (sport, home_team, away_team, start_time, int(since)),
+            ).fetchall()
+        opening = self.odds_at(sport, home_team, away_team, start_time, since)
+        return ([opening] if opening else []) + [Price(*row) for row in rows]
@@ -1,9 +1,16 @@
+import codecs
+import heapq
 from fractions import Fraction
-from typing import List, Tuple
+from json import JSONDecodeError, JSONDecoder
+from typing import Callable, Iterable, Iterator, List, Tuple, Union
 
 from tasks.fetch_odds.client import OddsAPIResponse, GameData
 
 
+# Only worry about the next 10 games
+GAMES_KEPT = 10
+
+
 # No dataclass yet because pythonanywhere only goes up to 3.6
 class Game:
     def __init__(
@@ -85,15 +92,131 @@ def build_game(game_data: GameData) -> Game:
     )
 
 
-def parse_odds(odds_response: OddsAPIResponse) -> List[Game]:
-
-    data = odds_response.get("data", [])
-    # Only worry about the next 10 games
-    sorted_data = sorted(data, key=get_start_time)[0:10]
-
-    result = []
-
-    for game_data in sorted_data:
-        result.append(build_game(game_data))
-
-    return result
+def _soonest(games_data: Iterable[GameData], build: Callable, count: int) -> List:
+    """Build the count games starting soonest, in start time order, keeping
+    no more than count built games at a time"""
+    # Min-heap on the negated (start time, position) holds the latest kept
+    # game at the top, ready to be replaced by a sooner one
+    heap = []
+    for index, game_data in enumerate(games_data):
+        key = (-get_start_time(game_data), -index)
+        if len(heap) < count:
+            heapq.heappush(heap, (key, build(game_data)))
+        elif key > heap[0][0]:
+            heapq.heapreplace(heap, (key, build(game_data)))
+    return [item for _, item in sorted(heap, reverse=True)]
+
+
+def parse_odds(odds_response: OddsAPIResponse, count: int = GAMES_KEPT) -> List[Game]:
+    return _soonest(odds_response.get("data", []), build_game, count)
+
+
+class _JSONStream:
+    """Decode JSON values one at a time from text or bytes arriving in
+    chunks, holding no more than the value being decoded in memory"""
+
+    def __init__(self, chunks: Iterable[Union[str, bytes]]):
+        self.chunks = iter(chunks)
+        self.decoder = JSONDecoder()
+        self.utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.position = 0
+        self.finished = False
+
+    def _read(self) -> bool:
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.finished = True
+            return False
+        if isinstance(chunk, bytes):
+            chunk = self.utf8.decode(chunk)
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        return True
+
+    def _skip_whitespace(self):
+        while True:
+            while (
+                self.position < len(self.buffer)
+                and self.buffer[self.position] in " \t\n\r"
+            ):
+                self.position += 1
+            if self.position < len(self.buffer) or not self._read():
+                return
+
+    def peek(self) -> str:
+        """ The next character that isn't whitespace, empty at the end """
+        self._skip_whitespace()
+        return self.buffer[self.position : self.position + 1]
+
+    def take(self, expected: str) -> str:
+        character = self.peek()
+        if character not in expected:
+            raise ValueError(f"Expected one of {expected!r}, got {character!r}")
+        self.position += 1
+        return character
+
+    def value(self):
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except JSONDecodeError:
+                if not self._read():
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end < len(self.buffer) or not self._read():
+                self.position = end
+                return value
+
+
+def iter_games(chunks: Iterable[Union[str, bytes]]) -> Iterator[GameData]:
+    """Yield each game of an odds response as it is read chunk by chunk,
+    e.g. from requests' Response.iter_content"""
+    stream = _JSONStream(chunks)
+    stream.take("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        key = stream.value()
+        stream.take(":")
+        if key != "data":
+            stream.value()
+        else:
+            stream.take("[")
+            if stream.peek() == "]":
+                stream.take("]")
+            else:
+                yield stream.value()
+                while stream.take(",]") == ",":
+                    yield stream.value()
+        if stream.take(",}") == "}":
+            return
+
+
+def best_odds_only(game_data: GameData) -> GameData:
+    """A game with its bookmakers replaced by one holding the best price for
+    each outcome, which gives the same Game as all of them"""
+    compact = {key: value for key, value in game_data.items() if key != "sites"}
+    has_odds = any(
+        site.get("odds", {}).get("h2h") for site in game_data.get("sites", [])
+    )
+    compact["sites"] = (
+        [{"site_key": "best", "odds": {"h2h": list(get_best_odds(game_data))}}]
+        if has_odds
+        else []
+    )
+    return compact
+
+
+def stream_odds(
+    chunks: Iterable[Union[str, bytes]], count: int = GAMES_KEPT
+) -> OddsAPIResponse:
+    """Read an odds response chunk by chunk into one holding only the count
+    games starting soonest with their best odds. Memory use depends on the
+    size of a single game rather than the whole response."""
+    return {
+        "success": True,
+        "data": _soonest(iter_games(chunks), best_odds_only, count),
+    }
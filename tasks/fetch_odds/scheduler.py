@@ -0,0 +1,186 @@
+import json
+import logging
+import os
+import time
+from calendar import monthrange
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from tasks.fetch_odds.client import REGIONS, SPORTS, AsyncOddsClient, OddsAPIResponse
+from tasks.fetch_odds.history import OddsHistory
+from tasks.fetch_odds.parser import parse_odds
+from tasks.fetch_odds.writer import OUTPUT_DIR, write_odds_to_disk
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.environ.get("ODDS_CACHE_DIR", os.path.join(OUTPUT_DIR, "cache"))
+QUOTA_FILE = "quota.json"
+# Requests to keep in hand for manual fetches
+QUOTA_RESERVE = int(os.environ.get("ODDS_QUOTA_RESERVE", "10"))
+# Day of the month (UTC) the API quota resets, which follows the subscription
+QUOTA_RESET_DAY = int(os.environ.get("ODDS_QUOTA_RESET_DAY", "1"))
+
+HOUR = 60 * 60
+# (hours until the next game starts, seconds odds stay fresh), soonest first
+REFRESH_STEPS = ((3, 10 * 60), (24, HOUR), (72, 6 * HOUR))
+DEFAULT_TTL = 24 * HOUR
+
+FETCHED = "fetched"
+FRESH = "fresh"
+OVER_BUDGET = "over budget"
+FAILED = "failed"
+
+
+def refresh_interval(next_start_time: Optional[int], now: float) -> int:
+    """Seconds odds stay fresh for, shorter the sooner the next game starts"""
+    if next_start_time is None or next_start_time <= now:
+        return DEFAULT_TTL
+    hours_until = (next_start_time - now) / HOUR
+    for max_hours, ttl in REFRESH_STEPS:
+        if hours_until <= max_hours:
+            return ttl
+    return DEFAULT_TTL
+
+
+def next_quota_reset(after: float, reset_day: int = QUOTA_RESET_DAY) -> float:
+    """When the quota next resets after the given time: midnight UTC on
+    reset_day, or the month's last day if it is shorter"""
+    moment = datetime.fromtimestamp(after, timezone.utc)
+    year, month = moment.year, moment.month
+    while True:
+        day = min(reset_day, monthrange(year, month)[1])
+        reset = datetime(year, month, day, tzinfo=timezone.utc)
+        if reset > moment:
+            return reset.timestamp()
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def next_start_time(odds_response: OddsAPIResponse, now: float) -> Optional[int]:
+    start_times = [
+        game_data["commence_time"]
+        for game_data in odds_response.get("data", [])
+        if game_data["commence_time"] > now
+    ]
+    return min(start_times) if start_times else None
+
+
+class OddsFetchScheduler:
+    """Fetch odds only when they are due and the quota allows.
+
+    Each sport's raw response is cached in cache_dir along with when it was
+    fetched, and is only fetched again once it is older than
+    refresh_interval allows. The API's remaining request count is stored
+    after every fetch and trusted until the quota resets on reset_day;
+    sports that are due are fetched soonest game first until another would
+    leave fewer than reserve requests. Every fetch is also recorded in
+    history.
+    """
+
+    def __init__(
+        self,
+        sports: Iterable[str] = None,
+        regions: Iterable[str] = None,
+        client: AsyncOddsClient = None,
+        cache_dir: str = CACHE_DIR,
+        reserve: int = QUOTA_RESERVE,
+        history: OddsHistory = None,
+        reset_day: int = QUOTA_RESET_DAY,
+    ):
+        self.sports = list(sports or SPORTS)
+        self.regions = list(regions or REGIONS)
+        self.client = client or AsyncOddsClient()
+        self.cache_dir = cache_dir
+        self.reserve = reserve
+        self.history = history or OddsHistory()
+        self.reset_day = reset_day
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.cache_dir, filename)
+
+    def _load(self, filename: str) -> Optional[dict]:
+        try:
+            with open(self._path(filename)) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, filename: str, content: dict):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self._path(filename), "w") as file:
+            json.dump(content, file)
+
+    def cached(self, sport: str) -> Optional[dict]:
+        """ The cached {"fetched_at": ..., "response": ...} for a sport """
+        return self._load(f"raw_{sport}.json")
+
+    def requests_remaining(self, now: float) -> Optional[int]:
+        """Requests left as of the last fetch. A count from before the latest
+        quota reset is treated as unknown, so the next fetch picks up the new
+        count, but an exhausted quota is respected until then."""
+        quota = self._load(QUOTA_FILE)
+        if quota is None or now >= next_quota_reset(
+            quota["updated_at"], self.reset_day
+        ):
+            return None
+        return quota["remaining"]
+
+    def due(self, now: float) -> List[Tuple[Optional[int], str]]:
+        """Sports whose cached odds are missing or stale, as (next start
+        time, sport) pairs with the soonest first"""
+        due = []
+        for sport in self.sports:
+            cached = self.cached(sport)
+            if cached is None:
+                due.append((None, sport))
+                continue
+            start_time = next_start_time(cached["response"], now)
+            if now - cached["fetched_at"] >= refresh_interval(start_time, now):
+                due.append((start_time, sport))
+        return sorted(due, key=lambda pair: (pair[0] is not None, pair[0] or 0))
+
+    def affordable(self, sports: List[str], now: float) -> List[str]:
+        """ As many of sports, in order, as the remaining quota covers """
+        remaining = self.requests_remaining(now)
+        if remaining is None:
+            return sports
+        cost = len(self.regions)
+        count = max(remaining - self.reserve, 0) // cost
+        return sports[:count]
+
+    def run(self, now: float = None) -> Dict[str, str]:
+        """Fetch, parse and write out the sports that are due, returning
+        what happened to each sport"""
+        now = time.time() if now is None else now
+        due = [sport for _, sport in self.due(now)]
+        to_fetch = self.affordable(due, now)
+        outcomes = {sport: FRESH for sport in self.sports}
+        outcomes.update({sport: OVER_BUDGET for sport in due[len(to_fetch) :]})
+        if len(to_fetch) < len(due):
+            logger.warning("Quota too low to fetch %s", ", ".join(due[len(to_fetch) :]))
+        if not to_fetch:
+            return outcomes
+
+        odds = self.client.fetch(to_fetch, self.regions)
+        if self.client.requests_remaining is not None:
+            self._save(
+                QUOTA_FILE,
+                {
+                    "remaining": self.client.requests_remaining,
+                    "used": self.client.requests_used,
+                    "updated_at": now,
+                },
+            )
+
+        for sport in to_fetch:
+            if sport not in odds:
+                outcomes[sport] = FAILED
+                continue
+            self._save(
+                f"raw_{sport}.json", {"fetched_at": now, "response": odds[sport]}
+            )
+            games = parse_odds(odds[sport])
+            self.history.record(sport, games, now)
+            write_odds_to_disk(games, sport)
+            outcomes[sport] = FETCHED
+        return outcomes
@@ -1,19 +1,157 @@
 import os
-from json import dumps
-from typing import List
+import tempfile
+from json import dumps, load
+from typing import List, Optional
 
+from tasks.fetch_odds.client import SPORT_KEY
 from tasks.fetch_odds.parser import Game
 
 
 OUTPUT_DIR = os.path.dirname(os.environ["ODDS_OUTPUT_DIR"])
+OUTPUT_FILE = "output.json"
+# Earlier outputs are kept here so a bad fetch can be rolled back
+VERSIONS_DIR = "versions"
+VERSIONS_KEPT = int(os.environ.get("ODDS_VERSIONS_KEPT", "5"))
 
 
-def _write_to_disk(output_data: str):
-    with open(os.path.join(OUTPUT_DIR, "output.json"), "w") as file:
-        file.write(output_data)
+def output_filename(sport_key: str = SPORT_KEY) -> str:
+    """ The default sport keeps output.json, others get a file each """
+    if sport_key == SPORT_KEY:
+        return OUTPUT_FILE
+    return f"output_{sport_key}.json"
 
 
-def write_odds_to_disk(games: List[Game]):
+def _fsync_directory(directory: str):
+    """ Make a rename in directory survive a crash """
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _atomic_write(path: str, data: str):
+    """Write data to a temporary file beside path, flush it to disk and
+    rename it over path, so path always holds either the old or new data"""
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        # mkstemp only lets the owner read, the site may run as someone else
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    _fsync_directory(directory)
+
+
+def _manifest_path(output_dir: str, filename: str) -> str:
+    return os.path.join(output_dir, VERSIONS_DIR, f"{filename}.manifest.json")
+
+
+def read_manifest(filename: str = OUTPUT_FILE, output_dir: str = None) -> dict:
+    """The versions kept of an output file, oldest first, and which of them
+    is current"""
+    try:
+        with open(_manifest_path(output_dir or OUTPUT_DIR, filename)) as file:
+            return load(file)
+    except FileNotFoundError:
+        return {"current": None, "versions": []}
+
+
+def _publish(output_dir: str, filename: str, manifest: dict, output_data: str):
+    """Point the manifest at the new current version, then serve it. A crash
+    in between leaves the manifest a step ahead of the output, which
+    rollback allows for."""
+    _atomic_write(_manifest_path(output_dir, filename), dumps(manifest))
+    _atomic_write(os.path.join(output_dir, filename), output_data)
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+def _served_version(output_dir: str, filename: str, manifest: dict) -> Optional[str]:
+    """The kept version filename holds, worked out from its contents since
+    the manifest's current may not have been served yet. The manifest's
+    current wins if versions are identical, otherwise the newest match."""
+    output_data = _read(os.path.join(output_dir, filename))
+    if output_data is None:
+        return None
+    versions = manifest["versions"]
+    candidates = [manifest["current"]] + list(reversed(versions))
+    for version in candidates:
+        if version in versions and output_data == _read(
+            os.path.join(output_dir, VERSIONS_DIR, version)
+        ):
+            return version
+    return None
+
+
+def _write_to_disk(
+    output_data: str, filename: str = OUTPUT_FILE, output_dir: str = None
+):
+    """Save output_data as a new version of filename and make it current.
+
+    The version is written in full before filename is replaced, and both are
+    renamed into place, so readers never see a partly written file. Only
+    the latest VERSIONS_KEPT versions are kept.
+    """
+    output_dir = output_dir or OUTPUT_DIR
+    versions_dir = os.path.join(output_dir, VERSIONS_DIR)
+    os.makedirs(versions_dir, exist_ok=True)
+
+    manifest = read_manifest(filename, output_dir)
+    versions = manifest["versions"]
+    number = int(versions[-1].rsplit(".", 1)[1]) + 1 if versions else 1
+    version = f"{filename}.{number}"
+    _atomic_write(os.path.join(versions_dir, version), output_data)
+
+    versions = versions + [version]
+    _publish(
+        output_dir,
+        filename,
+        {"current": version, "versions": versions[-VERSIONS_KEPT:]},
+        output_data,
+    )
+    # Only once the manifest no longer lists them
+    for old_version in versions[:-VERSIONS_KEPT]:
+        os.remove(os.path.join(versions_dir, old_version))
+
+
+def rollback(
+    filename: str = OUTPUT_FILE, steps: int = 1, output_dir: str = None
+) -> Optional[str]:
+    """Make the version steps before the one filename holds current again,
+    returning its name, or None if not that many versions are kept"""
+    output_dir = output_dir or OUTPUT_DIR
+    manifest = read_manifest(filename, output_dir)
+    versions = manifest["versions"]
+    current = _served_version(output_dir, filename, manifest)
+    if current is None:
+        return None
+    index = versions.index(current) - steps
+    if index < 0:
+        return None
+
+    version = versions[index]
+    with open(os.path.join(output_dir, VERSIONS_DIR, version)) as file:
+        output_data = file.read()
+    _publish(
+        output_dir, filename, {"current": version, "versions": versions}, output_data
+    )
+    return version
+
+
+def write_odds_to_disk(games: List[Game], sport_key: str = SPORT_KEY):
     output_json = [
         {
             "home_team": game.home_team,
@@ -29,4 +167,4 @@ def write_odds_to_disk(games: List[Game]):
         for game in games
     ]
 
-    _write_to_disk(dumps(output_json))
+    _write_to_disk(dumps(output_json), output_filename(sport_key))
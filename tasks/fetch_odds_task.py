@@ -1,13 +1,14 @@
-from tasks.fetch_odds.client import fetch_odds
-from tasks.fetch_odds.parser import parse_odds
-from tasks.fetch_odds.writer import write_odds_to_disk
+import logging
 
+from tasks.fetch_odds.scheduler import OddsFetchScheduler
 
-def run_task():
-    odds_response = fetch_odds()
-    parsed_odds = parse_odds(odds_response)
-    write_odds_to_disk(parsed_odds)
+
+def run_task(scheduler=None):
+    scheduler = scheduler or OddsFetchScheduler()
+    return scheduler.run()
 
 
 if __name__ == "__main__":
-    run_task()
+    logging.basicConfig(level=logging.INFO)
+    for sport, outcome in sorted(run_task().items()):
+        print(f"{sport}: {outcome}")
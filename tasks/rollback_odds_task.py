@@ -0,0 +1,17 @@
+import sys
+
+from tasks.fetch_odds.client import SPORT_KEY
+from tasks.fetch_odds.writer import output_filename, rollback
+
+
+def run_task(sport_key: str = SPORT_KEY, steps: int = 1):
+    return rollback(output_filename(sport_key), steps)
+
+
+if __name__ == "__main__":
+    sport_key = sys.argv[1] if len(sys.argv) > 1 else SPORT_KEY
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    version = run_task(sport_key, steps)
+    if version is None:
+        sys.exit(f"No version of {sport_key} odds {steps} before the current one")
+    print(f"{sport_key}: rolled back to {version}")
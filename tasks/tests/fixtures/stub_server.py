@@ -0,0 +1,83 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlparse
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class StubOddsServer:
+    """Local stand in for the odds API, run on a background thread.
+
+    responses maps (sport, region) to a list of (status, body, headers)
+    tuples served in turn, the last one repeating. Every request's query
+    parameters are recorded in requests. delay seconds are slept before
+    answering.
+    """
+
+    def __init__(self, responses, delay=0.0):
+        self.responses = {key: list(value) for key, value in responses.items()}
+        self.delay = delay
+        self.requests = []
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = _ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = "http://127.0.0.1:{0}/v3/odds/".format(self.server.server_port)
+
+    def _next_response(self, key):
+        with self.lock:
+            queued = self.responses.get(key, [(404, {"success": False}, {})])
+            return queued.pop(0) if len(queued) > 1 else queued[0]
+
+    def _handle(self, handler):
+        params = {
+            name: values[0]
+            for name, values in parse_qs(urlparse(handler.path).query).items()
+        }
+        with self.lock:
+            self.requests.append(params)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            status, body, headers = self._next_response(
+                (params.get("sport"), params.get("region"))
+            )
+            content = json.dumps(body).encode()
+            handler.send_response(status)
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Content-Length", str(len(content)))
+            for name, value in headers.items():
+                handler.send_header(name, value)
+            handler.end_headers()
+            handler.wfile.write(content)
+        except ConnectionError:
+            # The client gave up waiting
+            pass
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
@@ -1,19 +1,124 @@
+import os
 from json import dumps
+from tempfile import TemporaryDirectory
 from unittest import TestCase
-from unittest.mock import Mock, patch
+from unittest.mock import call, patch
 
+from tasks.fetch_odds.client import AsyncOddsClient, merge_regions
+from tasks.fetch_odds.history import OddsHistory
+from tasks.fetch_odds.scheduler import OddsFetchScheduler
 from tasks.fetch_odds_task import run_task
 from tasks.tests.fixtures.fixtures import odds_json_fixture, output_json_fixture
+from tasks.tests.fixtures.stub_server import StubOddsServer
+
+
+def _client(server, **kwargs):
+    options = {"api_key": "key", "timeout": 2.0, "backoff": 0.01}
+    options.update(kwargs)
+    return AsyncOddsClient(base_url=server.url, **options)
+
+
+def _scheduler(server, sports, regions, cache_dir):
+    history = OddsHistory(os.path.join(cache_dir, "history.sqlite3"))
+    return OddsFetchScheduler(
+        sports, regions, _client(server), cache_dir, history=history
+    )
 
 
 class FetchOddsTest(TestCase):
     @patch("tasks.fetch_odds.writer._write_to_disk")
-    @patch("tasks.fetch_odds.client.requests")
-    def test_fetch_odds_end_to_end(self, mock_requests, mock_write):
-        mock_response = Mock()
-        mock_response.json.return_value = odds_json_fixture()
-        mock_requests.get.return_value = mock_response
+    def test_fetch_odds_end_to_end(self, mock_write):
+        stub = StubOddsServer({("soccer_epl", "uk"): [(200, odds_json_fixture(), {})]})
+
+        with stub, TemporaryDirectory() as cache_dir:
+            run_task(_scheduler(stub, ["soccer_epl"], ["uk"], cache_dir))
+
+        mock_write.assert_called_once_with(dumps(output_json_fixture()), "output.json")
+        self.assertEqual(
+            [{"sport": "soccer_epl", "region": "uk", "apiKey": "key"}], stub.requests
+        )
+
+    @patch("tasks.fetch_odds.writer._write_to_disk")
+    def test_each_sport_written_separately(self, mock_write):
+        stub = StubOddsServer(
+            {
+                ("soccer_epl", "uk"): [(200, odds_json_fixture(), {})],
+                ("soccer_efl_champ", "uk"): [(200, {"data": []}, {})],
+            }
+        )
+
+        with stub, TemporaryDirectory() as cache_dir:
+            run_task(
+                _scheduler(stub, ["soccer_epl", "soccer_efl_champ"], ["uk"], cache_dir)
+            )
+
+        self.assertEqual(
+            [
+                call(dumps(output_json_fixture()), "output.json"),
+                call(dumps([]), "output_soccer_efl_champ.json"),
+            ],
+            mock_write.call_args_list,
+        )
+
+
+class AsyncOddsClientTest(TestCase):
+    def test_fetches_sports_and_regions_concurrently(self):
+        responses = {
+            (sport, region): [(200, {"data": []}, {})]
+            for sport in ("a", "b", "c")
+            for region in ("uk", "eu")
+        }
+        with StubOddsServer(responses, delay=0.2) as stub:
+            odds = _client(stub, concurrency=3).fetch(["a", "b", "c"], ["uk", "eu"])
+
+        self.assertEqual({"a", "b", "c"}, set(odds))
+        self.assertEqual(6, len(stub.requests))
+        self.assertEqual(3, stub.max_in_flight)
+
+    def test_retries_server_errors(self):
+        stub = StubOddsServer(
+            {("a", "uk"): [(500, {}, {}), (503, {}, {}), (200, {"data": []}, {})]}
+        )
+        with stub, self.assertLogs("tasks.fetch_odds.client", "WARNING"):
+            odds = _client(stub).fetch(["a"], ["uk"])
+
+        self.assertEqual({"a": {"success": True, "data": []}}, odds)
+        self.assertEqual(3, len(stub.requests))
+
+    def test_gives_up_after_retries(self):
+        with StubOddsServer({("a", "uk"): [(500, {}, {})]}) as stub:
+            with self.assertLogs("tasks.fetch_odds.client", "ERROR"):
+                odds = _client(stub, retries=2).fetch(["a"], ["uk"])
+
+        self.assertEqual({}, odds)
+        self.assertEqual(3, len(stub.requests))
+
+    def test_client_errors_not_retried(self):
+        with StubOddsServer({("a", "uk"): [(401, {}, {})]}) as stub:
+            with self.assertLogs("tasks.fetch_odds.client", "ERROR"):
+                _client(stub).fetch(["a"], ["uk"])
+
+        self.assertEqual(1, len(stub.requests))
+
+    def test_timeouts_retried(self):
+        with StubOddsServer(
+            {("a", "uk"): [(200, {"data": []}, {})]}, delay=0.3
+        ) as stub:
+            with self.assertLogs("tasks.fetch_odds.client", "ERROR"):
+                odds = _client(stub, timeout=0.05, retries=1).fetch(["a"], ["uk"])
+
+        self.assertEqual({}, odds)
+        self.assertEqual(2, len(stub.requests))
 
-        run_task()
+    def test_merge_regions_combines_bookmakers(self):
+        game = {"commence_time": 1, "teams": ["A", "B"], "home_team": "A"}
+        merged = merge_regions(
+            [
+                {"data": [dict(game, sites=[{"site_key": "uk"}])]},
+                {"data": [dict(game, sites=[{"site_key": "eu"}])]},
+            ]
+        )
 
-        mock_write.assert_called_once_with(dumps(output_json_fixture()))
+        self.assertEqual(
+            [{"site_key": "uk"}, {"site_key": "eu"}], merged["data"][0]["sites"]
+        )
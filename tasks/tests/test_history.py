@@ -0,0 +1,79 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from tasks.fetch_odds.history import OddsHistory, Price
+from tasks.fetch_odds.parser import Game
+
+START = 1604147400
+
+
+def _game(home_numerator, start_time=START):
+    return Game(
+        home_team="Burnley",
+        away_team="Chelsea",
+        home_numerator=home_numerator,
+        home_denominator=1,
+        draw_numerator=5,
+        draw_denominator=2,
+        away_numerator=4,
+        away_denominator=5,
+        start_time=start_time,
+    )
+
+
+class OddsHistoryTest(TestCase):
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.history = OddsHistory(os.path.join(directory.name, "history.sqlite3"))
+
+    def _odds_at(self, at):
+        return self.history.odds_at("soccer_epl", "Burnley", "Chelsea", START, at)
+
+    def test_only_changed_prices_stored(self):
+        self.assertEqual(1, self.history.record("soccer_epl", [_game(3)], 100))
+        self.assertEqual(0, self.history.record("soccer_epl", [_game(3)], 200))
+        self.assertEqual(1, self.history.record("soccer_epl", [_game(4)], 300))
+
+        self.assertEqual(
+            [100, 300],
+            [
+                price.fetched_at
+                for price in self.history.movement(
+                    "soccer_epl", "Burnley", "Chelsea", START, 0
+                )
+            ],
+        )
+
+    def test_odds_at_time(self):
+        self.history.record("soccer_epl", [_game(3)], 100)
+        self.history.record("soccer_epl", [_game(4)], 300)
+
+        self.assertIsNone(self._odds_at(99))
+        self.assertEqual(Price(100, 3, 1, 5, 2, 4, 5), self._odds_at(100))
+        self.assertEqual(3, self._odds_at(299).home_numerator)
+        self.assertEqual(4, self._odds_at(1000).home_numerator)
+
+    def test_movement_since(self):
+        for fetched_at, home_numerator in ((100, 3), (200, 4), (300, 5), (400, 4)):
+            self.history.record("soccer_epl", [_game(home_numerator)], fetched_at)
+
+        movement = self.history.movement("soccer_epl", "Burnley", "Chelsea", START, 250)
+
+        self.assertEqual(
+            [(200, 4), (300, 5), (400, 4)],
+            [(price.fetched_at, price.home_numerator) for price in movement],
+        )
+
+    def test_fixtures_kept_apart(self):
+        self.history.record("soccer_epl", [_game(3), _game(7, START + 1)], 100)
+        self.history.record("soccer_efl_champ", [_game(9)], 100)
+
+        self.assertEqual(3, self._odds_at(100).home_numerator)
+        self.assertEqual(
+            9,
+            self.history.odds_at(
+                "soccer_efl_champ", "Burnley", "Chelsea", START, 100
+            ).home_numerator,
+        )
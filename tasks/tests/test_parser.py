@@ -0,0 +1,86 @@
+from json import dumps
+from unittest import TestCase
+
+from tasks.fetch_odds.client import AsyncOddsClient
+from tasks.fetch_odds.parser import build_game, iter_games, parse_odds, stream_odds
+from tasks.tests.fixtures.fixtures import odds_json_fixture
+from tasks.tests.fixtures.stub_server import StubOddsServer
+
+
+def _chunks(text, size):
+    return [text[start : start + size] for start in range(0, len(text), size)]
+
+
+def _games(games):
+    return [vars(game) for game in games]
+
+
+class ParseOddsTest(TestCase):
+    def test_soonest_games_in_start_time_order(self):
+        odds = odds_json_fixture()
+        # Cuts off part way through games starting at the same time
+        for count in (10, 13, 25):
+            expected = sorted(odds["data"], key=lambda game: game["commence_time"])
+            self.assertEqual(
+                _games([build_game(game) for game in expected[:count]]),
+                _games(parse_odds(odds, count)),
+            )
+
+
+class StreamOddsTest(TestCase):
+    def test_same_games_as_parsing_whole_response(self):
+        odds = odds_json_fixture()
+        text = dumps(odds, indent=2)
+
+        for size in (1, 7, 4096):
+            with self.subTest(size=size):
+                self.assertEqual(
+                    _games(parse_odds(odds)),
+                    _games(parse_odds(stream_odds(_chunks(text, size)))),
+                )
+
+    def test_only_soonest_games_kept(self):
+        streamed = stream_odds([dumps(odds_json_fixture())], count=3)
+
+        self.assertEqual(
+            [1604147400, 1604156400, 1604165400],
+            [game["commence_time"] for game in streamed["data"]],
+        )
+        self.assertEqual(1, len(streamed["data"][0]["sites"]))
+
+    def test_reads_bytes_split_inside_characters(self):
+        text = dumps({"data": [{"teams": ["Bayern München"]}]}, ensure_ascii=False)
+
+        games = list(iter_games(_chunks(text.encode("utf-8"), 1)))
+
+        self.assertEqual([{"teams": ["Bayern München"]}], games)
+
+    def test_other_keys_and_numbers_across_chunks(self):
+        text = '{"success": true, "data": [{"commence_time": 123456}, {}], "x": 1}'
+
+        for size in range(1, len(text)):
+            with self.subTest(size=size):
+                self.assertEqual(
+                    [{"commence_time": 123456}, {}],
+                    list(iter_games(_chunks(text, size))),
+                )
+
+    def test_empty_and_truncated_responses(self):
+        self.assertEqual([], list(iter_games(['{"data": []}'])))
+        self.assertEqual([], list(iter_games(["{}"])))
+        with self.assertRaises(ValueError):
+            list(iter_games(['{"data": [{"commence_time": 1}, {"comm']))
+
+    def test_client_streams_responses(self):
+        stub = StubOddsServer({("soccer_epl", "uk"): [(200, odds_json_fixture(), {})]})
+
+        with stub:
+            odds = AsyncOddsClient(base_url=stub.url, api_key="key", stream=True).fetch(
+                ["soccer_epl"], ["uk"]
+            )
+
+        self.assertEqual(10, len(odds["soccer_epl"]["data"]))
+        self.assertEqual(
+            _games(parse_odds(odds_json_fixture())),
+            _games(parse_odds(odds["soccer_epl"])),
+        )
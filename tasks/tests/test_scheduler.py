@@ -0,0 +1,150 @@
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from tasks.fetch_odds.client import AsyncOddsClient
+from tasks.fetch_odds.history import OddsHistory
+from tasks.fetch_odds.scheduler import (
+    FETCHED,
+    FRESH,
+    HOUR,
+    OVER_BUDGET,
+    OddsFetchScheduler,
+    next_quota_reset,
+    refresh_interval,
+)
+from tasks.tests.fixtures.stub_server import StubOddsServer
+
+# 2020-09-13 12:26:40 UTC
+NOW = 1600000000
+DAY = 24 * HOUR
+
+
+def _odds(*start_times):
+    return {
+        "data": [
+            {
+                "commence_time": start_time,
+                "teams": ["Home", "Away"],
+                "home_team": "Home",
+                "sites": [{"odds": {"h2h": [2.0, 3.0, 3.5]}}],
+            }
+            for start_time in start_times
+        ]
+    }
+
+
+def _quota(remaining):
+    return {"x-requests-remaining": str(remaining), "x-requests-used": "5"}
+
+
+@patch("tasks.fetch_odds.scheduler.write_odds_to_disk")
+class OddsFetchSchedulerTest(TestCase):
+    def setUp(self):
+        self.cache = TemporaryDirectory()
+        self.addCleanup(self.cache.cleanup)
+
+    def _scheduler(self, stub, sports, **kwargs):
+        client = AsyncOddsClient(base_url=stub.url, api_key="key", backoff=0.01)
+        history = OddsHistory(os.path.join(self.cache.name, "history.sqlite3"))
+        return OddsFetchScheduler(
+            sports, ["uk"], client, self.cache.name, history=history, **kwargs
+        )
+
+    def _cache(self, sport, fetched_at, response):
+        with open(os.path.join(self.cache.name, f"raw_{sport}.json"), "w") as file:
+            json.dump({"fetched_at": fetched_at, "response": response}, file)
+
+    def test_refresh_interval_shrinks_as_kick_off_approaches(self, mock_write):
+        self.assertEqual(24 * HOUR, refresh_interval(None, NOW))
+        self.assertEqual(24 * HOUR, refresh_interval(NOW + 5 * 24 * HOUR, NOW))
+        self.assertEqual(6 * HOUR, refresh_interval(NOW + 48 * HOUR, NOW))
+        self.assertEqual(HOUR, refresh_interval(NOW + 12 * HOUR, NOW))
+        self.assertEqual(10 * 60, refresh_interval(NOW + HOUR, NOW))
+
+    def test_fetches_and_caches_when_nothing_cached(self, mock_write):
+        stub = StubOddsServer({("a", "uk"): [(200, _odds(NOW + HOUR), _quota(90))]})
+        with stub:
+            outcomes = self._scheduler(stub, ["a"]).run(NOW)
+
+        self.assertEqual({"a": FETCHED}, outcomes)
+        self.assertEqual(1, mock_write.call_count)
+        scheduler = self._scheduler(stub, ["a"])
+        self.assertEqual(NOW, scheduler.cached("a")["fetched_at"])
+        self.assertEqual(90, scheduler.requests_remaining(NOW))
+
+    def test_skips_fresh_odds(self, mock_write):
+        self._cache("a", NOW - 30 * 60, _odds(NOW + 48 * HOUR))
+
+        with StubOddsServer({}) as stub:
+            outcomes = self._scheduler(stub, ["a"]).run(NOW)
+
+        self.assertEqual({"a": FRESH}, outcomes)
+        self.assertEqual([], stub.requests)
+        mock_write.assert_not_called()
+
+    def test_fetches_more_often_near_kick_off(self, mock_write):
+        self._cache("soon", NOW - 30 * 60, _odds(NOW + HOUR))
+        self._cache("later", NOW - 30 * 60, _odds(NOW + 48 * HOUR))
+        stub = StubOddsServer({("soon", "uk"): [(200, _odds(NOW + HOUR), {})]})
+
+        with stub:
+            outcomes = self._scheduler(stub, ["soon", "later"]).run(NOW)
+
+        self.assertEqual({"soon": FETCHED, "later": FRESH}, outcomes)
+        self.assertEqual(["soon"], [request["sport"] for request in stub.requests])
+
+    def test_respects_remaining_quota(self, mock_write):
+        self._cache("soon", NOW - 2 * HOUR, _odds(NOW + 2 * HOUR))
+        self._cache("later", NOW - 2 * 24 * HOUR, _odds(NOW + 5 * 24 * HOUR))
+        with open(os.path.join(self.cache.name, "quota.json"), "w") as file:
+            json.dump({"remaining": 11, "used": 489, "updated_at": NOW - HOUR}, file)
+        stub = StubOddsServer(
+            {("soon", "uk"): [(200, _odds(NOW + 2 * HOUR), _quota(10))]}
+        )
+
+        with stub, self.assertLogs("tasks.fetch_odds.scheduler", "WARNING"):
+            outcomes = self._scheduler(stub, ["later", "soon"], reserve=10).run(NOW)
+
+        self.assertEqual({"soon": FETCHED, "later": OVER_BUDGET}, outcomes)
+        self.assertEqual(
+            10, self._scheduler(stub, ["soon"]).requests_remaining(NOW + HOUR)
+        )
+
+    def _save_quota(self, remaining, updated_at):
+        with open(os.path.join(self.cache.name, "quota.json"), "w") as file:
+            json.dump(
+                {"remaining": remaining, "used": 500, "updated_at": updated_at}, file
+            )
+
+    def test_next_quota_reset(self, mock_write):
+        # 2020-10-01 and 2020-09-15, both midnight UTC
+        self.assertEqual(1601510400, next_quota_reset(NOW, 1))
+        self.assertEqual(1601510400, next_quota_reset(1601510400 - 1, 1))
+        self.assertEqual(1600128000, next_quota_reset(NOW, 15))
+        # Past the end of September, so its last day
+        self.assertEqual(1601424000, next_quota_reset(NOW, 31))
+        # Into the next year
+        self.assertEqual(1609459200, next_quota_reset(1607000000, 1))
+
+    def test_exhausted_quota_respected_until_reset(self, mock_write):
+        self._save_quota(0, NOW - 2 * DAY)
+
+        with StubOddsServer({}) as stub:
+            for days in range(0, 18, 3):
+                with self.assertLogs("tasks.fetch_odds.scheduler", "WARNING"):
+                    outcomes = self._scheduler(stub, ["a"]).run(NOW + days * DAY)
+                self.assertEqual({"a": OVER_BUDGET}, outcomes)
+
+        self.assertEqual([], stub.requests)
+
+    def test_quota_from_before_reset_treated_as_unknown(self, mock_write):
+        # Used up in August, before the quota reset on 1 September
+        self._save_quota(0, NOW - 20 * DAY)
+
+        with StubOddsServer({("a", "uk"): [(200, _odds(), _quota(499))]}) as stub:
+            outcomes = self._scheduler(stub, ["a"]).run(NOW)
+
+        self.assertEqual({"a": FETCHED}, outcomes)
@@ -0,0 +1,108 @@
+import os
+from json import dumps
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from tasks.fetch_odds import writer
+from tasks.fetch_odds.writer import _write_to_disk, read_manifest, rollback
+
+
+class WriterTest(TestCase):
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output_dir = directory.name
+
+    def _write(self, output_data):
+        _write_to_disk(output_data, "output.json", self.output_dir)
+
+    def _output(self):
+        with open(os.path.join(self.output_dir, "output.json")) as file:
+            return file.read()
+
+    def test_versions_kept_with_manifest(self):
+        with patch.object(writer, "VERSIONS_KEPT", 2):
+            for number in range(3):
+                self._write(dumps([number]))
+
+        self.assertEqual("[2]", self._output())
+        self.assertEqual(
+            {
+                "current": "output.json.3",
+                "versions": ["output.json.2", "output.json.3"],
+            },
+            read_manifest("output.json", self.output_dir),
+        )
+        self.assertEqual(
+            [
+                "output.json.2",
+                "output.json.3",
+                "output.json.manifest.json",
+            ],
+            sorted(os.listdir(os.path.join(self.output_dir, "versions"))),
+        )
+
+    def test_failed_write_leaves_output_whole(self):
+        self._write("[1]")
+
+        with patch.object(writer.os, "fsync", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self._write("[2]")
+
+        self.assertEqual("[1]", self._output())
+        self.assertEqual(
+            "output.json.1", read_manifest("output.json", self.output_dir)["current"]
+        )
+        self.assertFalse(
+            [name for name in os.listdir(self.output_dir) if name.startswith(".tmp-")]
+        )
+
+    def test_rollback(self):
+        for number in range(3):
+            self._write(dumps([number]))
+
+        self.assertEqual("output.json.2", rollback("output.json", 1, self.output_dir))
+        self.assertEqual("[1]", self._output())
+        self.assertEqual("output.json.1", rollback("output.json", 1, self.output_dir))
+        self.assertEqual("[0]", self._output())
+        self.assertIsNone(rollback("output.json", 1, self.output_dir))
+        self.assertEqual("[0]", self._output())
+
+        self._write("[3]")
+        manifest = read_manifest("output.json", self.output_dir)
+        self.assertEqual("output.json.4", manifest["current"])
+        self.assertEqual("[3]", self._output())
+
+    def test_rollback_after_crash_while_publishing(self):
+        for number in range(2):
+            self._write(dumps([number]))
+
+        atomic_write = writer._atomic_write
+
+        def crash_serving_output(path, data):
+            if path.endswith(os.path.join(os.sep, "output.json")):
+                raise KeyboardInterrupt
+            atomic_write(path, data)
+
+        with patch.object(writer, "_atomic_write", side_effect=crash_serving_output):
+            with self.assertRaises(KeyboardInterrupt):
+                self._write("[2]")
+
+        # The manifest moved on to version 3 but version 2 is still served
+        manifest = read_manifest("output.json", self.output_dir)
+        self.assertEqual("output.json.3", manifest["current"])
+        self.assertEqual("[1]", self._output())
+
+        self.assertEqual("output.json.1", rollback("output.json", 1, self.output_dir))
+        self.assertEqual("[0]", self._output())
+
+    def test_rollback_with_identical_versions(self):
+        for output_data in ("[0]", "[1]", "[1]"):
+            self._write(output_data)
+
+        self.assertEqual("output.json.2", rollback("output.json", 1, self.output_dir))
+        self.assertEqual("output.json.1", rollback("output.json", 1, self.output_dir))
+
+    def test_rollback_without_versions(self):
+        self.assertIsNone(rollback("output.json", 1, self.output_dir))